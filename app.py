@@ -1,13 +1,11 @@
 import os
-import logging
-import json
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from db_config import build_engine_options, sqlite_pragmas_from_env, register_sqlite_pragmas
+from serialization import FastJSONProvider, dumps
+from log_config import parse_level, parse_levels
 
 class Base(DeclarativeBase):
     pass
@@ -19,44 +17,132 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# jsonify and the tojson filter use the fast encoder
+app.json = FastJSONProvider(app)
+
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///policy_simulator.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = build_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+app.config["SQLITE_PRAGMAS"] = sqlite_pragmas_from_env()
+
+# Rendered PDF reports are cached on disk, keyed by their content
+app.config["REPORT_CACHE_DIR"] = os.environ.get("REPORT_CACHE_DIR", os.path.join(app.instance_path, "report_cache"))
+app.config["REPORT_CACHE_MAX_BYTES"] = int(os.environ.get("REPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Processes rendering bulk report exports (0 = one per CPU)
+app.config["REPORT_WORKERS"] = int(os.environ.get("REPORT_WORKERS", 0)) or None
+
+# Background jobs: worker threads per process (0 disables them), result files and retention
+app.config["JOB_WORKERS"] = int(os.environ.get("JOB_WORKERS", 2))
+app.config["JOB_RESULTS_DIR"] = os.environ.get("JOB_RESULTS_DIR", os.path.join(app.instance_path, "job_results"))
+app.config["JOB_RESULT_TTL"] = int(os.environ.get("JOB_RESULT_TTL", 24 * 3600))
+app.config["JOB_STALE_AFTER"] = int(os.environ.get("JOB_STALE_AFTER", 600))
+# Response cache for pages and API responses; RESPONSE_CACHE_DIR enables the on-disk tier
+app.config["RESPONSE_CACHE_ENABLED"] = os.environ.get("RESPONSE_CACHE", "on").lower() not in ("0", "off", "false", "no")
+app.config["RESPONSE_CACHE_MAX_ENTRIES"] = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+app.config["RESPONSE_CACHE_MAX_AGE"] = int(os.environ.get("RESPONSE_CACHE_MAX_AGE", 0))
+app.config["RESPONSE_CACHE_DIR"] = os.environ.get("RESPONSE_CACHE_DIR")
+app.config["RESPONSE_CACHE_GENERATION_FILE"] = os.environ.get(
+    "RESPONSE_CACHE_GENERATION_FILE", os.path.join(app.instance_path, "cache_generation"))
+app.config["RESPONSE_CACHE_BUILD"] = os.environ.get("RESPONSE_CACHE_BUILD")  # e.g. a commit id; default: source fingerprint
+
+# Prebuilt ML models (written on first training, or with `flask train-model`); loaded in the
+# background after startup when ML_WARMUP is on
+app.config["MODEL_ARTIFACT_PATH"] = os.environ.get("MODEL_ARTIFACT_PATH", os.path.join(app.instance_path, "policy_model.joblib"))
+app.config["ML_WARMUP"] = os.environ.get("ML_WARMUP", "on").lower() not in ("0", "off", "false", "no")
+
+# Backtests of the models against historical outcomes (`flask backtest`, also run after `flask train-model`)
+app.config["BACKTEST_DIR"] = os.environ.get("BACKTEST_DIR", os.path.join(app.instance_path, "backtests"))
+
+# Identical concurrent simulations share one prediction; PREDICTION_COALESCE_DIR (a local
+# directory) extends this across worker processes on the same host
+app.config["PREDICTION_COALESCING"] = os.environ.get("PREDICTION_COALESCING", "on").lower() not in ("0", "off", "false", "no")
+app.config["PREDICTION_COALESCE_DIR"] = os.environ.get("PREDICTION_COALESCE_DIR")
+app.config["PREDICTION_COALESCE_TIMEOUT"] = float(os.environ.get("PREDICTION_COALESCE_TIMEOUT", 30))
+
+# Request profiling: requests carrying a token signed with PROFILING_SECRET (`flask profile-token`),
+# and a PROFILE_SAMPLE_RATE fraction of all requests, run under cProfile
+app.config["PROFILING_SECRET"] = os.environ.get("PROFILING_SECRET")
+app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+app.config["PROFILE_MAX_FILES"] = int(os.environ.get("PROFILE_MAX_FILES", 200))
+
+# Logging (see log_config.py): JSON lines written off the request path, one level for everything
+# plus per-logger/module overrides ("ml_models=DEBUG,sqlalchemy.engine=INFO"), a kept fraction of
+# DEBUG records and an access log line per request
+app.config["LOG_LEVEL"] = parse_level(os.environ.get("LOG_LEVEL", "INFO"))
+app.config["LOG_LEVELS"] = parse_levels(os.environ.get("LOG_LEVELS"))
+app.config["LOG_FORMAT"] = os.environ.get("LOG_FORMAT", "json").lower()
+app.config["LOG_DEBUG_SAMPLE_RATE"] = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 1.0))
+app.config["LOG_QUEUE_SIZE"] = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+app.config["LOG_REQUESTS"] = os.environ.get("LOG_REQUESTS", "on").lower() not in ("0", "off", "false", "no")
+
+# Bulk report exports larger than this are queued as jobs instead of streamed inline
+app.config["BULK_REPORTS_INLINE_MAX"] = int(os.environ.get("BULK_REPORTS_INLINE_MAX", 25))
+# Batch simulations larger than this are queued as jobs
+app.config["SIMULATE_BATCH_INLINE_MAX"] = int(os.environ.get("SIMULATE_BATCH_INLINE_MAX", 200))
 
 # Add custom Jinja2 filter for JSON serialization
 @app.template_filter('tojsonfilter')
 def to_json_filter(obj):
-    """Convert object to JSON for JavaScript"""
-    try:
-        # Convert objects with to_dict method
-        if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
-            json_list = []
-            for item in obj:
-                if hasattr(item, 'to_dict'):
-                    json_list.append(item.to_dict())
-                else:
-                    json_list.append(str(item))
-            return json.dumps(json_list)
-        elif hasattr(obj, 'to_dict'):
-            return json.dumps(obj.to_dict())
-        else:
-            return json.dumps(obj)
-    except Exception:
-        return json.dumps([])
+    """Convert object to JSON for JavaScript (objects with to_dict() are converted)"""
+    if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, dict)):
+        obj = list(obj)
+    return dumps(obj)
 
 # Initialize the app with the extension
 db.init_app(app)
 
-with app.app_context():
-    # Import models to ensure tables are created
-    import models
-    db.create_all()
+_initialized = False
+
+def create_app():
+    """
+    Application factory: finish setting up the shared app (database profile,
+    schema, caches, routes and CLI commands) and return it. Only the first call
+    does any work. Heavy dependencies (the ML stack, ReportLab) are not imported
+    here; they load on first use.
+    """
+    global _initialized
+    if _initialized:
+        return app
+    
+    # Queue-backed structured logging and request ids, before anything else logs
+    import log_config
+    log_config.init_app(app)
+    
+    with app.app_context():
+        # Apply the SQLite performance profile before the first connection is opened
+        register_sqlite_pragmas(db.engine, app.config["SQLITE_PRAGMAS"])
+        
+        # Request and query latency metrics (see metrics.py)
+        import metrics
+        metrics.register_query_metrics(db.engine)
+        metrics.init_app(app)
+        
+        # Opt-in cProfile runs of individual requests (see profiling.py)
+        from profiling import request_profiler, register_query_capture
+        register_query_capture(db.engine)
+        request_profiler.init_app(app)
+        
+        # Create tables and apply pending migrations, skipped when the schema marker is current
+        import models
+        from migrations import ensure_schema
+        ensure_schema()
+        
+        # Cached responses are tagged with the code build, so a deploy starts from a clean cache
+        from response_cache import response_cache
+        response_cache.init_app(app)
+        
+        from coalescing import prediction_flight
+        prediction_flight.init_app(app)
+        
+        # Import and register routes
+        import routes
+        
+        # Register CLI commands
+        import commands
     
-    # Import and register routes
-    from routes import *
+    _initialized = True
+    return app
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
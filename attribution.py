@@ -0,0 +1,97 @@
+"""
+Per-prediction feature attributions: how much each input moved a prediction
+away from the model's average output.
+
+For the random forests this is the tree-path decomposition (Saabas): walking
+a tree from its root to the leaf a policy lands in, every split changes the
+node value, and the change is credited to the feature split on. The credits
+along the path to each leaf depend only on the tree, so they are computed
+once per fitted forest into a (node, feature) table; attributing a batch then
+takes one ``apply`` (the leaf of every policy in every tree) and a table
+gather. For the linear model a feature's contribution is its coefficient times
+its distance from the training mean.
+
+Either way a prediction equals its base value plus the sum of its
+contributions.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+# Model inputs, in feature matrix column order (see PolicyImpactPredictor.encode_features)
+FEATURES = ('numeric_change', 'time_period', 'sector', 'region')
+
+# Decimal places kept for stored and displayed attributions
+ATTRIBUTION_DECIMALS = 4
+
+# Contribution tables per fitted forest; dropped with the forest
+_tables = weakref.WeakKeyDictionary()
+_tables_lock = threading.Lock()
+
+
+def _path_contributions(tree, n_features):
+    """(node, feature) sums of the value changes credited to each feature on the path to every node"""
+    left, right, feature = tree.children_left, tree.children_right, tree.feature
+    values = tree.value[:, 0, 0]
+    parent = np.full(tree.node_count, -1)
+    internal = np.flatnonzero(left >= 0)
+    parent[left[internal]] = internal
+    parent[right[internal]] = internal
+
+    contributions = np.zeros((tree.node_count, n_features))
+    level = np.array([0])
+    while level.size:
+        children = np.concatenate([left[level], right[level]])
+        children = children[children >= 0]
+        parents = parent[children]
+        contributions[children] = contributions[parents]
+        contributions[children, feature[parents]] += values[children] - values[parents]
+        level = children
+    return contributions
+
+
+def contribution_table(forest):
+    """
+    (table, offsets, base) for a fitted forest: every tree's path
+    contributions stacked into one table, the first row of each tree in it,
+    and the mean root value
+    """
+    table = _tables.get(forest)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(forest)
+            if table is None:
+                trees = [estimator.tree_ for estimator in forest.estimators_]
+                offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+                table = (np.concatenate([_path_contributions(tree, forest.n_features_in_) for tree in trees]),
+                         offsets, float(np.mean([tree.value[0, 0, 0] for tree in trees])))
+                _tables[forest] = table
+    return table
+
+
+def forest_attributions(forest, X):
+    """(base, contributions): the forest's mean root value and (N, feature) contributions"""
+    table, offsets, base = contribution_table(forest)
+    leaves = forest.apply(X)
+    return base, table[leaves + offsets].mean(axis=1)
+
+
+def linear_attributions(model, X, feature_means):
+    """(base, contributions) of a linear model relative to its prediction at ``feature_means``"""
+    base = float(model.intercept_ + np.dot(model.coef_, feature_means))
+    return base, (np.asarray(X, dtype=float) - feature_means) * model.coef_
+
+
+def attribution_dicts(indicators, bases, contributions):
+    """
+    Per-prediction {indicator: {'base_value', 'contributions': {feature: value}}}
+    from (indicator,) base values and (N, indicator, feature) contributions
+    """
+    bases = np.round(bases, ATTRIBUTION_DECIMALS).tolist()
+    rounded = np.round(contributions, ATTRIBUTION_DECIMALS).tolist()
+    return [
+        {indicator: {'base_value': bases[j], 'contributions': dict(zip(FEATURES, row[j]))}
+         for j, indicator in enumerate(indicators)}
+        for row in rounded
+    ]
@@ -0,0 +1,363 @@
+"""
+Backtesting: PolicyImpactPredictor's predictions for every HistoricalPolicy
+compared with the outcomes actually recorded.
+
+Historical records are encoded into one feature matrix and each model
+configuration predicts all of them in a single batch per indicator. Inputs a
+record doesn't carry are filled in: numeric_change and time_period take
+defaults, and a sector or region outside the reference data (e.g. a policy
+from another country) is predicted for every reference sector or region and
+averaged. Configurations run in parallel processes.
+
+Besides the raw predictions, K-fold cross-validation measures a per-indicator
+linear calibration (actual ~ a + b * predicted) fitted on the other folds, which
+shows how much of the error is systematic scale or offset. Error metrics are
+reported per indicator overall, per sector and per country.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from data.reference import REGION_IDS, REGIONS, SECTOR_IDS, SECTORS
+from validation import canonical_region, canonical_sector
+
+logger = logging.getLogger(__name__)
+
+INDICATORS = ('gdp_impact', 'inflation_impact', 'unemployment_impact', 'environmental_impact')
+ACTUAL_FIELDS = tuple(f'actual_{indicator}' for indicator in INDICATORS)
+
+DEFAULT_FOLDS = 5
+
+# Inputs assumed for historical records that don't record them
+DEFAULT_NUMERIC_CHANGE = 10.0
+DEFAULT_TIME_PERIOD = 24
+
+# Model configurations compared by a backtest: PolicyImpactPredictor keyword arguments.
+# 'current' is the production model (the saved artifact) rather than a fresh training run.
+MODEL_CONFIGS = {
+    'current': None,
+    'trees_50': {'n_estimators': 50, 'training_seed': 42},
+    'trees_200': {'n_estimators': 200, 'training_seed': 42},
+    'samples_5000': {'training_samples': 5000, 'training_seed': 42},
+}
+
+METRICS = ('n', 'mae', 'rmse', 'bias', 'r2', 'direction_accuracy')
+
+
+def load_historical_cases():
+    """Every HistoricalPolicy as backtest cases (see build_cases)"""
+    from app import db
+    from models import HistoricalPolicy
+    from sqlalchemy import select
+
+    columns = ['sector', 'region', 'country', 'numeric_change', 'time_period', *ACTUAL_FIELDS]
+    rows = db.session.execute(
+        select(*(getattr(HistoricalPolicy, column) for column in columns)).order_by(HistoricalPolicy.id)
+    ).all()
+    return build_cases([dict(zip(columns, row)) for row in rows])
+
+
+def build_cases(records):
+    """
+    Encode historical record dicts as arrays: sector and region ids (-1 when
+    not in the reference data), numeric_change and time_period (defaults
+    filled in), country and the (N, 4) actual outcomes (NaN when unknown)
+    """
+    def floats(field, default=np.nan):
+        return np.array([default if record.get(field) is None else record[field] for record in records],
+                        dtype=float)
+
+    sectors = [canonical_sector(record.get('sector')) for record in records]
+    regions = [canonical_region(record.get('region')) for record in records]
+    return {
+        'sector_ids': np.array([SECTOR_IDS.get(sector, -1) for sector in sectors], dtype=np.intp),
+        'region_ids': np.array([REGION_IDS.get(region, -1) for region in regions], dtype=np.intp),
+        'numeric_change': floats('numeric_change', DEFAULT_NUMERIC_CHANGE),
+        'time_period': floats('time_period', DEFAULT_TIME_PERIOD),
+        'countries': np.array([record.get('country') or 'Unknown' for record in records], dtype=object),
+        'actual': np.column_stack([floats(field) for field in ACTUAL_FIELDS]) if records
+        else np.empty((0, len(INDICATORS))),
+        'imputed': {
+            'sector': sum(sector is None for sector in sectors),
+            'region': sum(region is None for region in regions),
+            'numeric_change': sum(record.get('numeric_change') is None for record in records),
+            'time_period': sum(record.get('time_period') is None for record in records),
+        },
+    }
+
+
+def _expand(ids, choices):
+    """Source row and id of every expanded row: rows with an unknown id (-1) repeat once per choice"""
+    counts = np.where(ids >= 0, 1, choices)
+    rows = np.repeat(np.arange(len(ids)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, np.where(ids[rows] >= 0, ids[rows], offsets)
+
+
+def feature_matrix(cases):
+    """
+    Feature rows in PolicyImpactPredictor.encode_features order, and the case
+    each row belongs to (cases with an unknown sector or region have several)
+    """
+    rows, sector_ids = _expand(cases['sector_ids'], len(SECTORS))
+    picks, region_ids = _expand(cases['region_ids'][rows], len(REGIONS))
+    owner = rows[picks]
+    X = np.column_stack([cases['numeric_change'][owner], cases['time_period'][owner],
+                         sector_ids[picks], region_ids])
+    return X.astype(float), owner
+
+
+def predict_cases(predictor, cases):
+    """(N, 4) predictions per case, averaged over the rows of expanded cases"""
+    X, owner = feature_matrix(cases)
+    count = len(cases['sector_ids'])
+    totals = np.zeros((count, len(INDICATORS)))
+    if len(X):
+        np.add.at(totals, owner, predictor.predict_features(X))
+    return totals / np.maximum(np.bincount(owner, minlength=count), 1)[:, None]
+
+
+def _group_metrics(predicted, actual, groups, count):
+    """
+    METRICS per group and indicator, as arrays of shape (groups, indicators);
+    rows with no actual value are left out
+    """
+    valid = np.isfinite(actual) & np.isfinite(predicted)
+    error = np.where(valid, predicted - actual, 0.0)
+    observed = np.where(valid, actual, 0.0)
+    same_sign = valid & (np.sign(predicted) == np.sign(actual))
+
+    def sums(values):
+        return np.column_stack([np.bincount(groups, weights=values[:, j], minlength=count)
+                                for j in range(values.shape[1])])
+
+    n = sums(valid.astype(float))
+    sse = sums(error ** 2)
+    sst = sums(observed ** 2) - sums(observed) ** 2 / np.maximum(n, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'n': n,
+            'mae': sums(np.abs(error)) / n,
+            'rmse': np.sqrt(sse / n),
+            'bias': sums(error) / n,
+            'r2': np.where((n > 1) & (sst > 1e-12), 1 - sse / sst, np.nan),
+            'direction_accuracy': sums(same_sign.astype(float)) / n,
+        }
+
+
+def _metric_dicts(values, index):
+    def clean(value, metric):
+        if metric == 'n':
+            return int(value)
+        return round(float(value), 4) if np.isfinite(value) else None
+
+    return {indicator: {metric: clean(values[metric][index, j], metric) for metric in METRICS}
+            for j, indicator in enumerate(INDICATORS)}
+
+
+def error_metrics(predicted, actual, countries, sector_ids):
+    """Error metrics per indicator: overall, per sector and per country"""
+    country_names, country_groups = np.unique(countries.astype(str), return_inverse=True)
+    overall = _group_metrics(predicted, actual, np.zeros(len(actual), dtype=np.intp), 1)
+    # Sector groups are shifted by one so records outside the reference sectors land in group 0
+    by_sector = _group_metrics(predicted, actual, sector_ids + 1, len(SECTORS) + 1)
+    by_country = _group_metrics(predicted, actual, country_groups, len(country_names))
+    return {
+        'overall': _metric_dicts(overall, 0),
+        'by_sector': {name: _metric_dicts(by_sector, i) for i, name in enumerate(('Other', *SECTORS))
+                      if by_sector['n'][i].any()},
+        'by_country': {str(name): _metric_dicts(by_country, i) for i, name in enumerate(country_names)},
+    }
+
+
+def _affine_fits(predicted, actual, groups, count, held_out=True):
+    """
+    Least-squares (intercept, slope) of actual on predicted per group and
+    indicator, fitted on the data outside each group (``held_out``) or inside
+    it; identity where that data can't determine a line
+    """
+    valid = np.isfinite(actual) & np.isfinite(predicted)
+    x = np.where(valid, predicted, 0.0)
+    y = np.where(valid, actual, 0.0)
+
+    def sums(values):
+        per_group = np.column_stack([np.bincount(groups, weights=values[:, j], minlength=count)
+                                     for j in range(values.shape[1])])
+        return per_group.sum(axis=0) - per_group if held_out else per_group
+
+    n, sx, sy, sxx, sxy = (sums(values) for values in (valid.astype(float), x, y, x * x, x * y))
+    denominator = n * sxx - sx * sx
+    fitted = (n > 1) & (np.abs(denominator) > 1e-12)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(fitted, (n * sxy - sx * sy) / denominator, 1.0)
+        intercept = np.where(fitted, (sy - slope * sx) / n, 0.0)
+    return intercept, slope
+
+
+def cross_validate(predicted, actual, folds=DEFAULT_FOLDS, seed=42):
+    """
+    Out-of-fold calibrated predictions: each case is calibrated with the
+    line fitted on the other folds. Returns (calibrated, fold of each case).
+    """
+    count = len(actual)
+    folds = max(1, min(folds, count))
+    fold = np.random.default_rng(seed).permutation(count) % folds if count else np.zeros(0, dtype=np.intp)
+    intercept, slope = _affine_fits(predicted, actual, fold, folds)
+    return intercept[fold] + slope[fold] * predicted, fold
+
+
+def _calibration(predicted, actual):
+    """Calibration line per indicator fitted on all cases"""
+    intercept, slope = _affine_fits(predicted, actual, np.zeros(len(actual), dtype=np.intp), 1, held_out=False)
+    return {indicator: {'intercept': round(float(intercept[0, j]), 4), 'slope': round(float(slope[0, j]), 4)}
+            for j, indicator in enumerate(INDICATORS)}
+
+
+def _build_predictor(name, artifact_path=None):
+    from ml_models import PolicyImpactPredictor
+
+    options = MODEL_CONFIGS[name]
+    if options is None:
+        return PolicyImpactPredictor.load_or_train(artifact_path)
+    return PolicyImpactPredictor(**options)
+
+
+def evaluate(name, cases, folds=DEFAULT_FOLDS, seed=42, artifact_path=None, predictor=None):
+    """
+    Backtest one model configuration (``predictor`` when given, else built from
+    MODEL_CONFIGS[name]); runs in a worker process when several are compared
+    """
+    start = time.perf_counter()
+    if predictor is None:
+        predictor = _build_predictor(name, artifact_path)
+    prepared = time.perf_counter()
+
+    predicted = predict_cases(predictor, cases)
+    predicted_at = time.perf_counter()
+
+    actual = cases['actual']
+    calibrated, _ = cross_validate(predicted, actual, folds, seed)
+    return {
+        'config': MODEL_CONFIGS.get(name),
+        'timings': {
+            'model_seconds': round(prepared - start, 3),
+            'predict_seconds': round(predicted_at - prepared, 4),
+            'total_seconds': round(time.perf_counter() - start, 3),
+        },
+        'raw': error_metrics(predicted, actual, cases['countries'], cases['sector_ids']),
+        'calibrated': error_metrics(calibrated, actual, cases['countries'], cases['sector_ids']),
+        'calibration': _calibration(predicted, actual),
+    }
+
+
+def run_backtest(cases, configs=('current',), folds=DEFAULT_FOLDS, workers=None, seed=42,
+                 artifact_path=None, predictor=None):
+    """
+    Backtest each of ``configs`` (MODEL_CONFIGS names) against ``cases``.
+    Several configurations are evaluated in parallel in up to ``workers``
+    spawned processes (None means one per CPU); ``predictor`` stands in for
+    'current' without loading the artifact.
+    """
+    unknown = [name for name in configs if name not in MODEL_CONFIGS]
+    if unknown:
+        raise ValueError(f"Unknown model configuration: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = {}
+    inline = [name for name in configs if name == 'current' and predictor is not None]
+    pooled = [name for name in configs if name not in inline]
+
+    if len(pooled) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(pooled)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {name: pool.submit(evaluate, name, cases, folds, seed, artifact_path) for name in pooled}
+            for name in inline:
+                results[name] = evaluate(name, cases, folds, seed, predictor=predictor)
+            results.update((name, future.result()) for name, future in futures.items())
+    else:
+        for name in configs:
+            results[name] = evaluate(name, cases, folds, seed, artifact_path,
+                                     predictor=predictor if name in inline else None)
+
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'records': int(len(cases['actual'])),
+        'folds': folds,
+        'seed': seed,
+        'defaults': {'numeric_change': DEFAULT_NUMERIC_CHANGE, 'time_period': DEFAULT_TIME_PERIOD},
+        'imputed': cases['imputed'],
+        'seconds': round(time.perf_counter() - start, 3),
+        'configs': {name: results[name] for name in configs},
+    }
+
+
+def _format(value, spec='.3f'):
+    return '-' if value is None else format(value, spec)
+
+
+def _metric_table(lines, title, groups, indicator_metric):
+    lines += [f"#### {title}", '',
+              '| | ' + ' | '.join(indicator.replace('_impact', '') for indicator in INDICATORS) + ' |',
+              '|---' * (len(INDICATORS) + 1) + '|']
+    for group, metrics in groups.items():
+        lines.append(f"| {group} | " + ' | '.join(_format(metrics[indicator][indicator_metric])
+                                                 for indicator in INDICATORS) + ' |')
+    lines.append('')
+
+
+def render_report(result):
+    """Markdown summary of a run_backtest result"""
+    lines = [
+        '# Model backtest', '',
+        f"Generated {result['generated_at']} over {result['records']} historical policies "
+        f"({result['folds']}-fold calibration, {result['seconds']}s).", '',
+        f"Imputed inputs: {', '.join(f'{field} {count}' for field, count in result['imputed'].items())} "
+        f"(numeric_change defaults to {result['defaults']['numeric_change']:g}%, time_period to "
+        f"{result['defaults']['time_period']} months; unknown sectors and regions are averaged over all).", '',
+    ]
+    for name, evaluation in result['configs'].items():
+        lines += [f"## {name}", '', f"Options: `{json.dumps(evaluation['config'])}`, "
+                  f"{evaluation['timings']['total_seconds']}s", '',
+                  '| indicator | n | MAE | RMSE | bias | R² | direction | calibrated MAE | calibrated R² |',
+                  '|---|---|---|---|---|---|---|---|---|']
+        for indicator in INDICATORS:
+            raw = evaluation['raw']['overall'][indicator]
+            calibrated = evaluation['calibrated']['overall'][indicator]
+            lines.append(
+                f"| {indicator} | {raw['n']} | {_format(raw['mae'])} | {_format(raw['rmse'])} | "
+                f"{_format(raw['bias'])} | {_format(raw['r2'])} | {_format(raw['direction_accuracy'], '.0%')} | "
+                f"{_format(calibrated['mae'])} | {_format(calibrated['r2'])} |")
+        lines.append('')
+        _metric_table(lines, 'MAE by sector', evaluation['raw']['by_sector'], 'mae')
+        _metric_table(lines, 'MAE by country', evaluation['raw']['by_country'], 'mae')
+    return '\n'.join(lines)
+
+
+def write_backtest_report(result, output_dir):
+    """
+    Write ``backtest_<timestamp>.json`` and ``.md`` to ``output_dir`` and point
+    ``latest.json`` at the new results; returns the JSON path
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    json_path = os.path.join(output_dir, f'backtest_{stamp}.json')
+    payload = json.dumps(result, indent=2)
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    with open(os.path.join(output_dir, f'backtest_{stamp}.md'), 'w', encoding='utf-8') as f:
+        f.write(render_report(result))
+
+    latest = os.path.join(output_dir, 'latest.json')
+    with open(latest + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(payload)
+    os.replace(latest + '.tmp', latest)
+
+    logger.info("Wrote backtest of %d policies to %s", result['records'], json_path)
+    return json_path
@@ -0,0 +1,148 @@
+"""
+Concurrent-write benchmark for the SQLite performance profile.
+
+Spawns several writer processes that each commit simulation-shaped transactions
+(one policy, one prediction, eight sector rows) against a fresh database, first
+with SQLite's defaults and then with the tuned pragmas from db_config.
+
+    python benchmarks/bench_sqlite_writes.py --writers 8 --transactions 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import (Column, Float, ForeignKey, Integer, MetaData, String, Table, create_engine,
+                        insert)
+from sqlalchemy.exc import OperationalError
+
+from data.reference import SECTORS
+from db_config import DEFAULT_SQLITE_PRAGMAS, register_sqlite_pragmas
+
+metadata = MetaData()
+policy = Table(
+    'policy', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200)),
+    Column('sector', String(100)),
+    Column('numeric_change', Float),
+)
+prediction = Table(
+    'policy_prediction', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('policy_id', Integer, ForeignKey('policy.id')),
+    Column('gdp_impact', Float),
+)
+sector_impact = Table(
+    'sector_impact', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('prediction_id', Integer, ForeignKey('policy_prediction.id')),
+    Column('sector', String(100)),
+    Column('gdp_impact', Float),
+)
+
+
+def _make_engine(path, pragmas):
+    # Match the driver-level timeout used by the app in both runs
+    engine = create_engine(f"sqlite:///{path}", connect_args={'timeout': 5})
+    register_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def _writer(path, pragmas, transactions, worker_id, results):
+    engine = _make_engine(path, pragmas)
+    latencies = []
+    errors = 0
+
+    for i in range(transactions):
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                policy_id = conn.execute(insert(policy).values(
+                    name=f"worker-{worker_id}-{i}", sector='Energy', numeric_change=float(i)
+                )).inserted_primary_key[0]
+                prediction_id = conn.execute(insert(prediction).values(
+                    policy_id=policy_id, gdp_impact=0.5
+                )).inserted_primary_key[0]
+                conn.execute(insert(sector_impact), [
+                    {'prediction_id': prediction_id, 'sector': sector, 'gdp_impact': 0.1}
+                    for sector in SECTORS
+                ])
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    engine.dispose()
+    results.put((latencies, errors))
+
+
+def run_profile(label, pragmas, writers, transactions):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = _make_engine(path, pragmas)
+        metadata.create_all(engine)
+        engine.dispose()
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_writer, args=(path, pragmas, transactions, n, results))
+            for n in range(writers)
+        ]
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for worker_latencies, _ in collected for lat in worker_latencies)
+    errors = sum(worker_errors for _, worker_errors in collected)
+    committed = len(latencies)
+
+    return {
+        'profile': label,
+        'writers': writers,
+        'committed': committed,
+        'locked_errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'tx_per_s': round(committed / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--transactions', type=int, default=200, help='Transactions per writer')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = [
+        run_profile('default', {}, args.writers, args.transactions),
+        run_profile('tuned', DEFAULT_SQLITE_PRAGMAS, args.writers, args.transactions),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'profile':<10}{'committed':>10}{'locked':>8}{'elapsed s':>11}{'tx/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for r in results:
+        print(f"{r['profile']:<10}{r['committed']:>10}{r['locked_errors']:>8}{r['elapsed_s']:>11}"
+              f"{r['tx_per_s']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['max_ms']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Cold-start benchmark: time from a fresh interpreter to the first response.
+
+Each run starts a new Python process against a throwaway database and measures
+importing the app, create_app() and the first GET / through the test client.
+A prebuilt model artifact is written first, as `flask train-model` would, so
+the ML stack is not trained during the runs.
+
+    python benchmarks/bench_startup.py --runs 5 --target 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Runs in the child process; prints one JSON line of timings
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app()
+created = time.perf_counter()
+response = application.test_client().get('/')
+responded = time.perf_counter()
+heavy = [name for name in ('sklearn', 'pandas', 'reportlab') if name in sys.modules]
+print(json.dumps({'import_s': imported - start, 'create_app_s': created - imported,
+                  'first_response_s': responded - created, 'total_s': responded - start,
+                  'status': response.status_code, 'heavy_modules': heavy}))
+"""
+
+
+def build_artifact(path):
+    from ml_models import PolicyImpactPredictor
+    PolicyImpactPredictor().save(path)
+
+
+def run_once(env):
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target', type=float, default=1.0, help='Seconds to first response')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(tmp, 'policy_model.joblib')
+        build_artifact(artifact)
+
+        env = dict(os.environ,
+                   DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   MODEL_ARTIFACT_PATH=artifact,
+                   REPORT_CACHE_DIR=os.path.join(tmp, 'reports'),
+                   JOB_RESULTS_DIR=os.path.join(tmp, 'jobs'),
+                   RESPONSE_CACHE_GENERATION_FILE=os.path.join(tmp, 'cache_generation'),
+                   ML_WARMUP='off')
+        env.pop('PYTHONSTARTUP', None)
+
+        # The first run creates the schema; later runs take the fast path through the marker
+        first = run_once(env)
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    totals = [r['total_s'] for r in runs]
+    summary = {
+        'first_run_s': round(first['total_s'], 3),
+        'runs': len(runs),
+        'import_s': round(statistics.median(r['import_s'] for r in runs), 3),
+        'create_app_s': round(statistics.median(r['create_app_s'] for r in runs), 3),
+        'first_response_s': round(statistics.median(r['first_response_s'] for r in runs), 3),
+        'p50_total_s': round(statistics.median(totals), 3),
+        'max_total_s': round(max(totals), 3),
+        'heavy_modules': sorted({name for r in runs for name in r['heavy_modules']}),
+        'target_s': args.target,
+        'within_target': statistics.median(totals) <= args.target,
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    for name, value in summary.items():
+        print(f"{name:<18}{value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Offline benchmark suite for the prediction, rendering and serialization paths.
+
+Runs against a throwaway SQLite database filled by the seeder, writes the results as
+JSON and, given a saved baseline, flags benchmarks whose median got slower by
+more than the threshold (exit status 1).
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 0.2
+    python benchmarks/bench_suite.py --only 'predict_*' --quick
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data.reference import REGIONS, SECTORS
+
+DASHBOARD_SIZES = (1_000, 10_000, 100_000)
+COMPARE_SIZES = (2, 20, 100)
+PREDICT_BATCH_SIZES = (100, 1000)
+
+# Benchmarks run against the smallest seeded database
+DATA_BENCHMARKS = [f'compare_{count}' for count in COMPARE_SIZES] + [
+    'pdf_report', 'json_api_policies', 'json_dumps_predictions']
+
+BENCHMARKS = (['predictor_train', 'predict_single'] + [f'predict_batch_{size}' for size in PREDICT_BATCH_SIZES]
+              + [f'dashboard_{size // 1000}k' for size in DASHBOARD_SIZES] + DATA_BENCHMARKS)
+
+
+def configure_environment(tmp):
+    """Point the app at a scratch database and turn off caches and background work"""
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'MODEL_ARTIFACT_PATH': os.path.join(tmp, 'policy_model.joblib'),
+        'REPORT_CACHE_DIR': os.path.join(tmp, 'reports'),
+        'JOB_RESULTS_DIR': os.path.join(tmp, 'jobs'),
+        'RESPONSE_CACHE_GENERATION_FILE': os.path.join(tmp, 'cache_generation'),
+        'PROFILE_DIR': os.path.join(tmp, 'profiles'),
+        'RESPONSE_CACHE': 'off',
+        'PREDICTION_COALESCING': 'off',
+        'JOB_WORKERS': '0',
+        'ML_WARMUP': 'off',
+    })
+    os.environ.pop('METRICS_DIR', None)
+
+
+def random_policy(rng):
+    return {
+        'name': f"Benchmark policy {rng.randrange(10**6)}",
+        'sector': rng.choice(SECTORS),
+        'region': rng.choice(REGIONS),
+        'numeric_change': round(rng.uniform(-50, 50), 1),
+        'time_period': rng.randint(1, 60),
+        'description': 'Synthetic policy for benchmarking',
+    }
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def get_ok(client, url):
+    def request():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        response.get_data()
+    return request
+
+
+def run_suite(args):
+    """Yield (name, result) for every selected benchmark"""
+    from app import create_app, db
+    from ml_models import PolicyImpactPredictor
+    from models import Policy, PolicyPrediction
+    from pdf_generator import generate_policy_report
+    from seeder import seed_policies
+    from serialization import dumps_bytes
+
+    chosen = {name for name in BENCHMARKS
+              if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)}
+    if args.quick:
+        chosen.discard('dashboard_100k')
+
+    rng = random.Random(42)
+    app = create_app()
+    client = app.test_client()
+
+    if 'predictor_train' in chosen:
+        yield 'predictor_train', measure(PolicyImpactPredictor, repeat=max(1, args.repeat // 2), warmup=0)
+
+    predictor = PolicyImpactPredictor()
+    if 'predict_single' in chosen:
+        policy = random_policy(rng)
+        yield 'predict_single', measure(lambda: predictor.predict_impact(
+            policy['sector'], policy['numeric_change'], policy['time_period'], policy['region']), args.repeat)
+    for size in PREDICT_BATCH_SIZES:
+        if f'predict_batch_{size}' in chosen:
+            batch = [random_policy(rng) for _ in range(size)]
+            yield f'predict_batch_{size}', measure(lambda: predictor.predict_batch(batch), args.repeat)
+
+    # Dashboards grow the database in place, smallest first
+    sizes = [size for size in DASHBOARD_SIZES if f'dashboard_{size // 1000}k' in chosen]
+    if chosen & set(DATA_BENCHMARKS) and DASHBOARD_SIZES[0] not in sizes:
+        sizes.insert(0, DASHBOARD_SIZES[0])
+
+    with app.app_context():
+        seeded = 0
+        for size in sizes:
+            seed_policies(size - seeded, seed=size)
+            seeded = size
+            name = f'dashboard_{size // 1000}k'
+            if name in chosen:
+                # The largest dashboard is slow enough that a single cold run is representative
+                large = size > 10_000
+                yield name, measure(get_ok(client, '/dashboard'), repeat=1 if large else args.repeat,
+                                    warmup=0 if large else 1)
+            if size != DASHBOARD_SIZES[0]:
+                continue
+
+            for count in COMPARE_SIZES:
+                if f'compare_{count}' in chosen:
+                    ids = rng.sample(range(1, size + 1), count)
+                    url = '/compare?' + '&'.join(f'policies={policy_id}' for policy_id in ids)
+                    yield f'compare_{count}', measure(get_ok(client, url), args.repeat)
+
+            if 'pdf_report' in chosen:
+                policy = db.session.get(Policy, 1)
+                prediction = PolicyPrediction.query.filter_by(policy_id=1).first()
+                yield 'pdf_report', measure(lambda: generate_policy_report(policy, prediction), args.repeat)
+
+            if 'json_api_policies' in chosen:
+                yield 'json_api_policies', measure(get_ok(client, '/api/policies'), args.repeat)
+            if 'json_dumps_predictions' in chosen:
+                predictions = [prediction.to_dict() for prediction in PolicyPrediction.query.limit(1000)]
+                yield 'json_dumps_predictions', measure(lambda: dumps_bytes(predictions), args.repeat)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f"{'benchmark':<26}{'baseline ms':>13}{'current ms':>12}{'change':>9}")
+    for name, result in results['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            print(f"{name:<26}{'-':>13}{result['median_s'] * 1000:>12.2f}{'new':>9}")
+            continue
+        change = result['median_s'] / base['median_s'] - 1 if base['median_s'] else 0.0
+        flag = '  REGRESSION' if change > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<26}{base['median_s'] * 1000:>13.2f}{result['median_s'] * 1000:>12.2f}"
+              f"{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    parser.add_argument('--only', action='append', help='Run benchmarks matching this glob (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='Skip the 100k-policy dashboard')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a saved results file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown of the median counted as a regression')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'benchmarks': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(tmp)
+        for name, result in run_suite(args):
+            results['benchmarks'][name] = result
+            if not args.json:
+                print(f"{name:<26}median {result['median_s'] * 1000:>10.2f} ms   "
+                      f"min {result['min_s'] * 1000:>10.2f} ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
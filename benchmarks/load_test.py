@@ -0,0 +1,180 @@
+"""
+Local load generator: replays a weighted mix of simulate, dashboard, results,
+compare and PDF export requests against a running server and reports
+throughput and latency percentiles per endpoint.
+
+Seed the database first (``flask seed-policies``) and pass the id range it
+printed, then run against the dev server or gunicorn:
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --max-policy-id 100000 \\
+        --concurrency 16 --duration 60 --mix simulate=1,dashboard=1,results=5,compare=2,export_pdf=1
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+SECTORS = ['Energy', 'Healthcare', 'Education', 'Transportation',
+           'Agriculture', 'Finance', 'Technology', 'Manufacturing']
+REGIONS = ['Northern India', 'Western India', 'Southern India', 'Eastern India',
+           'North-Eastern India', 'Central India']
+
+DEFAULT_MIX = 'simulate=1,dashboard=1,results=5,compare=2,export_pdf=1'
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Time the handler itself; /simulate answers with a redirect to the results page"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def build_request(kind, base_url, rng, args):
+    """Return (url, form data or None) for one request of ``kind``"""
+    policy_id = lambda: rng.randint(args.min_policy_id, args.max_policy_id)
+
+    if kind == 'simulate':
+        form = {
+            'policy_name': f'Load test policy {rng.randrange(10**6)}',
+            'sector': rng.choice(SECTORS),
+            'region': rng.choice(REGIONS),
+            'numeric_change': round(rng.uniform(-50, 50), 1),
+            'time_period': rng.randint(1, 60),
+            'description': 'Generated by the load test',
+        }
+        return f'{base_url}/simulate', urllib.parse.urlencode(form).encode('utf-8')
+    if kind == 'dashboard':
+        return f'{base_url}/dashboard', None
+    if kind == 'results':
+        return f'{base_url}/results/{policy_id()}', None
+    if kind == 'compare':
+        ids = [policy_id() for _ in range(rng.randint(2, args.compare_max))]
+        return f'{base_url}/compare?' + urllib.parse.urlencode([('policies', i) for i in ids]), None
+    if kind == 'export_pdf':
+        return f'{base_url}/export_pdf/{policy_id()}', None
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        mix[kind.strip()] = float(weight or 1)
+    unknown = set(mix) - {'simulate', 'dashboard', 'results', 'compare', 'export_pdf'}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown request kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def worker(worker_id, args, mix, deadline, results, lock):
+    rng = random.Random(args.seed * 1000 + worker_id if args.seed is not None else None)
+    opener = urllib.request.build_opener(_NoRedirect)
+    kinds, weights = list(mix), list(mix.values())
+    samples = []
+
+    while time.monotonic() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        url, data = build_request(kind, args.url.rstrip('/'), rng, args)
+        start = time.perf_counter()
+        try:
+            with opener.open(url, data=data, timeout=args.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            # Redirects surface here because they are not followed
+            status = e.code
+            e.read()
+        except (urllib.error.URLError, OSError):
+            status = 0
+        samples.append((kind, status, time.perf_counter() - start))
+
+    with lock:
+        results.extend(samples)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    groups = {}
+    for kind, status, latency in samples:
+        groups.setdefault(kind, []).append((status, latency))
+    groups['all'] = [(status, latency) for _, status, latency in samples]
+
+    summary = {}
+    for kind, entries in groups.items():
+        latencies = sorted(latency for status, latency in entries if 200 <= status < 400)
+        errors = sum(1 for status, _ in entries if not 200 <= status < 400)
+        ms = lambda value: round(value * 1000, 2) if value is not None else None
+        summary[kind] = {
+            'requests': len(entries),
+            'errors': errors,
+            'rps': round(len(entries) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': ms(percentile(latencies, 0.50)),
+            'p90_ms': ms(percentile(latencies, 0.90)),
+            'p95_ms': ms(percentile(latencies, 0.95)),
+            'p99_ms': ms(percentile(latencies, 0.99)),
+            'max_ms': ms(latencies[-1] if latencies else None),
+            'mean_ms': ms(statistics.fmean(latencies) if latencies else None),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Weighted request mix (default {DEFAULT_MIX})')
+    parser.add_argument('--min-policy-id', type=int, default=1)
+    parser.add_argument('--max-policy-id', type=int, default=1000,
+                        help='Highest existing policy id (printed by flask seed-policies)')
+    parser.add_argument('--compare-max', type=int, default=5, help='Most policies per /compare request')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, help='Random seed for a reproducible request sequence')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    try:
+        urllib.request.urlopen(args.url, timeout=args.timeout).read()
+    except (urllib.error.URLError, OSError) as e:
+        sys.exit(f"Server at {args.url} is not reachable: {e}")
+
+    results, lock = [], threading.Lock()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(n, args, args.mix, deadline, results, lock))
+               for n in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    summary = summarize(results, elapsed)
+    if args.json:
+        print(json.dumps({'concurrency': args.concurrency, 'elapsed_s': round(elapsed, 2),
+                          'endpoints': summary}, indent=2))
+        return
+
+    print(f"{args.concurrency} clients, {elapsed:.1f} s", file=sys.stderr)
+    print(f"{'endpoint':<12}{'requests':>9}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}"
+          f"{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for kind, r in sorted(summary.items(), key=lambda item: item[0] == 'all'):
+        print(f"{kind:<12}{r['requests']:>9}{r['errors']:>8}{r['rps']:>8}{str(r['p50_ms']):>9}"
+              f"{str(r['p90_ms']):>9}{str(r['p95_ms']):>9}{str(r['p99_ms']):>9}{str(r['max_ms']):>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Bulk PDF report export: reports are rendered in a process pool and streamed
+into a ZIP archive as each one finishes
+"""
+import csv
+import io
+import logging
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as dt_time
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from werkzeug.utils import secure_filename
+
+from app import db
+from models import Policy, PolicyPrediction
+from report_cache import report_key, snapshot_report, render_report_file
+
+# Upper bound on the number of reports in one archive
+MAX_BULK_REPORTS = 500
+
+# Bytes copied from a rendered PDF into the archive per chunk
+ZIP_COPY_CHUNK_SIZE = 64 * 1024
+
+MANIFEST_FIELDS = ['policy_id', 'policy_name', 'sector', 'region', 'file', 'status', 'error']
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_report_pool(max_workers=None):
+    """
+    Return the process-wide rendering pool, created on first use with
+    ``max_workers`` processes (None means one per CPU).
+
+    Workers are spawned rather than forked so they never inherit database
+    connections or locks held by the web process.
+    """
+    global _pool
+    with _pool_lock:
+        # A worker dying (e.g. OOM-killed) breaks the whole executor; start a fresh one
+        if _pool is None or getattr(_pool, '_broken', False):
+            _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def parse_report_filters(sector=None, region=None, date_from=None, date_to=None, ids=()):
+    """
+    Turn raw request or CLI values into keyword arguments for select_report_targets.
+    ``ids`` may mix single ids and comma-separated lists. Raises ValueError on
+    malformed dates or ids.
+    """
+    policy_ids = []
+    for raw in ids or ():
+        for part in str(raw).split(','):
+            if part.strip():
+                try:
+                    policy_ids.append(int(part))
+                except ValueError:
+                    raise ValueError(f"Invalid policy id: {part}")
+
+    def parse_date(name, value, end_of_day=False):
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}: {value}")
+        if end_of_day and len(value) == 10:
+            # A bare end date includes the whole day
+            parsed = datetime.combine(parsed.date(), dt_time.max)
+        return parsed
+
+    return {
+        'sector': sector or None,
+        'region': region or None,
+        'date_from': parse_date('date_from', date_from),
+        'date_to': parse_date('date_to', date_to, end_of_day=True),
+        'ids': policy_ids or None,
+    }
+
+
+def select_report_targets(sector=None, region=None, date_from=None, date_to=None, ids=None,
+                          limit=MAX_BULK_REPORTS):
+    """
+    Return [(policy, prediction)] for policies matching the filters, using each
+    policy's first prediction. Policies without a prediction are skipped.
+    """
+    query = (
+        select(Policy, PolicyPrediction)
+        .join(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+        .order_by(Policy.id, PolicyPrediction.id)
+        .options(selectinload(PolicyPrediction.sector_impacts), selectinload(PolicyPrediction.attributions))
+    )
+    if sector:
+        query = query.where(Policy.sector == sector)
+    if region:
+        query = query.where(Policy.region == region)
+    if date_from:
+        query = query.where(Policy.created_at >= date_from)
+    if date_to:
+        query = query.where(Policy.created_at <= date_to)
+    if ids:
+        query = query.where(Policy.id.in_(ids))
+
+    targets = {}
+    for policy, prediction in db.session.execute(query):
+        if policy.id not in targets:
+            if len(targets) == limit:
+                raise ValueError(f"More than {limit} reports match; narrow the filters")
+            targets[policy.id] = (policy, prediction)
+    return list(targets.values())
+
+
+def report_filename(policy):
+    name = secure_filename(policy.name or '') or 'policy'
+    return f"policy_{policy.id}_{name}.pdf"
+
+
+class _ZipStream:
+    """Write-only, unseekable sink; zipfile then emits data descriptors after each entry"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_report_zip(targets, cache, pool, progress=None):
+    """
+    Yield the bytes of a ZIP archive holding one PDF per (policy, prediction)
+    plus a ``manifest.csv``.
+
+    Reports already in ``cache`` are reused; the rest are rendered into the cache
+    directory by ``pool`` and added in completion order. ``progress(done, total)``
+    is called after each report.
+    """
+    total = len(targets)
+    sink = _ZipStream()
+    manifest = []
+    pending = {}
+    done = 0
+
+    def record(policy, status, error=''):
+        manifest.append({
+            'policy_id': policy.id, 'policy_name': policy.name, 'sector': policy.sector,
+            'region': policy.region, 'file': report_filename(policy) if status == 'ok' else '',
+            'status': status, 'error': error,
+        })
+
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+
+        def add_file(policy, path):
+            # PDF streams are already compressed, so entries are stored as-is
+            with open(path, 'rb') as source, archive.open(report_filename(policy), mode='w') as entry:
+                while True:
+                    chunk = source.read(ZIP_COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    yield sink.drain()
+            record(policy, 'ok')
+
+        def submit(policy, prediction, key):
+            future = pool.submit(render_report_file, cache.directory, key, policy, prediction)
+            pending[future] = policy
+
+        # Queue every missing report first so the pool works while cached ones are streamed
+        cached = []
+        for policy, prediction in targets:
+            policy_snapshot, prediction_snapshot = snapshot_report(policy, prediction)
+            key = report_key(policy_snapshot, prediction_snapshot)
+            path = cache.get(key)
+            if path:
+                cached.append((policy_snapshot, prediction_snapshot, key, path))
+            else:
+                submit(policy_snapshot, prediction_snapshot, key)
+
+        for policy, prediction, key, path in cached:
+            try:
+                yield from add_file(policy, path)
+            except FileNotFoundError:
+                # Evicted between lookup and read; render it again
+                submit(policy, prediction, key)
+                continue
+            done += 1
+            if progress:
+                progress(done, total)
+
+        for future in as_completed(pending):
+            policy = pending[future]
+            try:
+                yield from add_file(policy, future.result())
+            except Exception as e:
+                logging.error(f"Error generating PDF for policy {policy.id}: {str(e)}")
+                record(policy, 'error', str(e))
+            done += 1
+            if progress:
+                progress(done, total)
+
+        manifest_csv = io.StringIO()
+        writer = csv.DictWriter(manifest_csv, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(manifest, key=lambda row: row['policy_id']))
+        archive.writestr('manifest.csv', manifest_csv.getvalue())
+
+    yield sink.drain()
+
+    if pending:
+        cache.evict()
+
+
+def write_report_zip(output, targets, cache, pool, progress=None):
+    """Write the bulk report archive to a file path; returns the number of reports"""
+    with open(output, 'wb') as f:
+        for chunk in iter_report_zip(targets, cache, pool=pool, progress=progress):
+            f.write(chunk)
+    return len(targets)
+
@@ -0,0 +1,298 @@
+"""
+Single-flight coalescing of identical concurrent predictions.
+
+Callers whose normalized inputs match a computation already in flight wait for
+it and share its result instead of running the models again. Within a process
+this is a table of in-flight keys. With PREDICTION_COALESCE_DIR set, workers on
+the same host also coordinate: the process computing a key holds a file lock,
+and processes that found the lock taken read its result from the directory once
+it is released.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from zlib import crc32
+
+from serialization import dumps_bytes
+
+# File locks are only available on POSIX; elsewhere coalescing stays in-process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_TIMEOUT = 30.0
+
+# Lock files shared by all keys in the store directory
+LOCK_STRIPES = 64
+
+# Seconds between attempts to take a lock held by another process
+LOCK_POLL_INTERVAL = 0.01
+
+# Result files older than this are removed from the store directory
+STORE_RESULT_MAX_AGE = 60
+
+
+def prediction_key(policy):
+    """Normalized identity of a prediction input; only fields the models use count"""
+    return (
+        policy['sector'],
+        policy['region'],
+        round(float(policy['numeric_change']), 6),
+        int(policy['time_period']),
+    )
+
+
+class _Flight:
+    """One in-flight computation that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent computations that share a key"""
+
+    def __init__(self):
+        self.enabled = True
+        self.store_dir = None
+        self.timeout = DEFAULT_TIMEOUT
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._store_writes = 0
+        self.counters = {'computed': 0, 'shared': 0, 'shared_across_processes': 0, 'timeouts': 0}
+
+    def init_app(self, app):
+        self.enabled = app.config['PREDICTION_COALESCING']
+        self.timeout = app.config['PREDICTION_COALESCE_TIMEOUT']
+        self.store_dir = app.config['PREDICTION_COALESCE_DIR'] if fcntl is not None else None
+        if app.config['PREDICTION_COALESCE_DIR'] and fcntl is None:
+            logging.warning("PREDICTION_COALESCE_DIR ignored: file locks are not available on this platform")
+        if self.store_dir:
+            os.makedirs(self.store_dir, exist_ok=True)
+
+    def record(self, name, count=1):
+        with self._lock:
+            self.counters[name] += count
+
+    def run_batch(self, keys, compute):
+        """
+        Return results aligned with ``keys``. ``compute(indexes)`` must return the
+        results for those positions; it is called only for keys no other caller
+        is already computing, once per distinct key.
+
+        Positions that share a result get their own deep copy, so callers can
+        modify what they receive.
+        """
+        if not self.enabled:
+            return compute(list(range(len(keys))))
+
+        first_index = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+
+        led, followed = {}, {}
+        with self._lock:
+            for key in first_index:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    led[key] = flight
+                else:
+                    followed[key] = flight
+
+        results = {}
+        try:
+            if led:
+                self._lead(led, first_index, compute, results)
+        except Exception as e:
+            # Release waiters still pending; they see the same error
+            self._publish({key: flight for key, flight in led.items() if not flight.done.is_set()}, results, e)
+            raise
+
+        # Wait only after our own flights are released, so two batches never wait on each other
+        missing = []
+        for key, flight in followed.items():
+            if not flight.done.wait(self.timeout):
+                self.record('timeouts')
+                missing.append(key)
+                continue
+            if flight.error is not None:
+                raise flight.error
+            results[key] = flight.result
+        if followed:
+            self.record('shared', len(followed) - len(missing))
+        if missing:
+            self._compute_into(missing, first_index, compute, results)
+
+        output = []
+        seen = set()
+        for key in keys:
+            result = results[key]
+            if key in seen or key in followed:
+                result = copy.deepcopy(result)
+            seen.add(key)
+            output.append(result)
+        return output
+
+    def _lead(self, led, first_index, compute, results):
+        """Compute the keys this call leads, coordinating with other processes when a store is set"""
+        if not self.store_dir:
+            self._compute_into(list(led), first_index, compute, results)
+            self._publish(led, results)
+            return
+
+        # Take every free stripe lock without blocking and compute those keys first
+        stripes = {}
+        for key in led:
+            stripes.setdefault(self._stripe(key), []).append(key)
+
+        waiting = []
+        held = []
+        try:
+            for stripe, stripe_keys in stripes.items():
+                fd = self._open_lock(stripe)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    waiting.append((fd, stripe_keys, time.time()))
+                    continue
+                held.append((fd, stripe_keys))
+
+            own = [key for _, stripe_keys in held for key in stripe_keys]
+            if own:
+                self._compute_into(own, first_index, compute, results)
+                for key in own:
+                    self._store_write(key, results[key])
+        except Exception:
+            for fd, _, _ in waiting:
+                os.close(fd)
+            raise
+        finally:
+            for fd, _ in held:
+                os.close(fd)
+
+        self._publish({key: led[key] for key in own}, results)
+
+        # Another process holds these stripes: wait for it, then use what it stored.
+        # Each lock is released before waiting on the next, so no process waits while holding one.
+        try:
+            while waiting:
+                fd, stripe_keys, waited_since = waiting[0]
+                self._wait_for_lock(fd)
+                absent = []
+                for key in stripe_keys:
+                    result = self._store_read(key, waited_since)
+                    if result is None:
+                        absent.append(key)
+                    else:
+                        results[key] = result
+                self.record('shared_across_processes', len(stripe_keys) - len(absent))
+                if absent:
+                    # The stripe was held for different keys, or the other process failed
+                    self._compute_into(absent, first_index, compute, results)
+                    for key in absent:
+                        self._store_write(key, results[key])
+                os.close(waiting.pop(0)[0])
+                self._publish({key: led[key] for key in stripe_keys}, results)
+        finally:
+            for fd, _, _ in waiting:
+                os.close(fd)
+
+    def _compute_into(self, keys, first_index, compute, results):
+        computed = compute([first_index[key] for key in keys])
+        for key, result in zip(keys, computed):
+            results[key] = result
+        self.record('computed', len(keys))
+
+    def _publish(self, flights, results, error=None):
+        """Hand results (or ``error``) to waiting threads and retire the flights"""
+        with self._lock:
+            for key in flights:
+                self._flights.pop(key, None)
+        for key, flight in flights.items():
+            if error is not None:
+                flight.error = error
+            else:
+                flight.result = results[key]
+            flight.done.set()
+
+    # Cross-process store
+
+    def _stripe(self, key):
+        return crc32(repr(key).encode('utf-8')) % LOCK_STRIPES
+
+    def _open_lock(self, stripe):
+        return os.open(os.path.join(self.store_dir, f"stripe-{stripe:02d}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _wait_for_lock(self, fd):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    # Compute without the lock rather than fail the request
+                    self.record('timeouts')
+                    return
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def _result_path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.store_dir, f"{digest}.json")
+
+    def _store_read(self, key, written_after):
+        """The stored result for ``key`` if it was written after ``written_after``, else None"""
+        path = self._result_path(key)
+        try:
+            if os.stat(path).st_mtime < written_after:
+                return None
+            with open(path, 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logging.warning(f"Discarding unreadable coalesced result: {str(e)}")
+            return None
+
+    def _store_write(self, key, result):
+        path = self._result_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_bytes(result))
+        os.replace(tmp_path, path)
+
+        self._store_writes += 1
+        if self._store_writes % 100 == 0:
+            self._prune_store()
+
+    def _prune_store(self):
+        cutoff = time.time() - STORE_RESULT_MAX_AGE
+        for entry in os.scandir(self.store_dir):
+            if entry.name.endswith(('.json', '.tmp')):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            in_flight = len(self._flights)
+        counters.update({
+            'enabled': self.enabled,
+            'cross_process': bool(self.store_dir),
+            'in_flight': in_flight,
+        })
+        return counters
+
+
+prediction_flight = SingleFlight()
@@ -0,0 +1,132 @@
+"""
+Command line tools registered on the Flask CLI (``flask --app main <command>``)
+"""
+import click
+
+from app import app
+from backtest import DEFAULT_FOLDS, MODEL_CONFIGS, load_historical_cases, run_backtest, write_backtest_report
+from bulk_reports import parse_report_filters, select_report_targets, get_report_pool, write_report_zip
+from data_processor import LOAD_BATCH_SIZE, load_historical_dataset
+from exporter import EXPORT_FORMATS, EXPORT_CHUNK_SIZE, export_to_file
+from report_cache import get_report_cache
+from seeder import SEED_BATCH_SIZE, seed_policies
+
+
+@app.cli.command('export-policies')
+@click.argument('output')
+@click.option('--format', 'export_format', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv',
+              help='Output format.')
+@click.option('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, show_default=True,
+              help='Rows fetched from the database per round trip.')
+def export_policies_command(output, export_format, chunk_size):
+    """Export all policies joined with their predictions to OUTPUT."""
+    count = export_to_file(output, export_format, chunk_size)
+    click.echo(f"Exported {count} rows to {output}")
+
+
+@app.cli.command('load-historical')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=LOAD_BATCH_SIZE, show_default=True,
+              help='Records upserted per statement.')
+@click.option('--no-copy', is_flag=True, help='Use INSERT ... ON CONFLICT instead of COPY on PostgreSQL.')
+def load_historical_command(path, batch_size, no_copy):
+    """Load historical policy outcomes from a CSV, JSON Lines or JSON file."""
+    count = load_historical_dataset(path, batch_size=batch_size, use_copy=not no_copy)
+    click.echo(f"Loaded {count} historical policies from {path}")
+
+
+@app.cli.command('export-reports')
+@click.argument('output')
+@click.option('--sector', help='Only policies in this sector.')
+@click.option('--region', help='Only policies in this region.')
+@click.option('--date-from', help='Only policies created on or after this ISO date.')
+@click.option('--date-to', help='Only policies created on or before this ISO date.')
+@click.option('--ids', multiple=True, help='Policy ids (repeatable or comma-separated).')
+@click.option('--workers', type=int, help='Rendering processes (defaults to REPORT_WORKERS).')
+def export_reports_command(output, sector, region, date_from, date_to, ids, workers):
+    """Render PDF reports for matching policies into a ZIP archive at OUTPUT."""
+    try:
+        targets = select_report_targets(**parse_report_filters(sector, region, date_from, date_to, ids))
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    pool = get_report_pool(workers or app.config['REPORT_WORKERS'])
+    with click.progressbar(length=len(targets), label='Rendering reports') as bar:
+        write_report_zip(output, targets, get_report_cache(), pool,
+                         progress=lambda done, total: bar.update(1))
+    click.echo(f"Wrote {len(targets)} reports to {output}")
+
+
+@app.cli.command('seed-policies')
+@click.option('--count', type=int, default=100000, show_default=True, help='Policies to add.')
+@click.option('--batch-size', type=int, default=SEED_BATCH_SIZE, show_default=True,
+              help='Policies generated and committed per batch.')
+@click.option('--seed', type=int, help='Random seed for reproducible data.')
+@click.option('--days', type=int, default=365, show_default=True,
+              help='Spread creation times over this many past days.')
+def seed_policies_command(count, batch_size, seed, days):
+    """Add synthetic policies with predictions and sector impacts for scale testing."""
+    with click.progressbar(length=count, label='Seeding policies') as bar:
+        first_id, last_id = seed_policies(count, batch_size=batch_size, seed=seed, days=days,
+                                          progress=lambda done, total: bar.update(done - bar.pos))
+    click.echo(f"Seeded {count} policies (ids {first_id}-{last_id})")
+
+
+@app.cli.command('train-model')
+@click.option('--output', help='Artifact path (defaults to MODEL_ARTIFACT_PATH).')
+@click.option('--no-backtest', is_flag=True, help='Skip backtesting the new models against historical outcomes.')
+def train_model_command(output, no_backtest):
+    """Train the ML models and write the artifact loaded at startup."""
+    from ml_models import PolicyImpactPredictor
+
+    path = output or app.config['MODEL_ARTIFACT_PATH']
+    predictor = PolicyImpactPredictor()
+    predictor.save(path)
+    click.echo(f"Wrote model artifact to {path}")
+
+    if not no_backtest:
+        result = run_backtest(load_historical_cases(), predictor=predictor)
+        _report_backtest(result, app.config['BACKTEST_DIR'])
+
+
+@app.cli.command('backtest')
+@click.option('--config', 'configs', multiple=True,
+              help='Model configuration to evaluate (repeatable; defaults to all).')
+@click.option('--folds', type=int, default=DEFAULT_FOLDS, show_default=True,
+              help='Cross-validation folds for the calibrated metrics.')
+@click.option('--workers', type=int, help='Processes evaluating configurations (defaults to one per CPU).')
+@click.option('--output-dir', help='Report directory (defaults to BACKTEST_DIR).')
+def backtest_command(configs, folds, workers, output_dir):
+    """Compare model predictions with the outcomes of every historical policy."""
+    unknown = [name for name in configs if name not in MODEL_CONFIGS]
+    if unknown:
+        raise click.BadParameter(f"{', '.join(unknown)} (choose from {', '.join(MODEL_CONFIGS)})",
+                                 param_hint='--config')
+    result = run_backtest(load_historical_cases(), configs=configs or tuple(MODEL_CONFIGS), folds=folds,
+                          workers=workers, artifact_path=app.config['MODEL_ARTIFACT_PATH'])
+    _report_backtest(result, output_dir or app.config['BACKTEST_DIR'])
+
+
+def _report_backtest(result, output_dir):
+    if not result['records']:
+        click.echo("No historical policies to backtest against (run load-historical first)")
+        return
+    path = write_backtest_report(result, output_dir)
+    for name, evaluation in result['configs'].items():
+        overall = evaluation['raw']['overall']
+        summary = ', '.join(f"{indicator.replace('_impact', '')} MAE {values['mae']:.3f}"
+                            for indicator, values in overall.items() if values['mae'] is not None)
+        click.echo(f"{name}: {summary}")
+    click.echo(f"Backtested {result['records']} historical policies in {result['seconds']}s; wrote {path}")
+
+
+@app.cli.command('profile-token')
+@click.option('--ttl', type=int, default=3600, show_default=True, help='Seconds the token stays valid.')
+def profile_token_command(ttl):
+    """Print a token for the X-Profile header (profiles a request, opens /api/profiles)."""
+    from profiling import make_profile_token
+
+    secret = app.config['PROFILING_SECRET']
+    if not secret:
+        raise click.ClickException("PROFILING_SECRET is not set")
+    click.echo(make_profile_token(secret, ttl))
@@ -0,0 +1,159 @@
+"""
+Batched policy comparison with vectorized statistics
+"""
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app import db
+from models import Policy, PolicyPrediction
+
+# Upper bound on the number of policies compared in one request
+MAX_COMPARE_POLICIES = 100
+
+INDICATORS = ['gdp_impact', 'inflation_impact', 'unemployment_impact', 'environmental_impact']
+# +1 where a higher value is better, -1 where lower is better
+INDICATOR_DIRECTION = np.array([1.0, -1.0, -1.0, -1.0])
+
+
+def parse_policy_ids(raw_ids):
+    """Turn request values into unique integer ids, keeping their first-seen order"""
+    seen = {}
+    for raw in raw_ids:
+        try:
+            seen.setdefault(int(raw), None)
+        except (TypeError, ValueError):
+            continue
+    return list(seen)
+
+
+def load_comparison(policy_ids):
+    """
+    Fetch policies and their first prediction with one IN query and join
+    (plus one IN query each for sector breakdowns and attributions).
+    Returns [{'policy': Policy, 'prediction': PolicyPrediction | None}] in request order.
+    """
+    rows = db.session.execute(
+        select(Policy, PolicyPrediction)
+        .outerjoin(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+        .where(Policy.id.in_(policy_ids))
+        .order_by(Policy.id, PolicyPrediction.id)
+        # Sector breakdowns and attributions for every prediction in one additional IN query each
+        .options(selectinload(PolicyPrediction.sector_impacts), selectinload(PolicyPrediction.attributions))
+    ).all()
+
+    by_id = {}
+    for policy, prediction in rows:
+        # Keep the earliest prediction per policy, matching the results page
+        by_id.setdefault(policy.id, {'policy': policy, 'prediction': prediction})
+
+    return [by_id[policy_id] for policy_id in policy_ids if policy_id in by_id]
+
+
+def _rank_best_first(values):
+    """1-based ranks where the largest value ranks first and NaN ranks last"""
+    n = values.shape[0]
+    order = np.argsort(np.where(np.isnan(values), -np.inf, values), axis=0, kind='stable')[::-1]
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, n + 1)[:, None].repeat(values.shape[1], axis=1), axis=0)
+    return ranks
+
+
+def compute_comparison_stats(predictions):
+    """
+    Compute comparison statistics over a list of predictions (None for missing).
+
+    All statistics are derived from one (n_policies x n_indicators) matrix:
+    per-indicator ranks (1 = best), deltas against the mean, min/max, overall
+    score and rank, and a dominance matrix where ``dominates[i][j]`` is True when
+    policy i is at least as good as j on every indicator and better on one.
+    """
+    n = len(predictions)
+    matrix = np.full((n, len(INDICATORS)), np.nan)
+    for i, prediction in enumerate(predictions):
+        if prediction is not None:
+            matrix[i] = [getattr(prediction, name) if getattr(prediction, name) is not None else np.nan
+                         for name in INDICATORS]
+
+    has_data = ~np.isnan(matrix).all(axis=1)
+    if not has_data.any():
+        empty = np.full(len(INDICATORS), np.nan)
+        return {
+            'matrix': matrix, 'mean': empty, 'min': empty, 'max': empty,
+            'deltas': matrix.copy(), 'ranks': np.zeros((n, len(INDICATORS)), dtype=int),
+            'best': np.full(len(INDICATORS), -1), 'worst': np.full(len(INDICATORS), -1),
+            'overall_score': np.full(n, np.nan), 'overall_rank': np.zeros(n, dtype=int),
+            'dominates': np.zeros((n, n), dtype=bool),
+        }
+
+    valid = matrix[has_data]
+    mean = valid.mean(axis=0)
+    deltas = matrix - mean
+
+    # Direction-adjusted so that larger is always better
+    adjusted = matrix * INDICATOR_DIRECTION
+    ranks = _rank_best_first(adjusted)
+
+    filled = np.where(np.isnan(adjusted), -np.inf, adjusted)
+    best = np.argmax(filled, axis=0)
+    worst = np.argmin(np.where(np.isnan(adjusted), np.inf, adjusted), axis=0)
+
+    gdp, inflation, unemployment, environmental = matrix.T
+    overall_score = gdp - unemployment - np.abs(inflation) - environmental / 2
+    overall_rank = _rank_best_first(overall_score[:, None])[:, 0]
+
+    at_least_as_good = (filled[:, None, :] >= filled[None, :, :]).all(axis=2)
+    strictly_better = (filled[:, None, :] > filled[None, :, :]).any(axis=2)
+    dominates = at_least_as_good & strictly_better & has_data[:, None] & has_data[None, :]
+
+    return {
+        'matrix': matrix,
+        'mean': mean,
+        'min': valid.min(axis=0),
+        'max': valid.max(axis=0),
+        'deltas': deltas,
+        'ranks': ranks,
+        'best': best,
+        'worst': worst,
+        'overall_score': overall_score,
+        'overall_rank': overall_rank,
+        'dominates': dominates,
+    }
+
+
+def _nan_to_none(values):
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+
+def comparison_to_dict(policies_data, stats):
+    """Build the JSON-friendly comparison payload used by the API and the charts"""
+    ids = [data['policy'].id for data in policies_data]
+
+    policies = []
+    for i, data in enumerate(policies_data):
+        policies.append({
+            'policy': data['policy'].to_dict(),
+            'prediction': data['prediction'].to_dict() if data['prediction'] else None,
+            'stats': {
+                'ranks': dict(zip(INDICATORS, stats['ranks'][i].tolist())),
+                'deltas_from_mean': dict(zip(INDICATORS, _nan_to_none(stats['deltas'][i]))),
+                'overall_score': _nan_to_none(stats['overall_score'][i:i + 1])[0],
+                'overall_rank': int(stats['overall_rank'][i]),
+                'dominates': [ids[j] for j in np.flatnonzero(stats['dominates'][i])],
+            },
+        })
+
+    return {
+        'indicators': INDICATORS,
+        'policies': policies,
+        'summary': {
+            name: {
+                'mean': _nan_to_none(stats['mean'][k:k + 1])[0],
+                'min': _nan_to_none(stats['min'][k:k + 1])[0],
+                'max': _nan_to_none(stats['max'][k:k + 1])[0],
+                'best_policy_id': ids[stats['best'][k]] if stats['best'][k] >= 0 else None,
+                'worst_policy_id': ids[stats['worst'][k]] if stats['worst'][k] >= 0 else None,
+            }
+            for k, name in enumerate(INDICATORS)
+        },
+    }
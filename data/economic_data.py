@@ -164,6 +164,26 @@ INDIAN_STATE_DATA = {
     }
 }
 
+# Policy sector of each key industry named in INDIAN_STATE_DATA (industries not listed map to no sector)
+INDUSTRY_SECTORS = {
+    'Finance': 'Finance',
+    'Manufacturing': 'Manufacturing',
+    'IT': 'Technology',
+    'Biotechnology': 'Technology',
+    'Aerospace': 'Manufacturing',
+    'Chemicals': 'Manufacturing',
+    'Textiles': 'Manufacturing',
+    'Jute': 'Agriculture',
+    'Spices': 'Agriculture',
+    'Marine Products': 'Agriculture',
+    'Agriculture': 'Agriculture',
+    'Pharmaceuticals': 'Healthcare',
+    'Healthcare': 'Healthcare',
+    'Energy': 'Energy',
+    'Mining': 'Energy',
+    'Tourism': 'Transportation',
+}
+
 # Sector-specific economic impact coefficients
 SECTOR_COEFFICIENTS = {
     'Energy': {
@@ -310,6 +330,28 @@ SHOCK_SENSITIVITY = {
     'Central India': 1.2      # Moderate-high sensitivity due to agrarian economy
 }
 
+# Sector impact multipliers used to generate the ML models' training data (based on economic theory)
+MODEL_SECTOR_MULTIPLIERS = {
+    'Energy': {'gdp': 1.2, 'inflation': 1.5, 'unemployment': 0.8, 'environment': 2.0},
+    'Healthcare': {'gdp': 0.8, 'inflation': 0.6, 'unemployment': 1.2, 'environment': 0.3},
+    'Education': {'gdp': 1.0, 'inflation': 0.4, 'unemployment': 1.0, 'environment': 0.2},
+    'Transportation': {'gdp': 1.1, 'inflation': 1.2, 'unemployment': 0.9, 'environment': 1.8},
+    'Agriculture': {'gdp': 0.9, 'inflation': 1.3, 'unemployment': 1.1, 'environment': 1.5},
+    'Finance': {'gdp': 1.4, 'inflation': 0.8, 'unemployment': 0.7, 'environment': 0.1},
+    'Technology': {'gdp': 1.5, 'inflation': 0.5, 'unemployment': 0.6, 'environment': 0.4},
+    'Manufacturing': {'gdp': 1.3, 'inflation': 1.0, 'unemployment': 1.0, 'environment': 1.6}
+}
+
+# Regional sensitivity factors used to generate the ML models' training data
+MODEL_REGION_FACTORS = {
+    'Northern India': {'stability': 0.9, 'growth_potential': 1.1},
+    'Western India': {'stability': 1.0, 'growth_potential': 1.3},
+    'Southern India': {'stability': 1.1, 'growth_potential': 1.2},
+    'Eastern India': {'stability': 0.8, 'growth_potential': 0.9},
+    'North-Eastern India': {'stability': 0.7, 'growth_potential': 1.0},
+    'Central India': {'stability': 0.9, 'growth_potential': 1.0}
+}
+
 # Policy implementation difficulty factors
 IMPLEMENTATION_DIFFICULTY = {
     'Energy': 0.8,        # High infrastructure requirements
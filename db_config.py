@@ -0,0 +1,84 @@
+"""
+Database performance profile: SQLite pragmas and connection pool settings
+"""
+import os
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Pragmas applied to every new SQLite connection. WAL lets readers proceed while
+# one writer commits, and busy_timeout makes writers wait for the lock instead of
+# failing immediately with "database is locked".
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,         # milliseconds
+    'cache_size': -64000,         # negative values are KiB, so 64 MB
+    'mmap_size': 268435456,       # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Pool defaults for server databases such as PostgreSQL
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30  # seconds
+DEFAULT_POOL_RECYCLE = 300  # seconds
+
+
+def is_sqlite_uri(database_uri):
+    return make_url(database_uri).get_backend_name() == 'sqlite'
+
+
+def sqlite_pragmas_from_env():
+    """
+    Return the SQLite pragma profile, with per-pragma overrides from
+    SQLITE_<PRAGMA> environment variables (e.g. SQLITE_MMAP_SIZE=0).
+    Set DB_TUNING=off to fall back to SQLite's defaults.
+    """
+    if os.environ.get('DB_TUNING', 'on').lower() in ('0', 'off', 'false', 'no'):
+        return {}
+
+    pragmas = {}
+    for name, default in DEFAULT_SQLITE_PRAGMAS.items():
+        value = os.environ.get(f'SQLITE_{name.upper()}', default)
+        pragmas[name] = int(value) if isinstance(default, int) else value
+    return pragmas
+
+
+def build_engine_options(database_uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    options = {
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE)),
+        'pool_pre_ping': True,
+    }
+
+    if is_sqlite_uri(database_uri):
+        # The driver-level timeout covers the window before busy_timeout is applied
+        busy_timeout = int(os.environ.get('SQLITE_BUSY_TIMEOUT', DEFAULT_SQLITE_PRAGMAS['busy_timeout']))
+        options['connect_args'] = {'timeout': busy_timeout / 1000}
+        return options
+
+    options.update({
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', DEFAULT_POOL_SIZE)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)),
+    })
+    return options
+
+
+def register_sqlite_pragmas(engine, pragmas):
+    """Apply ``pragmas`` on every connection the SQLite ``engine`` opens"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logging.debug("SQLite pragmas enabled: %s", pragmas)
@@ -0,0 +1,112 @@
+"""
+State drilldown: spreads a regional prediction across every state in
+INDIAN_STATE_DATA.
+
+A state's exposure to a policy is full inside the policy's region and
+OUTSIDE_REGION_EXPOSURE elsewhere, raised by how much of the state's key
+industries fall in the policy's sector. Its impact on each indicator is the
+regional impact scaled by that exposure and by the state's own rate relative
+to the national baseline (a faster-growing state moves more with GDP, a
+high-unemployment state more with unemployment). Its share of the policy's
+economic effect is its exposure weighted by GDP contribution.
+
+All predictions of a batch are computed in one array operation; results of
+single predictions are cached by prediction and its values.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from data.economic_data import INDIAN_BASELINES
+from data.reference import REGION_IDS, REGION_STATES, SECTOR_IDS, STATE_SECTOR_OVERLAP, STATES, state_column
+
+INDICATORS = ('gdp_impact', 'inflation_impact', 'unemployment_impact', 'environmental_impact')
+
+# Exposure of states outside the policy's region relative to states inside it
+OUTSIDE_REGION_EXPOSURE = 0.25
+
+# Extra exposure of a state whose key industries are all in the policy's sector
+INDUSTRY_OVERLAP_WEIGHT = 1.0
+
+# Predictions whose drilldown is kept in memory
+DRILLDOWN_CACHE_SIZE = 4096
+
+# (state, indicator): the state's rate relative to the national baseline; no state data for the environment
+_SENSITIVITY = np.column_stack([
+    state_column('gdp_growth_rate') / INDIAN_BASELINES['gdp_growth_rate'],
+    state_column('inflation_rate') / INDIAN_BASELINES['inflation_rate'],
+    state_column('unemployment_rate') / INDIAN_BASELINES['unemployment_rate'],
+    np.ones(len(STATES)),
+])
+_GDP_CONTRIBUTION = state_column('gdp_contribution')
+
+
+def drilldown_arrays(sector_ids, region_ids, impacts):
+    """
+    Drilldowns of P predictions given their sector ids, region ids (-1 when
+    unknown) and a (P, 4) array of INDICATORS values.
+
+    Returns (in_region, shares, state_impacts): (P, state) membership flags,
+    (P, state) shares of the economic effect summing to 1 per prediction, and
+    (P, state, indicator) impacts.
+    """
+    sector_ids = np.asarray(sector_ids, dtype=np.intp)
+    region_ids = np.asarray(region_ids, dtype=np.intp)
+    impacts = np.nan_to_num(np.asarray(impacts, dtype=float).reshape(len(sector_ids), len(INDICATORS)))
+
+    in_region = REGION_STATES[np.maximum(region_ids, 0)] & (region_ids >= 0)[:, None]
+    overlap = np.where((sector_ids >= 0)[:, None], STATE_SECTOR_OVERLAP.T[np.maximum(sector_ids, 0)], 0.0)
+    exposure = np.where(in_region, 1.0, OUTSIDE_REGION_EXPOSURE) * (1 + INDUSTRY_OVERLAP_WEIGHT * overlap)
+
+    weights = exposure * _GDP_CONTRIBUTION
+    shares = weights / weights.sum(axis=1, keepdims=True)
+    state_impacts = impacts[:, None, :] * exposure[:, :, None] * _SENSITIVITY[None, :, :]
+    return in_region, shares, state_impacts
+
+
+def _to_dicts(in_region, shares, state_impacts):
+    """One prediction's drilldown as a list of per-state dicts, largest share first"""
+    rounded = np.round(state_impacts, 3).tolist()
+    percentages = np.round(shares * 100, 2).tolist()
+    flags = in_region.tolist()
+    states = [
+        {'state': state, 'in_region': flags[i], 'share_percentage': percentages[i],
+         **dict(zip(INDICATORS, rounded[i]))}
+        for i, state in enumerate(STATES)
+    ]
+    states.sort(key=lambda entry: entry['share_percentage'], reverse=True)
+    return states
+
+
+def state_drilldowns(rows):
+    """
+    Drilldowns for many predictions at once. ``rows`` are (sector, region,
+    gdp, inflation, unemployment, environmental) tuples; returns a list of
+    per-state dict lists in the same order.
+    """
+    if not rows:
+        return []
+    sector_ids = [SECTOR_IDS.get(row[0], -1) for row in rows]
+    region_ids = [REGION_IDS.get(row[1], -1) for row in rows]
+    impacts = np.array([[value if value is not None else np.nan for value in row[2:]] for row in rows],
+                       dtype=float)
+    in_region, shares, state_impacts = drilldown_arrays(sector_ids, region_ids, impacts)
+    return [_to_dicts(in_region[i], shares[i], state_impacts[i]) for i in range(len(rows))]
+
+
+@lru_cache(maxsize=DRILLDOWN_CACHE_SIZE)
+def _cached_drilldown(prediction_id, row):
+    return state_drilldowns([row])[0]
+
+
+def state_drilldown(prediction_id, sector, region, impacts):
+    """
+    Drilldown of one prediction given its INDICATORS values. Cached per
+    prediction and values; callers must not modify the result.
+    """
+    return _cached_drilldown(prediction_id, (sector, region, *impacts))
+
+
+def drilldown_scale(states):
+    """Largest absolute state impact per indicator, for colouring a heatmap"""
+    return {indicator: max((abs(entry[indicator]) for entry in states), default=0.0) for indicator in INDICATORS}
@@ -0,0 +1,289 @@
+"""
+Streaming bulk export of policies joined with their predictions
+"""
+import csv
+import importlib.util
+import io
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import db
+from models import FeatureAttribution, Policy, PolicyPrediction, SectorImpact
+from serialization import dumps
+from data.reference import SECTORS
+
+# Rows fetched from the database per round trip while exporting
+EXPORT_CHUNK_SIZE = 1000
+
+# Sectors flattened out of the sector breakdown, in column order
+BREAKDOWN_SECTORS = SECTORS
+BREAKDOWN_FIELDS = ['gdp_impact', 'employment_impact', 'impact_percentage']
+
+# (column name, type) for every exported column; types drive the Parquet schema
+BASE_COLUMNS = [
+    ('policy_id', 'int'),
+    ('name', 'str'),
+    ('sector', 'str'),
+    ('region', 'str'),
+    ('numeric_change', 'float'),
+    ('time_period', 'int'),
+    ('description', 'str'),
+    ('policy_created_at', 'datetime'),
+    ('prediction_id', 'int'),
+    ('gdp_impact', 'float'),
+    ('inflation_impact', 'float'),
+    ('unemployment_impact', 'float'),
+    ('environmental_impact', 'float'),
+    ('confidence_score', 'float'),
+    ('sentiment_score', 'float'),
+    ('sentiment_confidence', 'float'),
+    ('prediction_created_at', 'datetime'),
+]
+
+# Indicators whose feature attributions are flattened out, in column order
+ATTRIBUTION_INDICATORS = ['gdp_impact', 'inflation_impact', 'unemployment_impact', 'environmental_impact']
+ATTRIBUTION_FIELDS = ['base_value'] + [f"{feature}_contribution" for feature in FeatureAttribution.FEATURES]
+
+EXPORT_COLUMNS = BASE_COLUMNS + [
+    (f"{sector.lower()}_{field}", 'float')
+    for sector in BREAKDOWN_SECTORS
+    for field in BREAKDOWN_FIELDS
+] + [
+    (f"{indicator}_{field}", 'float')
+    for indicator in ATTRIBUTION_INDICATORS
+    for field in ATTRIBUTION_FIELDS
+]
+
+BASE_COLUMN_NAMES = [name for name, _ in BASE_COLUMNS]
+EXPORT_COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Parquet is only offered when pyarrow is installed (the "parquet" extra)
+if importlib.util.find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = 'application/vnd.apache.parquet'
+
+
+def _export_statement():
+    """Build the column-projected Policy/PolicyPrediction join used by every export"""
+    return (
+        select(
+            Policy.id.label('policy_id'),
+            Policy.name,
+            Policy.sector,
+            Policy.region,
+            Policy.numeric_change,
+            Policy.time_period,
+            Policy.description,
+            Policy.created_at.label('policy_created_at'),
+            PolicyPrediction.id.label('prediction_id'),
+            PolicyPrediction.gdp_impact,
+            PolicyPrediction.inflation_impact,
+            PolicyPrediction.unemployment_impact,
+            PolicyPrediction.environmental_impact,
+            PolicyPrediction.confidence_score,
+            PolicyPrediction.sentiment_score,
+            PolicyPrediction.sentiment_confidence,
+            PolicyPrediction.created_at.label('prediction_created_at'),
+            PolicyPrediction.sector_breakdown,
+        )
+        .outerjoin(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+        .order_by(Policy.id, PolicyPrediction.id)
+    )
+
+
+def _load_sector_impacts(prediction_ids):
+    """Fetch the sector_impact rows for a chunk of predictions in one IN query"""
+    breakdowns = {}
+    if not prediction_ids:
+        return breakdowns
+
+    stmt = select(
+        SectorImpact.prediction_id,
+        SectorImpact.sector,
+        SectorImpact.gdp_impact,
+        SectorImpact.employment_impact,
+        SectorImpact.impact_percentage,
+    ).where(SectorImpact.prediction_id.in_(prediction_ids))
+
+    for record in db.session.execute(stmt).mappings():
+        breakdowns.setdefault(record['prediction_id'], {})[record['sector']] = record
+    return breakdowns
+
+
+def _load_attributions(prediction_ids):
+    """Fetch the feature_attribution rows for a chunk of predictions in one IN query"""
+    attributions = {}
+    if not prediction_ids:
+        return attributions
+
+    stmt = select(
+        FeatureAttribution.prediction_id,
+        FeatureAttribution.indicator,
+        FeatureAttribution.base_value,
+        *(getattr(FeatureAttribution, feature) for feature in FeatureAttribution.FEATURES),
+    ).where(FeatureAttribution.prediction_id.in_(prediction_ids))
+
+    for record in db.session.execute(stmt).mappings():
+        attributions.setdefault(record['prediction_id'], {})[record['indicator']] = record
+    return attributions
+
+
+def _flatten_attributions(row, attributions):
+    """Spread feature attributions into the flat per-indicator columns (empty for older predictions)"""
+    attributions = attributions or {}
+    for indicator in ATTRIBUTION_INDICATORS:
+        values = attributions.get(indicator, {})
+        row[f"{indicator}_base_value"] = values.get('base_value')
+        for feature in FeatureAttribution.FEATURES:
+            row[f"{indicator}_{feature}_contribution"] = values.get(feature)
+    return row
+
+
+def _flatten_breakdown(row, breakdown, legacy_json):
+    """Spread a sector breakdown into the flat per-sector columns"""
+    if breakdown is None and legacy_json:
+        try:
+            breakdown = json.loads(legacy_json)
+        except ValueError:
+            logging.warning("Skipping malformed sector breakdown for prediction %s", row['prediction_id'])
+    breakdown = breakdown or {}
+
+    for sector in BREAKDOWN_SECTORS:
+        impacts = breakdown.get(sector, {})
+        for field in BREAKDOWN_FIELDS:
+            row[f"{sector.lower()}_{field}"] = impacts.get(field)
+    return row
+
+
+def iter_export_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one flat dict per policy/prediction pair.
+
+    Rows are fetched ``chunk_size`` at a time (server-side cursor on PostgreSQL),
+    so the full result set is never buffered by the driver or the ORM. Sector
+    impacts and feature attributions are loaded with one extra query each per chunk.
+    """
+    stmt = _export_statement().execution_options(yield_per=chunk_size)
+    result = db.session.execute(stmt)
+    try:
+        for partition in result.mappings().partitions():
+            prediction_ids = [record['prediction_id'] for record in partition if record['prediction_id'] is not None]
+            breakdowns = _load_sector_impacts(prediction_ids)
+            attributions = _load_attributions(prediction_ids)
+            for record in partition:
+                row = {name: record[name] for name in BASE_COLUMN_NAMES}
+                _flatten_breakdown(row, breakdowns.get(record['prediction_id']), record['sector_breakdown'])
+                yield _flatten_attributions(row, attributions.get(record['prediction_id']))
+    finally:
+        result.close()
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encode rows as CSV, yielding one text chunk per ``chunk_size`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMN_NAMES)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_format_value(row[name]) for name in EXPORT_COLUMN_NAMES])
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue()
+
+
+def iter_jsonl(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encode rows as JSON Lines, yielding one text chunk per ``chunk_size`` rows"""
+    lines = []
+    for row in rows:
+        lines.append(dumps({name: row[name] for name in EXPORT_COLUMN_NAMES}))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def write_parquet(path, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write rows to a Parquet file one row group per chunk.
+
+    Requires pandas and pyarrow; only one chunk is held in memory at a time.
+    """
+    try:
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pandas and pyarrow to be installed") from e
+
+    arrow_types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'str': pa.string(),
+        'datetime': pa.timestamp('us'),
+    }
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in EXPORT_COLUMNS])
+
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                frame = pd.DataFrame.from_records(chunk, columns=EXPORT_COLUMN_NAMES)
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                written += len(chunk)
+                chunk = []
+
+        if chunk:
+            frame = pd.DataFrame.from_records(chunk, columns=EXPORT_COLUMN_NAMES)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            written += len(chunk)
+
+    return written
+
+
+def export_to_file(path, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Export every policy/prediction pair to ``path`` and return the row count"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    rows = iter_export_rows(chunk_size)
+
+    if export_format == 'parquet':
+        return write_parquet(path, rows, chunk_size)
+
+    count = 0
+
+    def counted(source):
+        nonlocal count
+        for row in source:
+            count += 1
+            yield row
+
+    encoder = iter_csv if export_format == 'csv' else iter_jsonl
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for chunk in encoder(counted(rows), chunk_size):
+            f.write(chunk)
+
+    return count
@@ -0,0 +1,366 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows in the ``job`` table. Every web process runs a small pool of
+worker threads that claim queued jobs with a conditional UPDATE, so several
+processes can share the queue without an external broker. While a handler runs,
+a heartbeat thread keeps the job's heartbeat fresh; a job whose heartbeat goes
+stale (its process died) is claimed again. Each claim sets a new claim token, and
+heartbeats, progress and the final result are only written under the current
+token, so a run that lost its claim cannot overwrite the run that replaced it.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update, delete, or_, and_
+
+from app import db
+from models import Job, Policy, PolicyPrediction
+from bulk_reports import parse_report_filters, select_report_targets, get_report_pool, write_report_zip
+from exporter import EXPORT_FORMATS, export_to_file
+from report_cache import get_report_cache
+from serialization import dumps
+from simulation import simulate_policies
+from validation import normalize_simulations
+
+# Seconds a worker sleeps when the queue is empty (submissions in the same process wake it early)
+POLL_INTERVAL = 2.0
+
+# Minimum seconds between progress writes for one job
+PROGRESS_INTERVAL = 0.5
+
+# Seconds between heartbeats of a running job (at most a third of JOB_STALE_AFTER)
+HEARTBEAT_INTERVAL = 30
+
+# Seconds between polls of a job while streaming its events
+EVENT_INTERVAL = 0.5
+
+# Seconds without an event before an SSE keep-alive comment is sent
+EVENT_KEEPALIVE = 15
+
+# Seconds between sweeps that delete expired jobs and their result files
+PURGE_INTERVAL = 3600
+
+# kind -> callable(params, context) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register a function as the handler for jobs of ``kind``"""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+class JobContext:
+    """Handed to job handlers for progress reporting and result files"""
+
+    def __init__(self, job_id, claim_token, results_dir):
+        self.job_id = job_id
+        self.claim_token = claim_token
+        self.results_dir = results_dir
+        self._reported_at = 0.0
+
+    def _update(self, connection, **values):
+        """Update the job while this run still holds its claim; returns whether it does"""
+        return connection.execute(
+            update(Job).where(Job.id == self.job_id, Job.claim_token == self.claim_token).values(**values)
+        ).rowcount > 0
+
+    def progress(self, done, total=None, message=None):
+        """Record progress; writes are throttled except for the final step"""
+        now = time.monotonic()
+        if now - self._reported_at < PROGRESS_INTERVAL and done != total:
+            return
+        self._reported_at = now
+
+        values = {'progress_done': done, 'heartbeat_at': datetime.utcnow()}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message[:500]
+        # Own connection, so the handler's session and transaction are left alone
+        with db.engine.begin() as connection:
+            self._update(connection, **values)
+
+    def result_path(self, extension):
+        """Path for a result file owned by this job (removed when the job expires)"""
+        os.makedirs(self.results_dir, exist_ok=True)
+        return os.path.join(self.results_dir, f"{self.job_id}{extension}")
+
+
+class _Heartbeat:
+    """Refreshes a job's heartbeat from a background thread for as long as its handler runs"""
+
+    def __init__(self, context, engine, interval):
+        self.context = context
+        self.engine = engine
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{context.job_id[:8]}',
+                                        daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as connection:
+                    held = self.context._update(connection, heartbeat_at=datetime.utcnow())
+            except Exception:
+                logging.exception("Heartbeat for job %s failed", self.context.job_id)
+                continue
+            if not held:
+                logging.warning("Job %s was claimed by another worker; stopping its heartbeat",
+                                self.context.job_id)
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+class JobQueue:
+    """Submits jobs and runs this process's worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Semaphore(0)
+        self._started_pid = None
+        self._purged_at = 0.0
+        self.workers = 0
+
+    def start(self, app):
+        """Start the worker threads for this process (idempotent, fork-aware)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self.workers = app.config['JOB_WORKERS']
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(app,), name=f'job-worker-{n}', daemon=True)
+                thread.start()
+            if self.workers:
+                logging.info("Started %d job workers", self.workers)
+
+    def submit(self, kind, params=None):
+        """Queue a job and return it"""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind. Must be one of: {', '.join(sorted(JOB_HANDLERS))}")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, status='queued', params=json.dumps(params or {}))
+        db.session.add(job)
+        db.session.commit()
+        self._wakeup.release()
+        return job
+
+    def _claimable(self, stale_before):
+        return or_(
+            Job.status == 'queued',
+            and_(Job.status == 'running', Job.heartbeat_at < stale_before)
+        )
+
+    def _claim(self):
+        """
+        Atomically move the oldest claimable job to running; returns
+        (job id, claim token) or None
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_STALE_AFTER'])
+        candidates = db.session.execute(
+            select(Job.id).where(self._claimable(stale_before)).order_by(Job.created_at).limit(5)
+        ).scalars().all()
+
+        for job_id in candidates:
+            now = datetime.utcnow()
+            token = uuid.uuid4().hex
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, self._claimable(stale_before))
+                .values(status='running', started_at=now, heartbeat_at=now, claim_token=token,
+                        finished_at=None, error=None)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id, token
+
+        db.session.rollback()
+        return None
+
+    def _finish(self, job_id, claim_token, **values):
+        """Record the outcome unless another worker has claimed the job since; returns whether it was recorded"""
+        finished = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.claim_token == claim_token, Job.status == 'running')
+            .values(finished_at=datetime.utcnow(), **values)
+        ).rowcount
+        db.session.commit()
+        if not finished:
+            logging.warning("Job %s was claimed by another worker; discarding this run's outcome", job_id)
+        return bool(finished)
+
+    def _execute(self, job_id, claim_token):
+        job = db.session.get(Job, job_id)
+        handler = JOB_HANDLERS.get(job.kind)
+        params = job.get_params()
+        started = time.perf_counter()
+        context = JobContext(job_id, claim_token, current_app.config['JOB_RESULTS_DIR'])
+        interval = min(HEARTBEAT_INTERVAL, current_app.config['JOB_STALE_AFTER'] / 3)
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job.kind}'")
+            with _Heartbeat(context, db.engine, interval):
+                result = handler(params, context)
+        except Exception as e:
+            db.session.rollback()
+            logging.exception(f"Job {job_id} ({job.kind}) failed")
+            self._finish(job_id, claim_token, status='failed', error=str(e))
+            return
+
+        # Handlers commit their own writes; discard anything left pending
+        db.session.rollback()
+        if self._finish(job_id, claim_token, status='succeeded', result=json.dumps(result)):
+            logging.info("Job %s (%s) finished in %.1f s", job_id, job.kind, time.perf_counter() - started)
+
+    def purge_expired(self):
+        """Delete finished jobs older than JOB_RESULT_TTL along with their result files"""
+        results_dir = os.path.abspath(current_app.config['JOB_RESULTS_DIR'])
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_RESULT_TTL'])
+        expired = db.session.execute(
+            select(Job).where(Job.status.in_(('succeeded', 'failed')), Job.finished_at < cutoff)
+        ).scalars().all()
+
+        for job in expired:
+            path = (job.get_result() or {}).get('file') if job.status == 'succeeded' else None
+            # Only files the job created itself; cached reports belong to the report cache
+            if path and os.path.dirname(os.path.abspath(path)) == results_dir:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        if expired:
+            db.session.execute(delete(Job).where(Job.id.in_([job.id for job in expired])))
+        db.session.commit()
+        return len(expired)
+
+    def _work(self, app):
+        with app.app_context():
+            while True:
+                try:
+                    if time.monotonic() - self._purged_at > PURGE_INTERVAL:
+                        self._purged_at = time.monotonic()
+                        self.purge_expired()
+
+                    claim = self._claim()
+                    if claim is None:
+                        self._wakeup.acquire(timeout=POLL_INTERVAL)
+                        continue
+                    self._execute(*claim)
+                except Exception:
+                    logging.exception("Job worker error")
+                    db.session.rollback()
+                    time.sleep(POLL_INTERVAL)
+                finally:
+                    # Return the connection to the pool between jobs
+                    db.session.remove()
+
+
+def iter_job_events(job_id):
+    """
+    Server-Sent Events for a job: a ``progress`` event whenever its state changes
+    and a final ``done`` event once it has finished
+    """
+    last_payload = None
+    last_sent = time.monotonic()
+
+    while True:
+        # End the read transaction so each poll sees fresh rows and none stays open while sleeping
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        if job is None:
+            yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+            return
+
+        payload = dumps(job.to_dict())
+        if job.finished:
+            yield f"event: done\ndata: {payload}\n\n"
+            return
+
+        if payload != last_payload:
+            yield f"event: progress\ndata: {payload}\n\n"
+            last_payload = payload
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > EVENT_KEEPALIVE:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+
+        time.sleep(EVENT_INTERVAL)
+
+
+# Shared per-process queue
+job_queue = JobQueue()
+
+
+# Job handlers
+
+@job_handler('bulk_reports')
+def run_bulk_reports(params, context):
+    """ZIP of PDF reports; ``params`` are the raw bulk report filters"""
+    targets = select_report_targets(**parse_report_filters(**params))
+    context.progress(0, len(targets), 'Rendering reports')
+    path = context.result_path('.zip')
+    write_report_zip(path, targets, get_report_cache(), get_report_pool(current_app.config['REPORT_WORKERS']),
+                     progress=context.progress)
+    return {'file': path, 'filename': f'policy_reports_{context.job_id}.zip',
+            'mimetype': 'application/zip', 'count': len(targets)}
+
+
+@job_handler('policy_report')
+def run_policy_report(params, context):
+    """Single PDF report rendered into the report cache"""
+    policy = db.session.get(Policy, params['policy_id'])
+    prediction = PolicyPrediction.query.filter_by(policy_id=policy.id).first() if policy else None
+    if prediction is None:
+        raise ValueError(f"No prediction found for policy {params['policy_id']}")
+
+    context.progress(0, 1, 'Rendering report')
+    path, key = get_report_cache().get_or_render(policy, prediction)
+    context.progress(1, 1)
+    return {'file': path, 'filename': f'policy_report_{policy.name.replace(" ", "_")}.pdf',
+            'mimetype': 'application/pdf', 'report_key': key}
+
+
+@job_handler('export')
+def run_export(params, context):
+    """Full policy export to a file (any of exporter.EXPORT_FORMATS; Parquet needs pyarrow)"""
+    export_format = params.get('format', 'csv')
+    context.progress(0, message=f'Exporting {export_format}')
+    path = context.result_path(f'.{export_format}')
+    count = export_to_file(path, export_format)
+    context.progress(count, count)
+    return {'file': path, 'filename': f'policies_export_{context.job_id}.{export_format}',
+            'mimetype': EXPORT_FORMATS[export_format], 'count': count}
+
+
+@job_handler('simulate_batch')
+def run_simulate_batch(params, context):
+    """Batch simulation of ``params['policies']`` (simulation inputs, normalized again here)"""
+    inputs, errors = normalize_simulations(params.get('policies') or [])
+    if errors:
+        raise ValueError(f"Invalid input at index {errors[0]['index']}: {errors[0]['error']}")
+    context.progress(0, len(inputs), 'Simulating policies')
+    results = simulate_policies(inputs)
+    context.progress(len(results), len(inputs))
+    return {'policy_ids': [policy.id for policy, _ in results]}
@@ -0,0 +1,275 @@
+"""
+Logging setup: every record is handed to a queue and written by a background
+listener thread, so request threads never wait on log I/O.
+
+Records are rendered as one JSON object per line (LOG_FORMAT=text gives plain
+lines for local development) and carry the id of the request that emitted
+them. Each request gets an id (the incoming X-Request-ID header when present)
+that is echoed in the response, and with LOG_REQUESTS on its method, path,
+status and duration are logged when it finishes.
+
+Levels: LOG_LEVEL applies everywhere, LOG_LEVELS overrides it per logger or
+module, e.g. ``LOG_LEVELS="ml_models=DEBUG,sqlalchemy.engine=WARNING"``. Modules
+logging through the root logger are matched by module name. DEBUG records are
+kept at LOG_DEBUG_SAMPLE_RATE; a call can pass ``extra={'sample_rate': ...}``
+to sample a high-volume event at its own rate.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Incoming request ids longer than this are replaced by a generated one
+MAX_REQUEST_ID_LENGTH = 128
+
+# Records waiting for the listener; further records are dropped (and counted) rather than block
+DEFAULT_QUEUE_SIZE = 10000
+
+# Chatty library loggers, unless LOG_LEVELS says otherwise
+DEFAULT_MODULE_LEVELS = {'werkzeug': logging.WARNING, 'sqlalchemy': logging.WARNING}
+
+# LogRecord attributes that aren't user-supplied ``extra`` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'sample_rate'}
+
+_listener = None
+_handler = None
+
+
+def parse_level(value):
+    """Level number for a name such as ``"info"``; raises ValueError for unknown levels"""
+    number = logging.getLevelName(value.strip().upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Unknown log level: {value.strip()!r}")
+    return number
+
+
+def parse_levels(value):
+    """``"name=LEVEL,..."`` as {name: level number}"""
+    levels = {}
+    for part in (value or '').split(','):
+        name, _, level = part.partition('=')
+        if name.strip():
+            levels[name.strip()] = parse_level(level)
+    return levels
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Applies the per-logger levels. Named loggers match on the longest dotted
+    prefix of their name; root logger records match on their module.
+    """
+
+    def __init__(self, default_level, levels):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+        self._resolved = {}
+
+    def _threshold(self, name):
+        threshold = self._resolved.get(name)
+        if threshold is None:
+            threshold = self.default_level
+            prefix = name
+            while prefix:
+                if prefix in self.levels:
+                    threshold = self.levels[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._resolved[name] = threshold
+        return threshold
+
+    def filter(self, record):
+        name = record.module if record.name == 'root' else record.name
+        return record.levelno >= self._threshold(name)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG records (or the record's own ``sample_rate``)"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        rate = getattr(record, 'sample_rate', None)
+        if rate is None:
+            if record.levelno > logging.DEBUG:
+                return True
+            rate = self.rate
+        return rate >= 1 or random.random() < rate
+
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the current request id; runs on the emitting thread"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra`` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = None
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Merges the message arguments and renders tracebacks on the emitting thread
+    (they may not be safe to touch later), keeping ``extra`` fields for the
+    formatter, and drops records when the queue is full instead of blocking
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=logging.INFO, levels=None, fmt='json', debug_sample_rate=1.0,
+                      queue_size=DEFAULT_QUEUE_SIZE, stream=None):
+    """
+    Route all logging through a queue to a listener writing to ``stream``
+    (stderr by default). Replaces any handlers already on the root logger.
+    """
+    global _listener, _handler
+    stop_listener()
+
+    levels = {**DEFAULT_MODULE_LEVELS, **(levels or {})}
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+
+    _handler = _QueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(ModuleLevelFilter(level, levels))
+    _handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    _handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    # The root level only needs to let through the most verbose configured level; the filter does the rest
+    root.setLevel(min([level, *levels.values()]))
+    for name, module_level in levels.items():
+        # Lets libraries that check isEnabledFor (SQLAlchemy's statement logging) skip the work
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def stop_listener():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener():
+    # The listener thread doesn't survive a fork (e.g. gunicorn --preload); start one per child
+    global _listener
+    if _listener is not None:
+        _listener = logging.handlers.QueueListener(_listener.queue, *_listener.handlers,
+                                                   respect_handler_level=True)
+        _listener.start()
+
+
+atexit.register(stop_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def dropped_records():
+    """Records discarded because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def init_app(app):
+    """Configure logging from the app config and tag every request with an id"""
+    configure_logging(
+        level=app.config['LOG_LEVEL'],
+        levels=app.config['LOG_LEVELS'],
+        fmt=app.config['LOG_FORMAT'],
+        debug_sample_rate=app.config['LOG_DEBUG_SAMPLE_RATE'],
+        queue_size=app.config['LOG_QUEUE_SIZE'],
+    )
+    log_requests = app.config['LOG_REQUESTS']
+    request_logger = logging.getLogger('access')
+
+    @app.before_request
+    def _assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        valid = 0 < len(incoming) <= MAX_REQUEST_ID_LENGTH and incoming.isprintable()
+        g.request_id = incoming if valid else uuid.uuid4().hex
+        g.log_request_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        request_id = g.get('request_id')
+        if request_id is not None:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        started = g.pop('log_request_start', None)
+        if log_requests and started is not None:
+            request_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            })
+        return response
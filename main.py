@@ -1,4 +1,7 @@
-from app import app
+from app import create_app
 
+# No module-level app: report rendering workers are spawned and re-import this
+# module as __mp_main__, which must not run the app's startup again. Servers use
+# the factory (gunicorn "main:create_app()"; `flask --app main` finds it too).
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,409 @@
+"""
+Counters and latency histograms for the hot paths, exposed in the Prometheus
+text format on /metrics.
+
+Each process keeps its own values in memory. With the METRICS_DIR environment
+variable set, every process (web workers and report rendering workers alike)
+also writes a snapshot of its values to
+``<METRICS_DIR>/metrics_<pid>_<start>.json`` about once per FLUSH_INTERVAL, and
+/metrics sums the snapshots of all processes. Keying by start time as well as
+pid keeps a reused pid from overwriting an exited process's totals. Snapshots
+of exited processes are folded into a single aggregate file, so counters never
+go backwards and the directory holds one file per live process plus one.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots of exited processes are kept rather than folded
+    fcntl = None
+
+# Seconds between snapshot writes when METRICS_DIR is set
+FLUSH_INTERVAL = 1.0
+
+# A snapshot not rewritten for this long belongs to an exited process, even if its pid was reused
+DEAD_AFTER = 60.0
+
+# Totals of exited processes, and the lock serializing folds into it
+AGGREGATE_FILE = 'aggregate.json'
+FOLD_LOCK_FILE = 'aggregate.lock'
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# PDF size buckets in bytes (10 KB to 10 MB)
+SIZE_BUCKETS = (10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 10_000_000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = {}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        if name in REGISTRY:
+            raise ValueError(f"Duplicate metric: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), value if not isinstance(value, list) else list(value)]
+                       for key, value in self._values.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'samples': samples}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        _maybe_flush()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket (non-cumulative) counts, then +Inf, sum and count
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 3)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+                    break
+            else:
+                values[len(self.buckets)] += 1
+            values[-2] += value
+            values[-1] += 1
+        _maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.buckets)
+        return snapshot
+
+
+# Hot-path metrics
+
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests handled', ['route', 'method', 'status'])
+HTTP_REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to produce a response (streamed bodies excluded)',
+                                 ['route', 'method'])
+PREDICTION_SECONDS = Histogram('prediction_duration_seconds', 'Model inference time per batch', ['model'])
+PREDICTIONS = Counter('predictions_total', 'Policies predicted')
+DB_QUERY_SECONDS = Histogram('db_query_duration_seconds', 'Database statement execution time', ['operation'])
+PDF_BUILD_SECONDS = Histogram('pdf_report_build_seconds', 'Time to build one PDF report')
+PDF_SIZE_BYTES = Histogram('pdf_report_size_bytes', 'Size of built PDF reports', buckets=SIZE_BUCKETS)
+MODEL_TRAINING_SECONDS = Histogram('model_training_seconds', 'Time to train the ML models',
+                                   buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+MODEL_LOAD_SECONDS = Histogram('model_load_seconds', 'Time to load the ML models from their artifact')
+RESPONSE_CACHE_EVENTS = Counter('response_cache_events_total', 'Response cache lookups, stores and evictions',
+                                ['event'])
+
+
+# Multiprocess snapshots
+
+_directory = os.environ.get('METRICS_DIR') or None
+_flush_lock = threading.Lock()
+_flushed_at = 0.0
+_flusher_pid = None
+_process = (None, None)
+
+
+def _snapshot_path():
+    """This process's snapshot file, named by pid and start time (fork-aware)"""
+    global _process
+    pid = os.getpid()
+    if _process[0] != pid:
+        _process = (pid, time.time_ns())
+    return os.path.join(_directory, f"metrics_{pid}_{_process[1]}.json")
+
+
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=_directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR"""
+    global _flushed_at
+    if not _directory:
+        return
+    with _flush_lock:
+        _flushed_at = time.monotonic()
+        data = {name: metric.snapshot() for name, metric in REGISTRY.items()}
+        try:
+            os.makedirs(_directory, exist_ok=True)
+            _write_json(_snapshot_path(), data)
+        except OSError as e:
+            logging.warning(f"Could not write metrics snapshot: {str(e)}")
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+
+def _maybe_flush():
+    """Start this process's flusher thread with its first observation (fork-aware)"""
+    global _flusher_pid
+    if not _directory or _flusher_pid == os.getpid():
+        return
+    with _flush_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='metrics-flusher', daemon=True).start()
+    atexit.register(flush)
+
+
+def _merge(merged, name, snapshot):
+    target = merged.setdefault(name, {**snapshot, 'samples': {}})
+    if snapshot.get('buckets') != target.get('buckets'):
+        # Buckets changed between deploys; older snapshots can't be combined
+        return
+    for labels, value in snapshot['samples']:
+        key = tuple(labels)
+        current = target['samples'].get(key)
+        if current is None:
+            target['samples'][key] = value
+        elif isinstance(value, list):
+            target['samples'][key] = [a + b for a, b in zip(current, value)]
+        else:
+            target['samples'][key] = current + value
+
+
+def _combine(snapshots):
+    """Sum of ``snapshots``, in the registry's current shape"""
+    merged = {name: {**metric.snapshot(), 'samples': {}} for name, metric in REGISTRY.items()}
+    for snapshot in snapshots:
+        for name, data in snapshot.items():
+            _merge(merged, name, data)
+    return merged
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Skipping unreadable metrics file {path}: {str(e)}")
+        return None
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshot_paths():
+    try:
+        entries = list(os.scandir(_directory))
+    except FileNotFoundError:
+        return []
+    return [entry.path for entry in entries if entry.name.startswith('metrics_') and entry.name.endswith('.json')]
+
+
+@contextmanager
+def _folding(operation):
+    """Hold the fold lock: exclusive to fold, shared to read a consistent aggregate and snapshot set"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(os.path.join(_directory, FOLD_LOCK_FILE), os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, operation)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _fold_exited():
+    """Merge the snapshots of exited processes into the aggregate file and remove them"""
+    own = _snapshot_path()
+    now = time.time()
+    exited = []
+    for path in _snapshot_paths():
+        if path == own:
+            continue
+        try:
+            pid = int(os.path.basename(path)[len('metrics_'):-len('.json')].split('_')[0])
+            stale = now - os.stat(path).st_mtime > DEAD_AFTER
+        except (ValueError, FileNotFoundError):
+            continue
+        if stale or not _is_running(pid):
+            exited.append(os.path.basename(path))
+    if not exited:
+        return
+
+    with _folding(fcntl.LOCK_EX):
+        aggregate_path = os.path.join(_directory, AGGREGATE_FILE)
+        aggregate = _read_json(aggregate_path) or {'folded': [], 'metrics': {}}
+        # Files recorded by a fold that stopped before removing them are already counted
+        pending = [name for name in exited if name not in aggregate['folded']]
+        snapshots = [aggregate['metrics']]
+        snapshots.extend(snapshot for snapshot in (_read_json(os.path.join(_directory, name)) for name in pending)
+                         if snapshot is not None)
+        merged = _combine(snapshots)
+        try:
+            _write_json(aggregate_path, {
+                'folded': exited,
+                'metrics': {name: {**data, 'samples': [[list(key), value] for key, value in data['samples'].items()]}
+                            for name, data in merged.items()},
+            })
+            for name in exited:
+                try:
+                    os.remove(os.path.join(_directory, name))
+                except FileNotFoundError:
+                    pass
+        except OSError as e:
+            logging.warning(f"Could not fold exited metrics snapshots: {str(e)}")
+
+
+def collect():
+    """Merged snapshots of every process (or just this one without METRICS_DIR)"""
+    snapshots = []
+    if _directory:
+        _maybe_flush()
+        flush()
+        if fcntl is not None:
+            _fold_exited()
+        with _folding(fcntl.LOCK_SH if fcntl is not None else None):
+            aggregate = _read_json(os.path.join(_directory, AGGREGATE_FILE)) or {'folded': [], 'metrics': {}}
+            snapshots.append(aggregate['metrics'])
+            paths = [path for path in _snapshot_paths() if os.path.basename(path) not in aggregate['folded']]
+            snapshots.extend(snapshot for snapshot in map(_read_json, paths) if snapshot is not None)
+    else:
+        snapshots.append({name: metric.snapshot() for name, metric in REGISTRY.items()})
+    return _combine(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_text():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for name, data in sorted(collect().items()):
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        names = data['labelnames']
+        for labels, value in sorted(data['samples'].items()):
+            if data['type'] == 'histogram':
+                buckets = data['buckets']
+                cumulative = 0
+                for bound, count in zip([*buckets, '+Inf'], value):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(names, labels, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(float(value[-2]))}")
+                lines.append(f"{name}_count{_format_labels(names, labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+# Integration
+
+def register_query_metrics(engine):
+    """Time every statement run on ``engine``"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_query_start'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+    @event.listens_for(engine, 'handle_error')
+    def _failed_query(context):
+        # after_cursor_execute doesn't run for failed statements
+        starts = context.connection.info.get('metrics_query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def init_app(app):
+    """Time every request by route"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_request_start', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+            HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
@@ -0,0 +1,221 @@
+"""
+Schema creation and data migrations applied at startup
+"""
+import hashlib
+import json
+import logging
+
+from sqlalchemy import select, insert, update, delete, exists, func, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+from app import db
+from models import Policy, PolicyPrediction, SectorImpact, SchemaMigration, HistoricalPolicy, Job
+from search import create_search_indexes
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_sector_impacts(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Move legacy JSON sector breakdowns into the sector_impact table.
+
+    Works through predictions in id order, one batch per transaction, and clears
+    the JSON column once its rows have been written.
+    """
+    migrated = 0
+    last_id = 0
+
+    while True:
+        batch = db.session.execute(
+            select(PolicyPrediction.id, PolicyPrediction.sector_breakdown)
+            .where(PolicyPrediction.id > last_id,
+                   PolicyPrediction.sector_breakdown.is_not(None),
+                   ~exists().where(SectorImpact.prediction_id == PolicyPrediction.id))
+            .order_by(PolicyPrediction.id)
+            .limit(batch_size)
+        ).all()
+
+        if not batch:
+            break
+
+        rows = []
+        for prediction_id, breakdown_json in batch:
+            try:
+                breakdown = json.loads(breakdown_json)
+            except ValueError:
+                logging.warning("Skipping malformed sector breakdown for prediction %s", prediction_id)
+                continue
+
+            for sector, impacts in breakdown.items():
+                rows.append({
+                    'prediction_id': prediction_id,
+                    'sector': sector,
+                    'gdp_impact': impacts.get('gdp_impact'),
+                    'employment_impact': impacts.get('employment_impact'),
+                    'impact_percentage': impacts.get('impact_percentage'),
+                })
+
+        if rows:
+            db.session.execute(insert(SectorImpact), rows)
+
+        migrated_ids = {row['prediction_id'] for row in rows}
+        if migrated_ids:
+            db.session.execute(
+                update(PolicyPrediction)
+                .where(PolicyPrediction.id.in_(migrated_ids))
+                .values(sector_breakdown=None)
+            )
+
+        db.session.commit()
+        migrated += len(migrated_ids)
+        last_id = batch[-1][0]
+
+    logging.info("Backfilled sector impacts for %d predictions", migrated)
+    return migrated
+
+
+def add_historical_natural_key():
+    """
+    Create the unique (name, country, year_implemented) index on tables created
+    before it existed, dropping duplicate rows first (the lowest id is kept)
+    """
+    key_columns = [HistoricalPolicy.name, HistoricalPolicy.country, HistoricalPolicy.year_implemented]
+    keep_ids = select(func.min(HistoricalPolicy.id)).group_by(*key_columns)
+    removed = db.session.execute(
+        delete(HistoricalPolicy).where(HistoricalPolicy.id.not_in(keep_ids))
+    ).rowcount
+    db.session.commit()
+
+    for index in HistoricalPolicy.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+    logging.info("Historical policy natural key in place (%d duplicates removed)", removed)
+
+
+def add_missing_columns(model):
+    """
+    ALTER TABLE ... ADD COLUMN for every (nullable) column of ``model`` that
+    its existing table lacks; returns the names of the added columns
+    """
+    table = model.__table__
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    added = []
+    with db.engine.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.append(column.name)
+    return added
+
+
+def add_historical_policy_inputs():
+    """Add the simulation input columns to historical_policy tables created before them"""
+    added = add_missing_columns(HistoricalPolicy)
+    logging.info("Historical policy input columns in place (added: %s)", ', '.join(added) or 'none')
+
+
+def add_historical_policy_updated_at():
+    """Add historical_policy.updated_at to tables created before it (existing rows stay NULL)"""
+    added = add_missing_columns(HistoricalPolicy)
+    logging.info("Historical policy updated_at in place (added: %s)", ', '.join(added) or 'none')
+
+
+def add_sector_impact_share_index():
+    """Create the (sector, impact_percentage) ranking index on tables created before it existed"""
+    for index in SectorImpact.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+    logging.info("Sector impact ranking indexes in place")
+
+
+def add_job_claim_token():
+    """Add job.claim_token to tables created before it"""
+    added = add_missing_columns(Job)
+    logging.info("Job claim token in place (added: %s)", ', '.join(added) or 'none')
+
+
+def add_listing_indexes():
+    """Create the policy listing and prediction lookup indexes on tables created before them"""
+    for index in (*Policy.__table__.indexes, *PolicyPrediction.__table__.indexes):
+        index.create(db.engine, checkfirst=True)
+
+    logging.info("Policy listing indexes in place")
+
+# Ordered (name, callable) pairs; names are recorded in schema_migration once applied
+MIGRATIONS = [
+    ('0001_backfill_sector_impacts', backfill_sector_impacts),
+    ('0002_historical_natural_key', add_historical_natural_key),
+    ('0003_full_text_search', create_search_indexes),
+    ('0004_historical_policy_inputs', add_historical_policy_inputs),
+    ('0005_sector_impact_share_index', add_sector_impact_share_index),
+    ('0006_historical_policy_updated_at', add_historical_policy_updated_at),
+    ('0007_job_claim_token', add_job_claim_token),
+    ('0008_policy_listing_indexes', add_listing_indexes),
+]
+
+
+def run_migrations():
+    """Apply every migration that has no marker row yet"""
+    applied = set(db.session.execute(select(SchemaMigration.name)).scalars())
+
+    for name, migration in MIGRATIONS:
+        if name in applied:
+            continue
+
+        logging.info("Applying migration %s", name)
+        try:
+            migration()
+            db.session.add(SchemaMigration(name=name))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker applied the same migration concurrently
+            db.session.rollback()
+            logging.info("Migration %s already applied by another process", name)
+
+
+# Prefix of the schema_migration row recording the schema fingerprint
+SCHEMA_MARKER_PREFIX = 'schema:'
+
+
+def schema_fingerprint():
+    """Hash of every table, column and index declared by the models"""
+    parts = []
+    for table in sorted(db.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{column.name}:{column.type}:{column.nullable}" for column in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def ensure_schema():
+    """
+    Create tables and apply pending migrations, unless the schema_migration
+    table already records the current schema fingerprint and every migration,
+    in which case startup costs a single query.
+    """
+    marker = f"{SCHEMA_MARKER_PREFIX}{schema_fingerprint()}"
+    try:
+        applied = set(db.session.execute(select(SchemaMigration.name)).scalars())
+    except (OperationalError, ProgrammingError):
+        # Fresh database without the schema_migration table
+        db.session.rollback()
+        applied = set()
+
+    if marker in applied and all(name in applied for name, _ in MIGRATIONS):
+        logging.debug("Schema is current (%s)", marker)
+        return
+
+    db.create_all()
+    run_migrations()
+
+    try:
+        db.session.execute(delete(SchemaMigration).where(
+            SchemaMigration.name.startswith(SCHEMA_MARKER_PREFIX), SchemaMigration.name != marker))
+        if marker not in applied:
+            db.session.add(SchemaMigration(name=marker))
+        db.session.commit()
+    except IntegrityError:
+        # Another worker recorded the same fingerprint concurrently
+        db.session.rollback()
@@ -1,9 +1,16 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Text, JSON
+from sqlalchemy import Text, JSON, select, desc, func
 import json
 
+from attribution import FEATURES as ATTRIBUTION_FEATURES
+
 class Policy(db.Model):
+    __table_args__ = (
+        # Newest-first listing pages (summary_page)
+        db.Index('ix_policy_created_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     sector = db.Column(db.String(100), nullable=False)
@@ -27,10 +34,80 @@ class Policy(db.Model):
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+    
+    # Columns read by iter_summaries()
+    SUMMARY_COLUMNS = ('id', 'name', 'description', 'sector', 'region', 'numeric_change', 'time_period', 'created_at')
+    PREDICTION_SUMMARY_COLUMNS = ('gdp_impact', 'inflation_impact', 'unemployment_impact',
+                                  'environmental_impact', 'confidence_score')
+    
+    @staticmethod
+    def _summary_statement(policy_ids=None):
+        """Summary columns of policies joined to their first prediction, optionally only ``policy_ids``"""
+        first_prediction_ids = select(func.min(PolicyPrediction.id)).group_by(PolicyPrediction.policy_id)
+        stmt = (
+            select(*[getattr(Policy, name) for name in Policy.SUMMARY_COLUMNS],
+                   PolicyPrediction.id.label('prediction_id'),
+                   *[getattr(PolicyPrediction, name) for name in Policy.PREDICTION_SUMMARY_COLUMNS])
+        )
+        if policy_ids is not None:
+            first_prediction_ids = first_prediction_ids.where(PolicyPrediction.policy_id.in_(policy_ids))
+            stmt = stmt.where(Policy.id.in_(policy_ids))
+        return stmt.outerjoin(PolicyPrediction, (PolicyPrediction.policy_id == Policy.id)
+                              & PolicyPrediction.id.in_(first_prediction_ids))
+    
+    @staticmethod
+    def _summary(row):
+        summary = {name: row[name] for name in Policy.SUMMARY_COLUMNS}
+        summary['predictions'] = []
+        if row['prediction_id'] is not None:
+            prediction = {'id': row['prediction_id']}
+            prediction.update((name, row[name]) for name in Policy.PREDICTION_SUMMARY_COLUMNS)
+            summary['predictions'].append(prediction)
+        return summary
+    
+    @staticmethod
+    def iter_summaries(sector=None, chunk_size=500):
+        """
+        Yield one plain dict per policy (newest first) with its first prediction
+        nested as ``predictions[0]``. Only the summary columns are selected and no
+        ORM objects are built, so large listings stay cheap.
+        """
+        stmt = Policy._summary_statement().order_by(Policy.created_at.desc(), Policy.id.desc())
+        if sector:
+            stmt = stmt.where(Policy.sector == sector)
+        
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size)).mappings()
+        try:
+            for row in result:
+                yield Policy._summary(row)
+        finally:
+            result.close()
+    
+    @staticmethod
+    def summaries_for(policy_ids):
+        """{policy id: summary} (as in iter_summaries) for ``policy_ids``"""
+        if not policy_ids:
+            return {}
+        rows = db.session.execute(Policy._summary_statement(policy_ids)).mappings()
+        return {row['id']: Policy._summary(row) for row in rows}
+    
+    @staticmethod
+    def summary_page(page=1, per_page=50, sector=None):
+        """
+        (summaries, has_next): one page of iter_summaries() order. Only the page's
+        ids are selected first, so the prediction join covers just that page.
+        """
+        stmt = select(Policy.id).order_by(Policy.created_at.desc(), Policy.id.desc())
+        if sector:
+            stmt = stmt.where(Policy.sector == sector)
+        # One extra row tells whether another page exists
+        ids = db.session.execute(stmt.limit(per_page + 1).offset((page - 1) * per_page)).scalars().all()
+        summaries = Policy.summaries_for(ids[:per_page])
+        return [summaries[policy_id] for policy_id in ids[:per_page] if policy_id in summaries], len(ids) > per_page
 
 class PolicyPrediction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    policy_id = db.Column(db.Integer, db.ForeignKey('policy.id'), nullable=False)
+    policy_id = db.Column(db.Integer, db.ForeignKey('policy.id'), nullable=False, index=True)
     
     # Economic indicators predictions
     gdp_impact = db.Column(db.Float)  # Percentage change
@@ -38,8 +115,9 @@ class PolicyPrediction(db.Model):
     unemployment_impact = db.Column(db.Float)  # Percentage points
     environmental_impact = db.Column(db.Float)  # CO2 emission change %
     
-    # Sector-wise breakdown (stored as JSON)
-    sector_breakdown = db.Column(Text)  # JSON string
+    # Legacy sector-wise breakdown (JSON string), superseded by sector_impacts.
+    # Only rows written before the sector_impact table existed still carry it.
+    sector_breakdown = db.Column(Text)
     
     # Confidence scores
     confidence_score = db.Column(db.Float)  # 0-1
@@ -50,13 +128,41 @@ class PolicyPrediction(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Sector-wise breakdown, one row per sector
+    sector_impacts = db.relationship('SectorImpact', backref='prediction', lazy=True,
+                                     cascade='all, delete-orphan', order_by='SectorImpact.id')
+    
+    # Contribution of each input feature, one row per indicator
+    attributions = db.relationship('FeatureAttribution', backref='prediction', lazy=True,
+                                   cascade='all, delete-orphan', order_by='FeatureAttribution.id')
+    
     def get_sector_breakdown(self):
+        if self.sector_impacts:
+            return {impact.sector: impact.to_dict() for impact in self.sector_impacts}
         if self.sector_breakdown:
             return json.loads(self.sector_breakdown)
         return {}
     
     def set_sector_breakdown(self, data):
-        self.sector_breakdown = json.dumps(data)
+        self.sector_impacts = [
+            SectorImpact(
+                sector=sector,
+                gdp_impact=impacts.get('gdp_impact'),
+                employment_impact=impacts.get('employment_impact'),
+                impact_percentage=impacts.get('impact_percentage')
+            )
+            for sector, impacts in data.items()
+        ]
+        self.sector_breakdown = None
+    
+    def get_attributions(self):
+        return {attribution.indicator: attribution.to_dict() for attribution in self.attributions}
+    
+    def set_attributions(self, data):
+        self.attributions = [
+            FeatureAttribution(indicator=indicator, base_value=values['base_value'], **values['contributions'])
+            for indicator, values in (data or {}).items()
+        ]
     
     def to_dict(self):
         return {
@@ -67,19 +173,167 @@ class PolicyPrediction(db.Model):
             'unemployment_impact': self.unemployment_impact,
             'environmental_impact': self.environmental_impact,
             'sector_breakdown': self.get_sector_breakdown(),
+            'attributions': self.get_attributions(),
             'confidence_score': self.confidence_score,
             'sentiment_score': self.sentiment_score,
             'sentiment_confidence': self.sentiment_confidence,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class FeatureAttribution(db.Model):
+    """
+    How much each input moved one indicator of a prediction away from the
+    model's base value (the prediction is the base value plus the contributions)
+    """
+    __tablename__ = 'feature_attribution'
+    __table_args__ = (
+        db.UniqueConstraint('prediction_id', 'indicator', name='uq_feature_attribution_prediction_indicator'),
+    )
+    
+    # Input features, one contribution column each
+    FEATURES = ATTRIBUTION_FEATURES
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prediction_id = db.Column(db.Integer, db.ForeignKey('policy_prediction.id'), nullable=False, index=True)
+    indicator = db.Column(db.String(50), nullable=False)  # e.g. gdp_impact
+    base_value = db.Column(db.Float)  # Average model output
+    numeric_change = db.Column(db.Float)
+    time_period = db.Column(db.Float)
+    sector = db.Column(db.Float)
+    region = db.Column(db.Float)
+    
+    def to_dict(self):
+        return {
+            'base_value': self.base_value,
+            'contributions': {feature: getattr(self, feature) for feature in self.FEATURES}
+        }
+
+class SectorImpact(db.Model):
+    """Impact of a prediction on a single sector"""
+    __tablename__ = 'sector_impact'
+    __table_args__ = (
+        db.UniqueConstraint('prediction_id', 'sector', name='uq_sector_impact_prediction_sector'),
+        db.Index('ix_sector_impact_sector_gdp', 'sector', 'gdp_impact'),
+        db.Index('ix_sector_impact_sector_employment', 'sector', 'employment_impact'),
+        db.Index('ix_sector_impact_sector_share', 'sector', 'impact_percentage'),
+    )
+    
+    # Columns that can be ranked by top_policies()
+    RANKABLE_METRICS = ('gdp_impact', 'employment_impact', 'impact_percentage')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prediction_id = db.Column(db.Integer, db.ForeignKey('policy_prediction.id'), nullable=False, index=True)
+    sector = db.Column(db.String(100), nullable=False)
+    gdp_impact = db.Column(db.Float)  # Percentage change
+    employment_impact = db.Column(db.Float)  # Percentage points
+    impact_percentage = db.Column(db.Float)  # Share of the total impact
+    
+    def to_dict(self):
+        return {
+            'gdp_impact': self.gdp_impact,
+            'employment_impact': self.employment_impact,
+            'impact_percentage': self.impact_percentage
+        }
+    
+    @staticmethod
+    def top_policies(sector, metric='employment_impact', limit=20):
+        """
+        Return (Policy, SectorImpact) pairs ranked by ``metric`` within ``sector``,
+        served by the (sector, metric) index
+        """
+        if metric not in SectorImpact.RANKABLE_METRICS:
+            raise ValueError(f"Invalid metric. Must be one of: {', '.join(SectorImpact.RANKABLE_METRICS)}")
+        
+        column = getattr(SectorImpact, metric)
+        stmt = (
+            select(Policy, SectorImpact)
+            .join(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+            .join(SectorImpact, SectorImpact.prediction_id == PolicyPrediction.id)
+            .where(SectorImpact.sector == sector, column.is_not(None))
+            .order_by(desc(column))
+            .limit(limit)
+        )
+        return db.session.execute(stmt).all()
+
+class SchemaMigration(db.Model):
+    """Marker row for each data migration applied by migrations.run_migrations()"""
+    __tablename__ = 'schema_migration'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False, unique=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Job(db.Model):
+    """Background job run by the worker threads in jobs.py"""
+    __table_args__ = (
+        # Workers claim the oldest queued job first
+        db.Index('ix_job_status_created', 'status', 'created_at'),
+    )
+    
+    STATUSES = ('queued', 'running', 'succeeded', 'failed')
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    params = db.Column(Text)  # JSON
+    result = db.Column(Text)  # JSON
+    error = db.Column(Text)
+    
+    # Progress as reported by the handler
+    progress_done = db.Column(db.Integer, default=0)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(500))
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # Refreshed while running; stale jobs are requeued
+    claim_token = db.Column(db.String(32))  # Set by each claim; only that run may heartbeat or finish the job
+    finished_at = db.Column(db.DateTime)
+    
+    def get_params(self):
+        return json.loads(self.params) if self.params else {}
+    
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+    
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': {
+                'done': self.progress_done or 0,
+                'total': self.progress_total,
+                'message': self.message
+            },
+            'result': self.get_result(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
 class HistoricalPolicy(db.Model):
+    __table_args__ = (
+        # Natural key used by the dataset loader to upsert records
+        db.Index('uq_historical_policy_natural_key', 'name', 'country', 'year_implemented', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     country = db.Column(db.String(100), nullable=False)
     sector = db.Column(db.String(100), nullable=False)
     year_implemented = db.Column(db.Integer, nullable=False)
     
+    # Simulation inputs, when known (used by backtesting)
+    region = db.Column(db.String(100))
+    numeric_change = db.Column(db.Float)
+    time_period = db.Column(db.Integer)  # months over which outcomes were measured
+    
     # Actual outcomes
     actual_gdp_impact = db.Column(db.Float)
     actual_inflation_impact = db.Column(db.Float)
@@ -89,6 +343,9 @@ class HistoricalPolicy(db.Model):
     description = db.Column(Text)
     source = db.Column(db.String(500))  # Data source URL
     
+    # Last insert or upsert; lets caches such as the similarity index notice in-place updates
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -96,6 +353,9 @@ class HistoricalPolicy(db.Model):
             'country': self.country,
             'sector': self.sector,
             'year_implemented': self.year_implemented,
+            'region': self.region,
+            'numeric_change': self.numeric_change,
+            'time_period': self.time_period,
             'actual_gdp_impact': self.actual_gdp_impact,
             'actual_inflation_impact': self.actual_inflation_impact,
             'actual_unemployment_impact': self.actual_unemployment_impact,
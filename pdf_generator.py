@@ -1,16 +1,71 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.linecharts import HorizontalLineChart
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.lib.colors import HexColor
+"""
+PDF policy reports. ReportLab is imported on first use, so importing this
+module (e.g. for REPORT_TEMPLATE_VERSION) stays cheap at startup.
+"""
 from datetime import datetime
+from functools import lru_cache
 import io
 import logging
+import time
+
+import metrics
+
+# Bump whenever the report layout or wording changes; it is part of the report cache key
+REPORT_TEMPLATE_VERSION = 2
+
+@lru_cache(maxsize=1)
+def _report_styles():
+    """Build the paragraph and table styles once per process"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    styles = getSampleStyleSheet()
+    
+    def table_style(header_color, body_color, header_font_size=12, body_font_size=None, align='CENTER'):
+        commands = [
+            ('BACKGROUND', (0, 0), (-1, 0), header_color),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), align),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), body_color),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]
+        if body_font_size:
+            commands.append(('FONTSIZE', (0, 1), (-1, -1), body_font_size))
+        return TableStyle(commands)
+    
+    return {
+        'normal': styles['Normal'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.darkblue,
+            alignment=1  # Center alignment
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=colors.darkblue
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=1
+        ),
+        'policy_table': table_style(colors.grey, colors.beige, align='LEFT'),
+        'impact_table': table_style(colors.darkblue, colors.lightblue, body_font_size=10),
+        'confidence_table': table_style(colors.grey, colors.lightgrey),
+        'sector_table': table_style(colors.darkgreen, colors.lightgreen, header_font_size=10, body_font_size=9),
+    }
 
 def generate_policy_report(policy, prediction):
     """
@@ -18,33 +73,38 @@ def generate_policy_report(policy, prediction):
     """
     buffer = io.BytesIO()
     
+    try:
+        write_policy_report(policy, prediction, buffer)
+        
+        # Get the value of the BytesIO buffer
+        return buffer.getvalue()
+        
+    finally:
+        buffer.close()
+
+def write_policy_report(policy, prediction, output):
+    """
+    Render the PDF report for a policy and its predictions into a writable
+    binary file object (e.g. an open file), without an intermediate buffer
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+    
+    start = time.perf_counter()
     try:
         # Create PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=A4, 
+        doc = SimpleDocTemplate(output, pagesize=A4, 
                               rightMargin=72, leftMargin=72, 
                               topMargin=72, bottomMargin=18)
         
         # Container for the 'Flowable' objects
         elements = []
         
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.darkblue,
-            alignment=1  # Center alignment
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.darkblue
-        )
+        # Shared styles
+        report_styles = _report_styles()
+        title_style = report_styles['title']
+        heading_style = report_styles['heading']
         
         # Title Page
         elements.append(Paragraph("Policy Impact Analysis Report", title_style))
@@ -59,20 +119,11 @@ def generate_policy_report(policy, prediction):
             ['Region', policy.region],
             ['Numeric Change', f"{policy.numeric_change:+.1f}%"],
             ['Time Period', f"{policy.time_period} months"],
-            ['Analysis Date', datetime.now().strftime("%B %d, %Y")]
+            ['Analysis Date', (prediction.created_at or datetime.now()).strftime("%B %d, %Y")]
         ]
         
         policy_table = Table(policy_data, colWidths=[2*inch, 4*inch])
-        policy_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        policy_table.setStyle(report_styles['policy_table'])
         
         elements.append(policy_table)
         elements.append(Spacer(1, 20))
@@ -80,7 +131,7 @@ def generate_policy_report(policy, prediction):
         # Policy Description
         if policy.description:
             elements.append(Paragraph("Policy Description", heading_style))
-            elements.append(Paragraph(policy.description, styles['Normal']))
+            elements.append(Paragraph(policy.description, report_styles['normal']))
             elements.append(Spacer(1, 20))
         
         # Economic Impact Predictions
@@ -95,17 +146,7 @@ def generate_policy_report(policy, prediction):
         ]
         
         impact_table = Table(impact_data, colWidths=[2*inch, 1.5*inch, 2.5*inch])
-        impact_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
+        impact_table.setStyle(report_styles['impact_table'])
         
         elements.append(impact_table)
         elements.append(Spacer(1, 20))
@@ -120,25 +161,16 @@ def generate_policy_report(policy, prediction):
         ]
         
         confidence_table = Table(confidence_data, colWidths=[2*inch, 1.5*inch, 2.5*inch])
-        confidence_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        confidence_table.setStyle(report_styles['confidence_table'])
         
         elements.append(confidence_table)
         elements.append(Spacer(1, 30))
         
         # Sector-wise Breakdown
-        if prediction.get_sector_breakdown():
+        sector_breakdown = prediction.get_sector_breakdown()
+        if sector_breakdown:
             elements.append(Paragraph("Sector-wise Impact Breakdown", heading_style))
             
-            sector_breakdown = prediction.get_sector_breakdown()
             sector_data = [['Sector', 'GDP Impact (%)', 'Employment Impact (%)', 'Overall Impact (%)']]
             
             for sector, impacts in sector_breakdown.items():
@@ -150,17 +182,7 @@ def generate_policy_report(policy, prediction):
                 ])
             
             sector_table = Table(sector_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            sector_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ]))
+            sector_table.setStyle(report_styles['sector_table'])
             
             elements.append(sector_table)
             elements.append(Spacer(1, 20))
@@ -172,14 +194,14 @@ def generate_policy_report(policy, prediction):
         elements.append(Paragraph("Executive Summary", heading_style))
         
         summary_text = _generate_executive_summary(policy, prediction)
-        elements.append(Paragraph(summary_text, styles['Normal']))
+        elements.append(Paragraph(summary_text, report_styles['normal']))
         elements.append(Spacer(1, 20))
         
         # Recommendations
         elements.append(Paragraph("Recommendations", heading_style))
         recommendations = _generate_recommendations(policy, prediction)
         for rec in recommendations:
-            elements.append(Paragraph(f"• {rec}", styles['Normal']))
+            elements.append(Paragraph(f"• {rec}", report_styles['normal']))
         elements.append(Spacer(1, 20))
         
         # Methodology Note
@@ -190,32 +212,24 @@ def generate_policy_report(policy, prediction):
         economic relationships. Confidence scores reflect the certainty of predictions based on input parameters 
         and historical precedents.
         """
-        elements.append(Paragraph(methodology_text, styles['Normal']))
+        elements.append(Paragraph(methodology_text, report_styles['normal']))
         
         # Footer
         elements.append(Spacer(1, 30))
         footer_text = f"Generated by Policy Impact Simulator | {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=1
-        )
-        elements.append(Paragraph(footer_text, footer_style))
+        elements.append(Paragraph(footer_text, report_styles['footer']))
         
         # Build PDF
         doc.build(elements)
         
-        # Get the value of the BytesIO buffer
-        pdf_value = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_value
+        metrics.PDF_BUILD_SECONDS.observe(time.perf_counter() - start)
+        try:
+            metrics.PDF_SIZE_BYTES.observe(output.tell())
+        except (AttributeError, OSError):
+            pass
         
     except Exception as e:
         logging.error(f"Error generating PDF: {str(e)}")
-        buffer.close()
         raise e
 
 def _interpret_gdp(gdp_impact):
@@ -0,0 +1,235 @@
+"""
+On-demand request profiling.
+
+A request runs under cProfile when it carries a valid ``X-Profile`` token (see
+make_profile_token and ``flask profile-token``) or, with PROFILE_SAMPLE_RATE
+above zero, when it is sampled. The profile is written to PROFILE_DIR as a
+pstats file plus a JSON summary holding the request, its SQL statements with
+their timings and the slowest functions. Summaries and profiles are served by
+the /api/profiles endpoints to holders of a valid token.
+
+With no token and a zero sample rate the only per-request cost is one header
+lookup.
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, request
+
+PROFILE_HEADER = 'X-Profile'
+
+# Endpoints serving stored profiles
+ADMIN_PATH_PREFIX = '/api/profiles'
+
+# Statements recorded per profiled request
+MAX_PROFILED_QUERIES = 500
+
+# Functions listed in a profile summary
+SUMMARY_FUNCTIONS = 30
+
+DEFAULT_MAX_PROFILES = 200
+
+# SQL statements of the profiled request running on this thread
+_active = threading.local()
+
+
+def _signature(secret, expires):
+    return hmac.new(secret.encode('utf-8'), f"profile:{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def make_profile_token(secret, ttl=3600):
+    """Token valid for ``ttl`` seconds, for the X-Profile header and the admin endpoints"""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def verify_profile_token(secret, token):
+    if not secret or not token:
+        return False
+    expires, _, signature = token.partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(secret, int(expires)))
+
+
+def profile_id_valid(profile_id):
+    """Profile ids are uuid hex strings; anything else never names a file"""
+    return len(profile_id) == 32 and all(c in '0123456789abcdef' for c in profile_id)
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles"""
+
+    def __init__(self):
+        self.directory = None
+        self.secret = None
+        self.sample_rate = 0.0
+        self.max_profiles = DEFAULT_MAX_PROFILES
+        self._saved = 0
+
+    def init_app(self, app):
+        self.directory = app.config['PROFILE_DIR']
+        self.secret = app.config['PROFILING_SECRET']
+        self.sample_rate = app.config['PROFILE_SAMPLE_RATE']
+        self.max_profiles = app.config['PROFILE_MAX_FILES']
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    def authorized(self):
+        """Whether the current request carries a valid token"""
+        return verify_profile_token(self.secret, request.headers.get(PROFILE_HEADER))
+
+    def _start(self):
+        if request.path.startswith(ADMIN_PATH_PREFIX):
+            # The token doubles as the admin credential; reading profiles isn't profiled
+            return
+        if request.headers.get(PROFILE_HEADER) is not None:
+            if not self.authorized():
+                return
+            trigger = 'header'
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trigger = 'sampled'
+        else:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one cProfile can be active at a time on some Python versions
+            logging.warning(f"Skipping request profile: {str(e)}")
+            return
+        _active.queries = []
+        g.profile = (profiler, trigger, time.perf_counter(), datetime.utcnow())
+
+    def _stop(self, exc=None):
+        state = g.pop('profile', None)
+        if state is None:
+            return
+        profiler, trigger, started, started_at = state
+        profiler.disable()
+        queries = _active.__dict__.pop('queries', [])
+        duration = time.perf_counter() - started
+
+        try:
+            self._save(profiler, {
+                'path': request.path,
+                'query_string': request.query_string.decode('utf-8', 'replace'),
+                'method': request.method,
+                'endpoint': request.endpoint,
+                'trigger': trigger,
+                'error': repr(exc) if exc is not None else None,
+                'started_at': started_at.isoformat(),
+                'duration_ms': round(duration * 1000, 2),
+                'query_count': len(queries),
+                'query_ms': round(sum(q['duration_ms'] for q in queries), 2),
+                'queries': queries,
+            })
+        except Exception as e:
+            logging.error(f"Error saving request profile: {str(e)}")
+
+    def _save(self, profiler, summary):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        summary['id'] = profile_id
+
+        stats_text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(SUMMARY_FUNCTIONS)
+        summary['top_functions'] = stats_text.getvalue()
+
+        profiler.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), 'w') as f:
+            json.dump(summary, f)
+        logging.info(f"Saved profile {profile_id} for {summary['method']} {summary['path']} "
+                     f"({summary['duration_ms']} ms, {summary['query_count']} queries)")
+
+        self._saved += 1
+        if self._saved % 20 == 0:
+            self._prune()
+
+    def _prune(self):
+        """Keep only the newest ``max_profiles`` profiles"""
+        summaries = sorted(
+            (entry.stat().st_mtime, entry.name[:-5]) for entry in os.scandir(self.directory)
+            if entry.name.endswith('.json')
+        )
+        for _, profile_id in summaries[:max(0, len(summaries) - self.max_profiles)]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, f"{profile_id}{extension}"))
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self, limit=50):
+        """Newest profile summaries first, without their queries and function listings"""
+        try:
+            entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')),
+                             key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except FileNotFoundError:
+            return []
+
+        profiles = []
+        for entry in entries[:limit]:
+            summary = self.get_summary(entry.name[:-5])
+            if summary is not None:
+                summary.pop('queries', None)
+                summary.pop('top_functions', None)
+                profiles.append(summary)
+        return profiles
+
+    def get_summary(self, profile_id):
+        if not profile_id_valid(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def profile_path(self, profile_id):
+        if not profile_id_valid(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+
+request_profiler = RequestProfiler()
+
+
+def register_query_capture(engine):
+    """Record each statement run on ``engine`` by a profiled request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        if getattr(_active, 'queries', None) is not None:
+            conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        queries = getattr(_active, 'queries', None)
+        starts = conn.info.get('profile_query_start')
+        if queries is None or not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        if len(queries) < MAX_PROFILED_QUERIES:
+            queries.append({'statement': statement[:2000], 'executemany': executemany,
+                            'duration_ms': round(duration * 1000, 3)})
+
+    @event.listens_for(engine, 'handle_error')
+    def _failed_query(context):
+        starts = context.connection.info.get('profile_query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
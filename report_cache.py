@@ -0,0 +1,152 @@
+"""
+Content-addressed on-disk cache for rendered PDF reports
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from flask import current_app
+
+from pdf_generator import REPORT_TEMPLATE_VERSION, write_policy_report
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+POLICY_KEY_FIELDS = ['id', 'name', 'sector', 'region', 'numeric_change', 'time_period', 'description']
+PREDICTION_KEY_FIELDS = ['id', 'gdp_impact', 'inflation_impact', 'unemployment_impact',
+                         'environmental_impact', 'confidence_score', 'sentiment_score',
+                         'sentiment_confidence', 'created_at']
+
+
+def report_key(policy, prediction):
+    """Hash of everything that ends up in the report, plus the template version"""
+    content = {
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'policy': {field: getattr(policy, field) for field in POLICY_KEY_FIELDS},
+        'prediction': {field: getattr(prediction, field) for field in PREDICTION_KEY_FIELDS},
+        'sector_breakdown': prediction.get_sector_breakdown(),
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class PredictionSnapshot(SimpleNamespace):
+    """Detached, picklable copy of a PolicyPrediction with its sector breakdown"""
+
+    def get_sector_breakdown(self):
+        return self.sector_breakdown
+
+
+def snapshot_report(policy, prediction):
+    """Copy everything a report needs out of the ORM objects"""
+    return (
+        SimpleNamespace(**{field: getattr(policy, field) for field in POLICY_KEY_FIELDS}),
+        PredictionSnapshot(sector_breakdown=prediction.get_sector_breakdown(),
+                           **{field: getattr(prediction, field) for field in PREDICTION_KEY_FIELDS}),
+    )
+
+
+def render_report_file(directory, key, policy, prediction):
+    """
+    Render a report to ``<directory>/<key>.pdf`` and return the path.
+
+    Kept free of app and database imports so it can run in a spawned worker
+    process given plain snapshots of the policy and prediction.
+    """
+    path = os.path.join(directory, f"{key}.pdf")
+    # Render into a temporary file and rename, so readers never see a partial PDF
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_policy_report(policy, prediction, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+class ReportCache:
+    """
+    Rendered PDFs stored as ``<key>.pdf`` files. Hits refresh the file's mtime,
+    and the least recently used files are evicted once the directory grows past
+    ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        """Return the cached file path for ``key``, or None"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def contains(self, policy, prediction):
+        return os.path.exists(self.path_for(report_key(policy, prediction)))
+
+    def get_or_render(self, policy, prediction):
+        """Return (path, key) for the report, rendering it into the cache on a miss"""
+        key = report_key(policy, prediction)
+        path = self.get(key)
+        if path:
+            return path, key
+
+        path = render_report_file(self.directory, key, policy, prediction)
+        self.evict()
+        return path, key
+
+    def evict(self):
+        """Delete least recently used reports until the cache fits in ``max_bytes``"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.pdf'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            removed = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+
+            logging.info("Evicted %d cached reports (cache now %d bytes)", removed, total)
+
+
+_report_cache = None
+
+
+def get_report_cache():
+    """Return the process-wide report cache configured from the app config"""
+    global _report_cache
+    if _report_cache is None:
+        _report_cache = ReportCache(
+            current_app.config['REPORT_CACHE_DIR'],
+            current_app.config['REPORT_CACHE_MAX_BYTES']
+        )
+    return _report_cache
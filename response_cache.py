@@ -0,0 +1,300 @@
+"""
+Response cache for pages and API responses that only change when policies,
+predictions or historical data are written.
+
+Entries are keyed by path and query string and tagged with the code build and
+a data generation. The generation is an integer in a small file that every
+process increments (under a file lock, replacing the file atomically) after
+committing a write to a tracked model, so a write in any worker invalidates
+every cached response at once. The build is a fingerprint of the application
+source and templates, so a deploy invalidates cached pages without every
+process start having to. Responses carry a weak ETag derived from both,
+letting browsers and proxies revalidate with a cheap 304.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps from concurrent processes may collapse into one
+    fcntl = None
+
+from flask import request, session, current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import metrics
+from models import Policy, PolicyPrediction, SectorImpact, HistoricalPolicy
+
+# Writes to these models invalidate every cached response
+TRACKED_MODELS = (Policy, PolicyPrediction, SectorImpact, HistoricalPolicy)
+
+# Response headers stored with a cached entry
+CACHED_HEADERS = ('Content-Type',)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_DISK_MAX_ENTRIES = 2000
+
+# Application files whose contents shape cached responses, relative to the app root
+BUILD_PATTERNS = ('.py', '.html')
+
+
+def build_fingerprint(root):
+    """Short hash of the size and mtime of every source and template file under ``root``"""
+    parts = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(name for name in subdirs if not name.startswith(('.', '__')) and name != 'instance')
+        for name in sorted(files):
+            if name.endswith(BUILD_PATTERNS):
+                stat = os.stat(os.path.join(directory, name))
+                parts.append(f"{os.path.relpath(os.path.join(directory, name), root)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:8]
+
+
+class ResponseCache:
+    """In-process LRU of rendered responses with an optional on-disk second tier"""
+
+    def __init__(self):
+        self.max_entries = DEFAULT_MAX_ENTRIES
+        self.disk_dir = None
+        self.disk_max_entries = DEFAULT_DISK_MAX_ENTRIES
+        self.generation_file = None
+        self.build = ''
+        self.enabled = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'not_modified': 0,
+                         'stores': 0, 'evictions': 0, 'bypassed': 0}
+
+    def init_app(self, app):
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+        self.disk_dir = app.config['RESPONSE_CACHE_DIR']
+        self.generation_file = app.config['RESPONSE_CACHE_GENERATION_FILE']
+        self.build = app.config['RESPONSE_CACHE_BUILD'] or build_fingerprint(app.root_path)
+        os.makedirs(os.path.dirname(self.generation_file), exist_ok=True)
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    # Generation
+
+    def generation(self):
+        try:
+            with open(self.generation_file, 'rb') as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, TypeError, ValueError):
+            return 0
+
+    def bump(self):
+        """Invalidate every cached response in every process"""
+        if not self.generation_file:
+            return
+        # Readers never lock: they see either the old or the new file. The lock
+        # (on a sidecar file, since the counter file itself is replaced) only
+        # serializes concurrent bumps so none is lost.
+        lock_fd = os.open(f"{self.generation_file}.lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            generation = self.generation() + 1
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.generation_file), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(str(generation))
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.generation_file)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        finally:
+            os.close(lock_fd)
+        with self._lock:
+            self._entries.clear()
+
+    def version(self):
+        """Build and data generation a cached response is valid for"""
+        return f"{self.build}-{self.generation()}"
+
+    # Storage
+
+    def record(self, name):
+        with self._lock:
+            self.counters[name] += 1
+        metrics.RESPONSE_CACHE_EVENTS.inc(event=name)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+        if entry is not None:
+            metrics.RESPONSE_CACHE_EVENTS.inc(event='hits')
+            return entry
+
+        entry = self._disk_get(key)
+        if entry is not None:
+            self.record('disk_hits')
+            self._memory_set(key, entry)
+            return entry
+
+        self.record('misses')
+        return None
+
+    def set(self, key, entry):
+        self._memory_set(key, entry)
+        self._disk_set(key, entry)
+        self.record('stores')
+
+    def _memory_set(self, key, entry):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.counters['evictions'] += evicted
+        if evicted:
+            metrics.RESPONSE_CACHE_EVENTS.inc(evicted, event='evictions')
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pickle")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable response cache file: {str(e)}")
+            return None
+
+    def _disk_set(self, key, entry):
+        if not self.disk_dir:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop entries from older generations, then the oldest past disk_max_entries"""
+        prefix = f"{self.version()}-"
+        current = []
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith('.pickle'):
+                continue
+            if entry.name.startswith(prefix):
+                current.append((entry.stat().st_mtime, entry.path))
+            else:
+                os.remove(entry.path)
+
+        current.sort()
+        for _, path in current[:max(0, len(current) - self.disk_max_entries)]:
+            os.remove(path)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            entries = len(self._entries)
+        lookups = counters['hits'] + counters['disk_hits'] + counters['misses']
+        counters.update({
+            'enabled': self.enabled,
+            'build': self.build,
+            'generation': self.generation(),
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'disk_tier': bool(self.disk_dir),
+            'hit_ratio': round((counters['hits'] + counters['disk_hits']) / lookups, 4) if lookups else None,
+        })
+        return counters
+
+
+response_cache = ResponseCache()
+
+
+def _request_key():
+    # Argument names are sorted but repeated values keep their order (/compare depends on it)
+    query = '&'.join(f"{name}={value}" for name, values in sorted(request.args.lists()) for value in values)
+    return hashlib.sha256(f"{request.path}?{query}".encode('utf-8')).hexdigest()[:32]
+
+
+def cached_response(view):
+    """
+    Serve a GET view from the response cache, with ETag revalidation.
+
+    Requests with pending flash messages bypass the cache, since the page shows
+    (and consumes) them; so do non-200 responses and ones that modify the session.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled or request.method != 'GET' or session.get('_flashes'):
+            response_cache.record('bypassed')
+            return view(*args, **kwargs)
+
+        key = f"{response_cache.version()}-{_request_key()}"
+        max_age = current_app.config['RESPONSE_CACHE_MAX_AGE']
+
+        # Content only changes with the build and generation, so the key doubles as the ETag
+        if request.if_none_match.contains_weak(key):
+            response_cache.record('not_modified')
+            response = current_app.response_class(status=304)
+        else:
+            entry = response_cache.get(key)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough or session.modified:
+                    return response
+                entry = (response.get_data(), [(name, response.headers[name])
+                                               for name in CACHED_HEADERS if name in response.headers])
+                response_cache.set(key, entry)
+            body, headers = entry
+            response = current_app.response_class(body, headers=headers)
+
+        response.set_etag(key, weak=True)
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, must-revalidate'
+        return response
+
+    return wrapper
+
+
+# Generation tracking: committed writes to tracked models bump the generation
+
+@event.listens_for(Session, 'after_flush')
+def _track_writes(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, TRACKED_MODELS):
+            session.info['response_cache_dirty'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    if session.info.pop('response_cache_dirty', False):
+        response_cache.bump()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _clear_after_rollback(session, previous_transaction):
+    session.info.pop('response_cache_dirty', None)
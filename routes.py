@@ -1,14 +1,60 @@
-from flask import render_template, request, flash, redirect, url_for, jsonify, send_file
+from flask import render_template, request, flash, redirect, url_for, jsonify, send_file, Response, stream_with_context, abort
 from app import app, db
-from models import Policy, PolicyPrediction, HistoricalPolicy
-from ml_models import PolicyImpactPredictor
-from pdf_generator import generate_policy_report
+from models import Policy, PolicyPrediction, SectorImpact, Job
+from report_cache import get_report_cache
 from data_processor import load_historical_data
+from similarity import similar_policy_index
+from search import search, DEFAULT_PER_PAGE
+from comparison import (MAX_COMPARE_POLICIES, parse_policy_ids, load_comparison,
+                        compute_comparison_stats, comparison_to_dict)
+from exporter import EXPORT_FORMATS, iter_export_rows, iter_csv, iter_jsonl
+from bulk_reports import parse_report_filters, select_report_targets, get_report_pool, iter_report_zip
+from jobs import job_queue, iter_job_events
+from simulation import MAX_SIMULATION_BATCH, simulate_policies, warm_up_predictor
+from validation import normalize_simulation, normalize_simulations
+from serialization import iter_json_array
+from response_cache import response_cache, cached_response
+from coalescing import prediction_flight
+from drilldown import INDICATORS, state_drilldown, drilldown_scale
+import metrics
+from profiling import request_profiler
 import logging
-import io
+import os
+from datetime import datetime
+from sqlalchemy import select, func
 
-# Initialize the ML predictor
-predictor = PolicyImpactPredictor()
+# Policies per page of the dashboard table (search results use the same page size)
+DASHBOARD_PER_PAGE = 50
+
+@app.before_request
+def start_background_workers():
+    """Start this process's job workers, and the ML model warm-up, with its first request"""
+    job_queue.start(app)
+    if app.config['ML_WARMUP']:
+        warm_up_predictor(app)
+
+def wants_async(size=0, threshold=None):
+    """
+    Whether to queue work as a background job: ?async=1 forces it, ?async=0
+    prevents it, otherwise work larger than ``threshold`` is queued
+    """
+    flag = request.args.get('async')
+    if flag is not None:
+        return flag.lower() in ('1', 'true', 'yes')
+    return threshold is not None and size > threshold
+
+def job_accepted(job):
+    """202 response pointing the client at the job's status, events and result"""
+    payload = job.to_dict()
+    payload['links'] = {
+        'status': url_for('job_status', job_id=job.id),
+        'events': url_for('job_events', job_id=job.id),
+        'result': url_for('job_result', job_id=job.id)
+    }
+    response = jsonify(payload)
+    response.status_code = 202
+    response.headers['Location'] = payload['links']['status']
+    return response
 
 @app.route('/')
 def index():
@@ -17,19 +63,49 @@ def index():
     return render_template('index.html', recent_policies=recent_policies)
 
 @app.route('/dashboard')
+@cached_response
 def dashboard():
-    """Dashboard showing overview of all policies and predictions"""
-    policies = Policy.query.order_by(Policy.created_at.desc()).all()
-    total_policies = len(policies)
+    """Dashboard showing overview of all policies and predictions, one page of the table at a time"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    sector = request.args.get('sector') or None
+    policy_summaries, has_next = Policy.summary_page(page, DASHBOARD_PER_PAGE, sector)
+    
+    total_policies = db.session.execute(select(func.count(Policy.id))).scalar()
+    
+    # Average impacts over every prediction, with missing values counted as 0
+    averages = db.session.execute(
+        select(*[func.coalesce(func.avg(func.coalesce(column, 0)), 0)
+                 for column in (PolicyPrediction.gdp_impact,
+                                PolicyPrediction.inflation_impact,
+                                PolicyPrediction.unemployment_impact)])
+    ).one()
+    avg_gdp_impact, avg_inflation_impact, avg_unemployment_impact = averages
     
-    # Calculate average impacts
-    predictions = PolicyPrediction.query.all()
-    avg_gdp_impact = sum(p.gdp_impact or 0 for p in predictions) / len(predictions) if predictions else 0
-    avg_inflation_impact = sum(p.inflation_impact or 0 for p in predictions) / len(predictions) if predictions else 0
-    avg_unemployment_impact = sum(p.unemployment_impact or 0 for p in predictions) / len(predictions) if predictions else 0
+    # Chart data over all policies: policies per sector, and average first-prediction impacts
+    sector_counts = dict(db.session.execute(
+        select(Policy.sector, func.count(Policy.id)).group_by(Policy.sector).order_by(Policy.sector)
+    ).all())
+    first_prediction_ids = select(func.min(PolicyPrediction.id)).group_by(PolicyPrediction.policy_id)
+    first_averages = db.session.execute(
+        select(func.count(PolicyPrediction.id),
+               *[func.avg(func.coalesce(column, 0))
+                 for column in (PolicyPrediction.gdp_impact,
+                                PolicyPrediction.inflation_impact,
+                                PolicyPrediction.unemployment_impact)])
+        .where(PolicyPrediction.id.in_(first_prediction_ids))
+    ).one()
+    chart_data = {
+        'sector_counts': sector_counts,
+        'average_impacts': list(first_averages[1:]) if first_averages[0] else None,
+    }
     
     return render_template('dashboard.html', 
-                         policies=policies,
+                         policy_summaries=policy_summaries,
+                         page=page,
+                         per_page=DASHBOARD_PER_PAGE,
+                         has_next=has_next,
+                         sector=sector,
+                         chart_data=chart_data,
                          total_policies=total_policies,
                          avg_gdp_impact=avg_gdp_impact,
                          avg_inflation_impact=avg_inflation_impact,
@@ -40,55 +116,17 @@ def simulate_policy():
     """Handle policy simulation request"""
     try:
         # Extract form data
-        policy_name = request.form.get('policy_name')
-        sector = request.form.get('sector')
-        region = request.form.get('region')
-        numeric_change = float(request.form.get('numeric_change', 0))
-        time_period = int(request.form.get('time_period', 12))
-        description = request.form.get('description', '')
+        policy_data = normalize_simulation({
+            'name': request.form.get('policy_name'),
+            'sector': request.form.get('sector'),
+            'region': request.form.get('region'),
+            'numeric_change': request.form.get('numeric_change', 0),
+            'time_period': request.form.get('time_period', 12),
+            'description': request.form.get('description', '')
+        })
         
-        # Validate inputs
-        if not all([policy_name, sector, region]):
-            flash('Please fill in all required fields.', 'error')
-            return redirect(url_for('index'))
-        
-        # Create new policy record
-        policy = Policy(
-            name=policy_name,
-            sector=sector,
-            region=region,
-            numeric_change=numeric_change,
-            time_period=time_period,
-            description=description
-        )
-        
-        db.session.add(policy)
-        db.session.commit()
-        
-        # Generate predictions using ML model
-        prediction_data = predictor.predict_impact(
-            sector=sector,
-            numeric_change=numeric_change,
-            time_period=time_period,
-            region=region
-        )
-        
-        # Create prediction record
-        prediction = PolicyPrediction(
-            policy_id=policy.id,
-            gdp_impact=prediction_data['gdp_impact'],
-            inflation_impact=prediction_data['inflation_impact'],
-            unemployment_impact=prediction_data['unemployment_impact'],
-            environmental_impact=prediction_data['environmental_impact'],
-            confidence_score=prediction_data['confidence_score'],
-            sentiment_score=prediction_data.get('sentiment_score', 0),
-            sentiment_confidence=prediction_data.get('sentiment_confidence', 0)
-        )
-        
-        prediction.set_sector_breakdown(prediction_data['sector_breakdown'])
-        
-        db.session.add(prediction)
-        db.session.commit()
+        # Predict, then save the policy and its prediction in one transaction
+        [(policy, prediction)] = simulate_policies([policy_data])
         
         flash('Policy simulation completed successfully!', 'success')
         return redirect(url_for('view_results', policy_id=policy.id))
@@ -101,7 +139,48 @@ def simulate_policy():
         flash('An error occurred during simulation. Please try again.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/api/simulate', methods=['POST'])
+def simulate_policy_api():
+    """
+    JSON simulation endpoint. Accepts one policy object or an array of them and
+    returns the saved policies with their predictions.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({'error': 'Request body must be JSON'}), 400
+    
+    is_batch = isinstance(data, list)
+    items = data if is_batch else [data]
+    if not items:
+        return jsonify({'error': 'No simulations given'}), 400
+    if len(items) > MAX_SIMULATION_BATCH:
+        return jsonify({'error': f'At most {MAX_SIMULATION_BATCH} simulations per request'}), 400
+    
+    inputs, errors = normalize_simulations(items)
+    if errors:
+        return jsonify({'error': 'Invalid input', 'errors': errors}), 400
+    
+    if is_batch and wants_async(len(inputs), app.config['SIMULATE_BATCH_INLINE_MAX']):
+        return job_accepted(job_queue.submit('simulate_batch', {'policies': inputs}))
+    
+    try:
+        results = simulate_policies(inputs)
+    except Exception as e:
+        logging.error(f'Error in simulate_policy_api: {str(e)}')
+        return jsonify({'error': 'An error occurred during simulation'}), 500
+    
+    payload = [
+        {
+            'policy': policy.to_dict(),
+            'prediction': prediction.to_dict(),
+            'results_url': url_for('view_results', policy_id=policy.id)
+        }
+        for policy, prediction in results
+    ]
+    return jsonify({'results': payload} if is_batch else payload[0]), 201
+
 @app.route('/results/<int:policy_id>')
+@cached_response
 def view_results(policy_id):
     """View simulation results for a specific policy"""
     policy = Policy.query.get_or_404(policy_id)
@@ -111,8 +190,8 @@ def view_results(policy_id):
         flash('No prediction found for this policy.', 'error')
         return redirect(url_for('dashboard'))
     
-    # Find similar historical policies
-    similar_policies = HistoricalPolicy.query.filter_by(sector=policy.sector).limit(3).all()
+    # Rank historical policies by similarity to this policy and its predicted impacts
+    similar_policies = similar_policy_index.similar_to_prediction(policy, prediction, k=3)
     
     return render_template('results.html', 
                          policy=policy, 
@@ -120,25 +199,41 @@ def view_results(policy_id):
                          similar_policies=similar_policies)
 
 @app.route('/compare')
+@cached_response
 def compare_policies():
     """Compare multiple policies"""
-    policy_ids = request.args.getlist('policies')
+    policy_ids = parse_policy_ids(request.args.getlist('policies'))
     
     if len(policy_ids) < 2:
         flash('Please select at least 2 policies to compare.', 'error')
         return redirect(url_for('dashboard'))
     
-    policies_data = []
-    for policy_id in policy_ids:
-        policy = Policy.query.get(policy_id)
-        if policy:
-            prediction = PolicyPrediction.query.filter_by(policy_id=policy_id).first()
-            policies_data.append({
-                'policy': policy,
-                'prediction': prediction
-            })
+    if len(policy_ids) > MAX_COMPARE_POLICIES:
+        flash(f'Please select at most {MAX_COMPARE_POLICIES} policies to compare.', 'error')
+        return redirect(url_for('dashboard'))
+    
+    policies_data = load_comparison(policy_ids)
+    stats = compute_comparison_stats([data['prediction'] for data in policies_data])
+    comparison = comparison_to_dict(policies_data, stats)
+    
+    for data, summary in zip(policies_data, comparison['policies']):
+        data['stats'] = summary['stats']
+    
+    return render_template('comparison.html', policies_data=policies_data, comparison=comparison)
+
+@app.route('/api/compare')
+@cached_response
+def compare_policies_data():
+    """API endpoint with comparison statistics for charts"""
+    policy_ids = parse_policy_ids(request.args.getlist('policies'))
+    
+    if len(policy_ids) < 2 or len(policy_ids) > MAX_COMPARE_POLICIES:
+        return jsonify({'error': f'Select between 2 and {MAX_COMPARE_POLICIES} policies'}), 400
+    
+    policies_data = load_comparison(policy_ids)
+    stats = compute_comparison_stats([data['prediction'] for data in policies_data])
     
-    return render_template('comparison.html', policies_data=policies_data)
+    return jsonify(comparison_to_dict(policies_data, stats))
 
 @app.route('/export_pdf/<int:policy_id>')
 def export_pdf(policy_id):
@@ -150,16 +245,23 @@ def export_pdf(policy_id):
         flash('No prediction found for this policy.', 'error')
         return redirect(url_for('dashboard'))
     
+    # Clients that can poll may have uncached reports rendered in the background
+    if wants_async() and not get_report_cache().contains(policy, prediction):
+        return job_accepted(job_queue.submit('policy_report', {'policy_id': policy_id}))
+    
     try:
-        # Generate PDF report
-        pdf_buffer = generate_policy_report(policy, prediction)
+        # Render into the content-addressed cache (or reuse an earlier rendering)
+        pdf_path, report_key = get_report_cache().get_or_render(policy, prediction)
         
-        # Return PDF as download
+        # Serve the cached file directly; conditional requests get a 304
         return send_file(
-            io.BytesIO(pdf_buffer),
+            pdf_path,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'policy_report_{policy.name.replace(" ", "_")}.pdf'
+            download_name=f'policy_report_{policy.name.replace(" ", "_")}.pdf',
+            etag=report_key,
+            last_modified=prediction.created_at,
+            conditional=True
         )
         
     except Exception as e:
@@ -167,7 +269,52 @@ def export_pdf(policy_id):
         flash('Error generating PDF report. Please try again.', 'error')
         return redirect(url_for('view_results', policy_id=policy_id))
 
+@app.route('/api/reports/bulk')
+def export_reports_bulk():
+    """Stream a ZIP of PDF reports for every policy matching the filters"""
+    raw_filters = {
+        'sector': request.args.get('sector'),
+        'region': request.args.get('region'),
+        'date_from': request.args.get('date_from'),
+        'date_to': request.args.get('date_to'),
+        'ids': request.args.getlist('ids')
+    }
+    try:
+        targets = select_report_targets(**parse_report_filters(**raw_filters))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not targets:
+        return jsonify({'error': 'No policies with predictions match the filters'}), 404
+    
+    if wants_async(len(targets), app.config['BULK_REPORTS_INLINE_MAX']):
+        return job_accepted(job_queue.submit('bulk_reports', raw_filters))
+    
+    def log_progress(done, total):
+        logging.info(f'Bulk report export: {done}/{total} reports')
+    
+    chunks = iter_report_zip(targets, get_report_cache(), get_report_pool(app.config['REPORT_WORKERS']),
+                             progress=log_progress)
+    filename = f'policy_reports_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.zip'
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            # Lets clients show progress against the number of reports in the archive
+            'X-Report-Count': str(len(targets))
+        }
+    )
+
+@app.route('/api/policies')
+def list_policies():
+    """Stream every policy with its first prediction as one JSON array"""
+    summaries = Policy.iter_summaries(sector=request.args.get('sector') or None)
+    return Response(stream_with_context(iter_json_array(summaries)), mimetype='application/json')
+
 @app.route('/api/policy_data/<int:policy_id>')
+@cached_response
 def get_policy_data(policy_id):
     """API endpoint to get policy data for charts"""
     policy = Policy.query.get_or_404(policy_id)
@@ -181,6 +328,178 @@ def get_policy_data(policy_id):
         'prediction': prediction.to_dict()
     })
 
+@app.route('/api/policy_data/<int:policy_id>/states')
+@cached_response
+def get_state_drilldown(policy_id):
+    """API endpoint spreading a policy's prediction across states, for the results page heatmap"""
+    row = db.session.execute(
+        select(Policy.sector, Policy.region, PolicyPrediction.id,
+               *(getattr(PolicyPrediction, indicator) for indicator in INDICATORS))
+        .join(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+        .where(Policy.id == policy_id)
+        .order_by(PolicyPrediction.id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return jsonify({'error': 'No prediction found'}), 404
+    
+    sector, region, prediction_id, *impacts = row
+    states = state_drilldown(prediction_id, sector, region, impacts)
+    return jsonify({
+        'policy_id': policy_id,
+        'sector': sector,
+        'region': region,
+        'indicators': list(INDICATORS),
+        'scale': drilldown_scale(states),
+        'states': states
+    })
+
+@app.route('/api/sector_impacts/<sector>')
+def top_sector_impacts(sector):
+    """API endpoint ranking policies by their impact on a single sector"""
+    metric = request.args.get('metric', 'employment_impact')
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    try:
+        ranked = SectorImpact.top_policies(sector, metric=metric, limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'sector': sector,
+        'metric': metric,
+        'policies': [
+            {'policy': policy.to_dict(), 'sector_impact': impact.to_dict()}
+            for policy, impact in ranked
+        ]
+    })
+
+@app.route('/api/search')
+def search_policies():
+    """API endpoint for ranked full-text search over policies or historical policies"""
+    try:
+        results = search(
+            request.args.get('q', ''),
+            scope=request.args.get('scope', 'policies'),
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', DEFAULT_PER_PAGE, type=int),
+            sector=request.args.get('sector') or None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(results)
+
+@app.route('/api/export/<export_format>')
+def export_policies(export_format):
+    """Stream every policy with its predictions as CSV or JSON Lines"""
+    encoders = {'csv': iter_csv, 'jsonl': iter_jsonl}
+    if export_format not in encoders:
+        abort(404)
+    
+    if wants_async():
+        return job_accepted(job_queue.submit('export', {'format': export_format}))
+    
+    chunks = encoders[export_format](iter_export_rows())
+    filename = f'policies_export_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.{export_format}'
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a background job: {"kind": ..., "params": {...}}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        job = job_queue.submit(data.get('kind'), data.get('params') or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return job_accepted(job)
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Current status and progress of a background job"""
+    return jsonify(db.get_or_404(Job, job_id).to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of a job's progress until it finishes"""
+    db.get_or_404(Job, job_id)
+    
+    return Response(
+        stream_with_context(iter_job_events(job_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    """Download a finished job's result file, or its JSON result"""
+    job = db.get_or_404(Job, job_id)
+    
+    if job.status != 'succeeded':
+        error = job.error if job.status == 'failed' else 'Job has not finished'
+        return jsonify({'error': error, 'job': job.to_dict()}), 409
+    
+    result = job.get_result() or {}
+    if 'file' not in result:
+        return jsonify(result)
+    if not os.path.exists(result['file']):
+        return jsonify({'error': 'Result file has expired'}), 410
+    
+    return send_file(
+        result['file'],
+        mimetype=result.get('mimetype'),
+        as_attachment=True,
+        download_name=result['filename'],
+        conditional=True
+    )
+
+@app.route('/api/cache/stats')
+def response_cache_stats():
+    """Response cache and prediction coalescing counters for this process"""
+    stats = response_cache.stats()
+    stats['prediction_coalescing'] = prediction_flight.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, prediction, query and report metrics in the Prometheus text format"""
+    return Response(metrics.render_text(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/profiles')
+def list_profiles():
+    """Recent request profiles (requires a valid X-Profile token)"""
+    if not request_profiler.authorized():
+        abort(404)
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({'profiles': request_profiler.list_profiles(limit)})
+
+@app.route('/api/profiles/<profile_id>')
+def get_profile(profile_id):
+    """One profile's summary: request, SQL timings and slowest functions"""
+    if not request_profiler.authorized():
+        abort(404)
+    summary = request_profiler.get_summary(profile_id)
+    if summary is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(summary)
+
+@app.route('/api/profiles/<profile_id>/download')
+def download_profile(profile_id):
+    """The raw pstats file, for snakeviz or ``python -m pstats``"""
+    if not request_profiler.authorized():
+        abort(404)
+    path = request_profiler.profile_path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'profile_{profile_id}.prof')
+
 @app.route('/load_sample_data')
 def load_sample_data():
     """Load sample historical policy data"""
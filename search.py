@@ -0,0 +1,184 @@
+"""
+Full-text search over policies and historical policies.
+
+SQLite uses external-content FTS5 tables kept in sync by triggers; PostgreSQL
+uses a generated tsvector column with a GIN index. Other backends (or SQLite
+builds without FTS5) fall back to case-insensitive LIKE matching.
+"""
+import logging
+import re
+import weakref
+
+from sqlalchemy import text, or_
+
+from app import db
+from models import Policy, HistoricalPolicy
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# scope -> (model, indexed table); name is weighted above description in ranking
+SEARCH_SCOPES = {
+    'policies': (Policy, 'policy'),
+    'historical': (HistoricalPolicy, 'historical_policy'),
+}
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# engine -> search backend, so the compile-option check runs once per engine
+_backends = weakref.WeakKeyDictionary()
+
+
+def _tokens(query):
+    return _TOKEN_PATTERN.findall(query.lower())[:16]
+
+
+def _fts5_available(engine):
+    try:
+        with engine.connect() as connection:
+            return bool(connection.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+    except Exception:
+        return False
+
+
+def search_backend():
+    """Return 'fts5', 'tsvector' or 'like' for the configured database"""
+    engine = db.engine
+    backend = _backends.get(engine)
+    if backend is None:
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            backend = 'tsvector'
+        elif dialect == 'sqlite' and _fts5_available(engine):
+            backend = 'fts5'
+        else:
+            backend = 'like'
+        _backends[engine] = backend
+    return backend
+
+
+def _create_fts5_index(table):
+    fts = f"{table}_fts"
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"name, description, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name, description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        # Index rows that existed before the triggers
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+
+
+def _create_tsvector_index(table):
+    statements = [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)",
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+
+
+def create_search_indexes():
+    """Create the full-text indexes for every scope (idempotent)"""
+    backend = search_backend()
+    for _, table in SEARCH_SCOPES.values():
+        if backend == 'fts5':
+            _create_fts5_index(table)
+        elif backend == 'tsvector':
+            _create_tsvector_index(table)
+    db.session.commit()
+    logging.info("Full-text search backend: %s", backend)
+
+
+def _ranked_ids(table, tokens, backend, sector, limit, offset):
+    """Return [(id, rank)] best first, using the backend's native ranking"""
+    params = {'limit': limit, 'offset': offset, 'sector': sector}
+    sector_clause = "AND t.sector = :sector" if sector else ""
+
+    if backend == 'fts5':
+        params['match'] = ' '.join(f'"{token}"*' for token in tokens)
+        sql = (
+            f"SELECT t.id, bm25({table}_fts, 10.0, 1.0) AS rank "
+            f"FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid "
+            f"WHERE {table}_fts MATCH :match {sector_clause} "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+        # bm25() is lower-is-better; negate so callers always see higher-is-better
+        return [(row_id, -rank) for row_id, rank in db.session.execute(text(sql), params)]
+
+    params['tsquery'] = ' & '.join(f"{token}:*" for token in tokens)
+    sql = (
+        f"SELECT t.id, ts_rank_cd(t.search_vector, q) AS rank "
+        f"FROM {table} t, to_tsquery('english', :tsquery) q "
+        f"WHERE t.search_vector @@ q {sector_clause} "
+        f"ORDER BY rank DESC, t.id LIMIT :limit OFFSET :offset"
+    )
+    return [tuple(row) for row in db.session.execute(text(sql), params)]
+
+
+def _like_ids(model, tokens, sector, limit, offset):
+    query = db.session.query(model.id)
+    for token in tokens:
+        pattern = f"%{token}%"
+        query = query.filter(or_(model.name.ilike(pattern), model.description.ilike(pattern)))
+    if sector:
+        query = query.filter(model.sector == sector)
+    rows = query.order_by(model.id.desc()).limit(limit).offset(offset).all()
+    return [(row_id, None) for (row_id,) in rows]
+
+
+def search(query, scope='policies', page=1, per_page=DEFAULT_PER_PAGE, sector=None):
+    """
+    Ranked, paginated full-text search.
+
+    Returns a dict with the page of results (each the record's ``to_dict()`` plus
+    ``rank``, and for policies their first prediction as ``predictions``) and
+    ``has_next``; totals are not counted so deep result sets stay cheap.
+    """
+    if scope not in SEARCH_SCOPES:
+        raise ValueError(f"Invalid scope. Must be one of: {', '.join(SEARCH_SCOPES)}")
+
+    model, table = SEARCH_SCOPES[scope]
+    page = max(page, 1)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    tokens = _tokens(query or '')
+
+    response = {'query': query, 'scope': scope, 'page': page, 'per_page': per_page,
+                'results': [], 'has_next': False}
+    if not tokens:
+        return response
+
+    backend = search_backend()
+    # Fetch one extra row to learn whether another page exists
+    limit, offset = per_page + 1, (page - 1) * per_page
+    if backend == 'like':
+        ranked = _like_ids(model, tokens, sector, limit, offset)
+    else:
+        ranked = _ranked_ids(table, tokens, backend, sector, limit, offset)
+
+    response['has_next'] = len(ranked) > per_page
+    ranked = ranked[:per_page]
+
+    ids = [i for i, _ in ranked]
+    records = {record.id: record for record in model.query.filter(model.id.in_(ids))}
+    # Policies carry their first prediction, as in the dashboard table
+    summaries = Policy.summaries_for(ids) if model is Policy else {}
+    for row_id, rank in ranked:
+        if row_id in records:
+            result = records[row_id].to_dict()
+            if row_id in summaries:
+                result['predictions'] = summaries[row_id]['predictions']
+            result['rank'] = rank
+            response['results'].append(result)
+
+    response['backend'] = backend
+    return response
@@ -0,0 +1,169 @@
+"""
+Synthetic data seeder for scale testing.
+
+Policies are variations of the SAMPLE_INDIAN_POLICIES templates spread across
+the REGIONAL_INDICATORS regions. Each policy gets one prediction derived from
+SECTOR_COEFFICIENTS and the region's indicators, plus a sector impact row per
+sector shaped by SECTOR_DEPENDENCIES. Whole batches are generated as NumPy
+arrays and written with one bulk insert per table (COPY on PostgreSQL).
+"""
+import csv
+import io
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, select, text
+
+from app import db
+from models import Policy, PolicyPrediction, SectorImpact
+from data.reference import (REGION_IDS, REGIONS, SECTOR_DEPENDENCIES, SECTOR_IDS, SECTORS, region_column,
+                            sector_column)
+from data.indian_policy_examples import SAMPLE_INDIAN_POLICIES
+from response_cache import response_cache
+
+SEED_BATCH_SIZE = 20000
+
+POLICY_COLUMNS = ['id', 'name', 'sector', 'region', 'numeric_change', 'time_period', 'description', 'created_at']
+PREDICTION_COLUMNS = ['id', 'policy_id', 'gdp_impact', 'inflation_impact', 'unemployment_impact',
+                      'environmental_impact', 'confidence_score', 'sentiment_score', 'sentiment_confidence',
+                      'created_at']
+SECTOR_IMPACT_COLUMNS = ['prediction_id', 'sector', 'gdp_impact', 'employment_impact', 'impact_percentage']
+
+# Share of policies placed in their template's own region; the rest are spread by responsiveness
+TEMPLATE_REGION_SHARE = 0.5
+
+# Template sector and region ids
+_TEMPLATE_SECTORS = np.array([SECTOR_IDS[p['sector']] for p in SAMPLE_INDIAN_POLICIES])
+_TEMPLATE_REGIONS = np.array([REGION_IDS[p['region']] for p in SAMPLE_INDIAN_POLICIES])
+
+
+def generate_batch(rng, start_id, count, created_from, created_days):
+    """
+    Return (policies, predictions, sector_impacts) as lists of row tuples for
+    ``count`` policies with ids from ``start_id`` (predictions share the ids),
+    created within ``created_days`` days after the ``created_from`` datetime
+    """
+    ids = np.arange(start_id, start_id + count)
+    templates = rng.integers(len(SAMPLE_INDIAN_POLICIES), size=count)
+    template_sector = _TEMPLATE_SECTORS[templates]
+    template_region = _TEMPLATE_REGIONS[templates]
+    template_change = np.array([p['numeric_change'] for p in SAMPLE_INDIAN_POLICIES])[templates]
+    template_period = np.array([p['time_period'] for p in SAMPLE_INDIAN_POLICIES])[templates]
+
+    responsiveness = region_column('policy_responsiveness')
+    region = np.where(rng.random(count) < TEMPLATE_REGION_SHARE, template_region,
+                      rng.choice(len(REGIONS), size=count, p=responsiveness / responsiveness.sum()))
+    sector = template_sector
+    numeric_change = np.clip(template_change * rng.normal(1.0, 0.35, count), -50, 50).round(1)
+    time_period = np.clip(template_period + rng.integers(-12, 13, count), 1, 60)
+    created_offsets = rng.random(count) * created_days * 86400
+
+    # Impacts scale with the sector's coefficients and the region's stability and responsiveness
+    stability = region_column('economic_stability')[region]
+    response = responsiveness[region]
+    gdp = numeric_change * sector_column('gdp_elasticity')[sector] * response * 0.1 + rng.normal(0, 0.2, count)
+    inflation = (np.abs(numeric_change) * sector_column('inflation_impact')[sector] * 0.1 * stability
+                 + rng.normal(0, 0.15, count))
+    unemployment = (-numeric_change * sector_column('employment_multiplier')[sector] * 0.05 * stability
+                    + rng.normal(0, 0.3, count))
+    environment = numeric_change * sector_column('environmental_factor')[sector] * 0.1 + rng.normal(0, 0.25, count)
+    confidence = np.clip(0.8 - 0.2 * (np.abs(numeric_change) > 30) - 0.15 * (time_period > 36)
+                         + rng.normal(0, 0.05, count), 0.3, 1.0)
+    sentiment = np.clip(gdp * 0.3 - unemployment * 0.4 - inflation * 0.3 + rng.normal(0, 0.1, count), -1, 1)
+
+    # Sector impact shares: dependencies on the primary sector, about half for the primary itself
+    shares = SECTOR_DEPENDENCIES[sector] * 0.1 + rng.uniform(0, 0.05, (count, len(SECTORS)))
+    shares[np.arange(count), sector] = 0.5 + rng.uniform(-0.1, 0.1, count)
+    sector_gdp = (gdp[:, None] * shares).round(2)
+    sector_employment = (-unemployment[:, None] * shares).round(2)
+
+    names = [f"{SAMPLE_INDIAN_POLICIES[t]['name']} #{i}" for t, i in zip(templates.tolist(), ids.tolist())]
+    descriptions = [SAMPLE_INDIAN_POLICIES[t]['description'] for t in templates.tolist()]
+    # Text in the format SQLAlchemy stores, so driver-level inserts match ORM-written rows
+    timestamps = [str(created_from + timedelta(seconds=offset)) for offset in created_offsets.tolist()]
+    sector_names = [SECTORS[s] for s in sector.tolist()]
+    region_names = [REGIONS[r] for r in region.tolist()]
+
+    policies = list(zip(ids.tolist(), names, sector_names, region_names, numeric_change.tolist(),
+                        time_period.tolist(), descriptions, timestamps))
+    predictions = list(zip(ids.tolist(), ids.tolist(), gdp.round(2).tolist(), inflation.round(2).tolist(),
+                           unemployment.round(2).tolist(), environment.round(2).tolist(),
+                           confidence.round(2).tolist(), sentiment.round(2).tolist(), [0.7] * count, timestamps))
+    sector_impacts = list(zip(
+        np.repeat(ids, len(SECTORS)).tolist(), list(SECTORS) * count, sector_gdp.ravel().tolist(),
+        sector_employment.ravel().tolist(), (shares * 100).round(1).ravel().tolist()
+    ))
+    return policies, predictions, sector_impacts
+
+
+def _copy_rows(connection, table, columns, rows):
+    """PostgreSQL COPY of row tuples"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+# DBAPI placeholder per parameter style
+_PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s'}
+
+
+def _insert_rows(connection, table, columns, rows):
+    dialect = connection.dialect
+    if dialect.name == 'postgresql':
+        _copy_rows(connection, table.name, columns, rows)
+    elif dialect.paramstyle in _PLACEHOLDERS:
+        # Plain executemany of tuples; SQLAlchemy's per-row parameter processing dominates otherwise
+        placeholders = ', '.join([_PLACEHOLDERS[dialect.paramstyle]] * len(columns))
+        connection.exec_driver_sql(f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+
+def seed_policies(count, batch_size=SEED_BATCH_SIZE, seed=None, days=365, progress=None):
+    """
+    Add ``count`` synthetic policies, each with a prediction and a row per sector,
+    committing every ``batch_size`` policies. Creation times are spread over the
+    last ``days`` days. ``progress(done, total)`` is called after each batch.
+    Returns the (first, last) policy ids created.
+    """
+    rng = np.random.default_rng(seed)
+    created_from = datetime.utcnow() - timedelta(days=days)
+
+    with db.engine.connect() as connection:
+        # Ids are assigned here so predictions and sector rows can reference them without RETURNING
+        with connection.begin():
+            start_id = max(
+                connection.execute(select(func.coalesce(func.max(Policy.id), 0))).scalar(),
+                connection.execute(select(func.coalesce(func.max(PolicyPrediction.id), 0))).scalar(),
+            ) + 1
+
+        done = 0
+        while done < count:
+            size = min(batch_size, count - done)
+            policies, predictions, sector_impacts = generate_batch(rng, start_id + done, size, created_from, days)
+            with connection.begin():
+                _insert_rows(connection, Policy.__table__, POLICY_COLUMNS, policies)
+                _insert_rows(connection, PolicyPrediction.__table__, PREDICTION_COLUMNS, predictions)
+                _insert_rows(connection, SectorImpact.__table__, SECTOR_IMPACT_COLUMNS, sector_impacts)
+            done += size
+            if progress:
+                progress(done, count)
+
+        if connection.dialect.name == 'postgresql' and count:
+            # Explicit ids don't advance the serial sequences
+            with connection.begin():
+                for table in ('policy', 'policy_prediction'):
+                    connection.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                    ))
+
+    # Core inserts bypass the ORM flush hooks, so invalidate cached pages explicitly
+    response_cache.bump()
+    logging.info(f"Seeded {count} policies (ids {start_id}-{start_id + count - 1})")
+    return start_id, start_id + count - 1
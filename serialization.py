@@ -0,0 +1,95 @@
+"""
+JSON serialization: a fast encoder (orjson when installed, the standard library
+otherwise), the Flask JSON provider built on it and streaming array output
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is an optional speedup
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Items encoded per chunk when streaming a JSON array
+STREAM_CHUNK_SIZE = 500
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Encode the types the stdlib and orjson don't handle natively"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    """Serialize ``obj`` to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps(obj, sort_keys=False):
+    """Serialize ``obj`` to a compact JSON string"""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_default, option=options).decode('utf-8')
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by ``dumps``; used by ``jsonify`` and the ``tojson``
+    template filter. Calls with other json.dumps keyword arguments (e.g.
+    ``indent``) fall back to the standard library encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        # Jinja's tojson filter passes sort_keys=True
+        sort_keys = kwargs.pop('sort_keys', False)
+        if orjson is not None and not kwargs:
+            return dumps(obj, sort_keys=sort_keys)
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, sort_keys=sort_keys, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = super().dumps(obj, indent=2, default=_default)
+        else:
+            body = dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def iter_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Encode an iterable as one JSON array, yielding a bytes chunk per ``chunk_size`` items"""
+    yield b'['
+    batch = []
+    first = True
+    for item in items:
+        batch.append(dumps_bytes(item))
+        if len(batch) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b'' if first else b',') + b','.join(batch)
+    yield b']'
+
@@ -0,0 +1,213 @@
+"""
+In-memory nearest-neighbour index over historical policies
+"""
+import logging
+import threading
+import time
+import warnings
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import select, func
+
+from app import db
+from models import HistoricalPolicy
+
+# Relative importance of each feature group in the distance
+FEATURE_WEIGHTS = {
+    'sector': 3.0,
+    'country': 1.0,
+    'region': 1.0,
+    'year': 0.5,
+    'outcome': 1.0,
+}
+
+OUTCOME_COLUMNS = ['actual_gdp_impact', 'actual_inflation_impact',
+                   'actual_unemployment_impact', 'actual_environmental_impact']
+
+# Seconds between checks that the historical table still matches the index
+DEFAULT_REFRESH_INTERVAL = 30
+
+_Snapshot = namedtuple('_Snapshot', [
+    'ids', 'matrix', 'row_norms', 'sector_index', 'country_index', 'region_index',
+    'year_mean', 'year_std', 'outcome_mean', 'outcome_std', 'signature'
+])
+
+
+class SimilarPolicyIndex:
+    """
+    Feature matrix of every HistoricalPolicy (one-hot sector, country and region
+    when recorded, scaled year and outcome profile) queried with a vectorized
+    squared-distance scan.
+
+    The matrix is rebuilt lazily when ``invalidate()`` has been called or when the
+    table's row count, highest id or latest ``updated_at`` changes (the last
+    catches in-place upserts made by other processes).
+    """
+
+    def __init__(self, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a rebuild before the next query"""
+        self._checked_at = 0.0
+        self._snapshot = None
+
+    def _table_signature(self):
+        return tuple(db.session.execute(
+            select(func.count(HistoricalPolicy.id), func.max(HistoricalPolicy.id),
+                   func.max(HistoricalPolicy.updated_at))
+        ).one())
+
+    def _current(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.refresh_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+                return snapshot
+
+            signature = self._table_signature()
+            if snapshot is None or snapshot.signature != signature:
+                snapshot = self._build(signature)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def _build(self, signature):
+        started = time.perf_counter()
+        rows = db.session.execute(select(
+            HistoricalPolicy.id,
+            HistoricalPolicy.sector,
+            HistoricalPolicy.country,
+            HistoricalPolicy.region,
+            HistoricalPolicy.year_implemented,
+            *[getattr(HistoricalPolicy, column) for column in OUTCOME_COLUMNS]
+        )).all()
+
+        if not rows:
+            return _Snapshot(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32),
+                             np.empty(0, dtype=np.float32), {}, {}, {}, 0.0, 1.0,
+                             np.zeros(len(OUTCOME_COLUMNS)), np.ones(len(OUTCOME_COLUMNS)), signature)
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        sectors = [row[1] for row in rows]
+        countries = [row[2] for row in rows]
+        regions = [row[3] for row in rows]
+        years = np.array([row[4] for row in rows], dtype=np.float64)
+        outcomes = np.array([row[5:] for row in rows], dtype=np.float64).reshape(len(rows), len(OUTCOME_COLUMNS))
+
+        sector_index = {name: i for i, name in enumerate(sorted(set(sectors)))}
+        country_index = {name: i for i, name in enumerate(sorted(set(countries)))}
+        # Only records that know their region get a region feature
+        region_index = {name: i for i, name in enumerate(sorted(set(regions) - {None}))}
+
+        year_mean = years.mean()
+        year_std = years.std() or 1.0
+        with warnings.catch_warnings():
+            # Columns with no recorded outcomes at all yield NaN, replaced below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            outcome_mean = np.nan_to_num(np.nanmean(outcomes, axis=0))
+            outcome_std = np.nan_to_num(np.nanstd(outcomes, axis=0))
+        outcome_std[outcome_std == 0] = 1.0
+
+        width = len(sector_index) + len(country_index) + len(region_index) + 1 + len(OUTCOME_COLUMNS)
+        matrix = np.zeros((len(rows), width), dtype=np.float32)
+        row_numbers = np.arange(len(rows))
+
+        offset = 0
+        matrix[row_numbers, [offset + sector_index[s] for s in sectors]] = FEATURE_WEIGHTS['sector']
+        offset += len(sector_index)
+        matrix[row_numbers, [offset + country_index[c] for c in countries]] = FEATURE_WEIGHTS['country']
+        offset += len(country_index)
+        regional = [i for i, region in enumerate(regions) if region is not None]
+        matrix[regional, [offset + region_index[regions[i]] for i in regional]] = FEATURE_WEIGHTS['region']
+        offset += len(region_index)
+        matrix[:, offset] = (years - year_mean) / year_std * FEATURE_WEIGHTS['year']
+        offset += 1
+        # Missing outcomes sit at the mean so they neither attract nor repel
+        matrix[:, offset:] = np.nan_to_num((outcomes - outcome_mean) / outcome_std) * FEATURE_WEIGHTS['outcome']
+
+        snapshot = _Snapshot(
+            ids=ids,
+            matrix=matrix,
+            row_norms=np.einsum('ij,ij->i', matrix, matrix),
+            sector_index=sector_index,
+            country_index=country_index,
+            region_index=region_index,
+            year_mean=year_mean,
+            year_std=year_std,
+            outcome_mean=outcome_mean,
+            outcome_std=outcome_std,
+            signature=signature,
+        )
+        logging.info("Built similarity index over %d historical policies in %.1f ms",
+                     len(rows), (time.perf_counter() - started) * 1000)
+        return snapshot
+
+    def _query_vector(self, snapshot, sector, country, region, year, outcomes):
+        vector = np.zeros(snapshot.matrix.shape[1], dtype=np.float32)
+
+        offset = 0
+        if sector in snapshot.sector_index:
+            vector[offset + snapshot.sector_index[sector]] = FEATURE_WEIGHTS['sector']
+        offset += len(snapshot.sector_index)
+        if country in snapshot.country_index:
+            vector[offset + snapshot.country_index[country]] = FEATURE_WEIGHTS['country']
+        offset += len(snapshot.country_index)
+        if region in snapshot.region_index:
+            vector[offset + snapshot.region_index[region]] = FEATURE_WEIGHTS['region']
+        offset += len(snapshot.region_index)
+        vector[offset] = (year - snapshot.year_mean) / snapshot.year_std * FEATURE_WEIGHTS['year']
+        offset += 1
+        outcomes = np.array([np.nan if value is None else value for value in outcomes], dtype=np.float64)
+        vector[offset:] = np.nan_to_num((outcomes - snapshot.outcome_mean) / snapshot.outcome_std) \
+            * FEATURE_WEIGHTS['outcome']
+        return vector
+
+    def nearest_ids(self, sector, country, year, outcomes, k=3, region=None):
+        """
+        Return up to ``k`` HistoricalPolicy ids ordered from most to least similar.
+        ``outcomes`` is (gdp, inflation, unemployment, environmental) impact.
+        """
+        snapshot = self._current()
+        if not len(snapshot.ids):
+            return []
+
+        query = self._query_vector(snapshot, sector, country, region, year, outcomes)
+        # ||a - q||^2 = ||a||^2 - 2 a.q + ||q||^2; the last term is constant for ranking
+        distances = snapshot.row_norms - 2.0 * (snapshot.matrix @ query)
+
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return snapshot.ids[nearest].tolist()
+
+    def similar_to_prediction(self, policy, prediction, k=3, country='India'):
+        """
+        Rank historical policies against a simulated policy and its predicted
+        impacts. Simulated policies are all Indian, so ``country`` is fixed and
+        the policy's region matches historical records from the same region.
+        """
+        year = policy.created_at.year if policy.created_at else time.gmtime().tm_year
+        ids = self.nearest_ids(
+            policy.sector, country, year,
+            (prediction.gdp_impact, prediction.inflation_impact,
+             prediction.unemployment_impact, prediction.environmental_impact),
+            k=k, region=policy.region
+        )
+        if not ids:
+            return []
+
+        by_id = {row.id: row for row in HistoricalPolicy.query.filter(HistoricalPolicy.id.in_(ids))}
+        return [by_id[i] for i in ids if i in by_id]
+
+
+# Shared per-process index
+similar_policy_index = SimilarPolicyIndex()
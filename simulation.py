@@ -0,0 +1,122 @@
+"""
+Policy simulation: validate inputs, predict impacts and persist the results
+"""
+import logging
+import threading
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app import db
+from models import Policy, PolicyPrediction
+from coalescing import prediction_flight, prediction_key
+
+logger = logging.getLogger(__name__)
+
+# Largest batch accepted by /api/simulate
+MAX_SIMULATION_BATCH = 1000
+
+_predictor = None
+_predictor_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmup_started = False
+
+
+def get_predictor():
+    """
+    Return the shared ML predictor. The ML stack is imported, and the models
+    loaded from MODEL_ARTIFACT_PATH (or trained), on first use rather than at startup.
+    """
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                from ml_models import PolicyImpactPredictor
+                _predictor = PolicyImpactPredictor.load_or_train(current_app.config['MODEL_ARTIFACT_PATH'])
+    return _predictor
+
+
+def warm_up_predictor(app):
+    """Load the predictor in a background thread so the first simulation doesn't wait for it"""
+    global _warmup_started
+    if _warmup_started:
+        return
+    # Not _predictor_lock: that is held for the whole model load, and requests must not wait on it
+    with _warmup_lock:
+        if _warmup_started or _predictor is not None:
+            return
+        _warmup_started = True
+
+    def load():
+        with app.app_context():
+            try:
+                # Attribution tables too, so the first simulation doesn't build them
+                get_predictor().prepare_attributions()
+            except Exception as e:
+                logger.exception("Error loading ML models: %s", e)
+
+    threading.Thread(target=load, name='predictor-warmup', daemon=True).start()
+
+
+def simulate_policies(inputs):
+    """
+    Predict and persist a batch of normalized inputs (see validation.normalize_simulations).
+
+    Predictions are made for the whole batch before anything is written (inputs
+    matching an in-flight prediction share its result, sector breakdown included), and
+    every Policy and PolicyPrediction is committed in a single transaction, so a
+    failure leaves no policy without its prediction. Returns [(policy, prediction)],
+    reloaded after the commit with one eager query so they serialize without further SQL.
+    """
+    predictor = get_predictor()
+    # Identical inputs already being predicted by another request share that result
+    predictions = prediction_flight.run_batch(
+        [prediction_key(policy_data) for policy_data in inputs],
+        lambda indexes: predictor.predict_batch([inputs[i] for i in indexes])
+    )
+
+    results = []
+    try:
+        for policy_data, prediction_data in zip(inputs, predictions):
+            policy = Policy(
+                name=policy_data['name'],
+                sector=policy_data['sector'],
+                region=policy_data['region'],
+                numeric_change=policy_data['numeric_change'],
+                time_period=policy_data['time_period'],
+                description=policy_data['description']
+            )
+
+            prediction = PolicyPrediction(
+                policy=policy,
+                gdp_impact=prediction_data['gdp_impact'],
+                inflation_impact=prediction_data['inflation_impact'],
+                unemployment_impact=prediction_data['unemployment_impact'],
+                environmental_impact=prediction_data['environmental_impact'],
+                confidence_score=prediction_data['confidence_score'],
+                sentiment_score=prediction_data.get('sentiment_score', 0),
+                sentiment_confidence=prediction_data.get('sentiment_confidence', 0)
+            )
+            prediction.set_sector_breakdown(prediction_data['sector_breakdown'])
+            prediction.set_attributions(prediction_data.get('attributions'))
+
+            db.session.add(policy)
+            results.append((policy, prediction))
+
+        db.session.flush()
+        prediction_ids = [prediction.id for _, prediction in results]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # The commit expired every object; reload them all (sector breakdowns and attributions
+    # included) in one pass instead of letting each attribute access refresh its own row
+    db.session.execute(
+        select(Policy, PolicyPrediction)
+        .join(PolicyPrediction, PolicyPrediction.policy_id == Policy.id)
+        .where(PolicyPrediction.id.in_(prediction_ids))
+        .options(selectinload(PolicyPrediction.sector_impacts), selectinload(PolicyPrediction.attributions))
+    ).all()
+    return results
@@ -108,7 +108,8 @@ document.addEventListener('DOMContentLoaded', function() {
      */
     function initSectorChart() {
         const sectorChartCanvas = document.getElementById('sectorChart');
-        if (!sectorChartCanvas) return;
+        // Skip canvases the page has already drawn from server-side totals
+        if (!sectorChartCanvas || Chart.getChart(sectorChartCanvas)) return;
 
         const sectorCounts = {};
         dashboardData.policies.forEach(policy => {
@@ -167,7 +168,8 @@ document.addEventListener('DOMContentLoaded', function() {
      */
     function initImpactChart() {
         const impactChartCanvas = document.getElementById('impactChart');
-        if (!impactChartCanvas) return;
+        // Skip canvases the page has already drawn from server-side totals
+        if (!impactChartCanvas || Chart.getChart(impactChartCanvas)) return;
 
         const gdpImpacts = dashboardData.policies.map(p => p.gdpImpact).filter(val => !isNaN(val));
         const inflationImpacts = dashboardData.policies.map(p => p.inflationImpact).filter(val => !isNaN(val));
@@ -358,28 +360,24 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     /**
-     * Setup table row click handlers
+     * Setup table row click handlers (delegated, so rows rendered from search results work too)
      */
     function setupTableRowHandlers(table) {
-        const rows = table.querySelectorAll('tbody tr');
-        rows.forEach(row => {
-            // Skip empty state row
-            if (row.cells.length === 1) return;
-            
-            row.addEventListener('click', function(e) {
-                // Don't trigger on button clicks
-                if (e.target.closest('.btn')) return;
-                
-                // Highlight selected row
-                table.querySelectorAll('tbody tr').forEach(r => r.classList.remove('table-primary'));
-                this.classList.add('table-primary');
-                
-                // Extract policy ID and navigate (if view button exists)
-                const viewBtn = this.querySelector('a[href*="results"]');
-                if (viewBtn) {
-                    window.location.href = viewBtn.href;
-                }
-            });
+        const tbody = table.querySelector('tbody');
+        tbody.addEventListener('click', function(e) {
+            const row = e.target.closest('tr');
+            // Skip empty state and no-results rows, and button clicks
+            if (!row || row.cells.length === 1 || e.target.closest('.btn')) return;
+
+            // Highlight selected row
+            tbody.querySelectorAll('tr').forEach(r => r.classList.remove('table-primary'));
+            row.classList.add('table-primary');
+
+            // Extract policy ID and navigate (if view button exists)
+            const viewBtn = row.querySelector('a[href*="results"]');
+            if (viewBtn) {
+                window.location.href = viewBtn.href;
+            }
         });
     }
 
@@ -387,22 +385,38 @@ document.addEventListener('DOMContentLoaded', function() {
      * Handle search functionality
      */
     function handleSearch(event) {
-        const searchTerm = event.target.value.toLowerCase();
-        filterTable(searchTerm, null);
+        filterTable(event.target.value, null);
     }
 
     /**
-     * Handle sector filter
+     * Handle sector filter: searches are re-run with the sector, otherwise the
+     * server renders the first page of that sector
      */
     function handleSectorFilter(event) {
-        const sectorFilter = event.target.value;
-        filterTable(null, sectorFilter);
+        const searchInput = document.getElementById('searchInput');
+        if (searchInput && searchInput.value.trim()) {
+            filterTable(null, event.target.value);
+            return;
+        }
+        const url = new URL(window.location.href);
+        url.searchParams.delete('page');
+        if (event.target.value) {
+            url.searchParams.set('sector', event.target.value);
+        } else {
+            url.searchParams.delete('sector');
+        }
+        window.location.href = url.toString();
     }
 
     /**
-     * Filter table based on search term and sector
+     * Filter the table by search term and sector. Searches are run server-side by
+     * /api/search (full-text, ranked, paginated) and their results replace the
+     * table body; clearing the search restores the server-rendered page.
      */
-    function filterTable(searchTerm = null, sectorFilter = null) {
+    let searchRequestId = 0;
+    let renderedPage = null;
+
+    function filterTable(searchTerm = null, sectorFilter = null, page = 1) {
         const table = document.getElementById('policiesTable');
         if (!table) return;
 
@@ -410,34 +424,135 @@ document.addEventListener('DOMContentLoaded', function() {
         const sectorSelect = document.getElementById('sectorFilter');
         
         const currentSearch = searchTerm !== null ? searchTerm : 
-                            (searchInput ? searchInput.value.toLowerCase() : '');
+                            (searchInput ? searchInput.value : '');
         const currentSector = sectorFilter !== null ? sectorFilter : 
                             (sectorSelect ? sectorSelect.value : '');
 
-        const rows = table.querySelectorAll('tbody tr');
-        let visibleCount = 0;
+        const tbody = table.querySelector('tbody');
+        const pageLinks = document.getElementById('policiesPageLinks');
+        const pageLabel = document.getElementById('policiesPageLabel');
+        if (renderedPage === null) {
+            renderedPage = {
+                rows: tbody.innerHTML,
+                links: pageLinks ? pageLinks.innerHTML : '',
+                label: pageLabel ? pageLabel.textContent : ''
+            };
+        }
 
-        rows.forEach(row => {
-            // Skip empty state row
-            if (row.cells.length === 1) return;
+        const requestId = ++searchRequestId;
+        if (!currentSearch.trim()) {
+            tbody.innerHTML = renderedPage.rows;
+            if (pageLinks) pageLinks.innerHTML = renderedPage.links;
+            if (pageLabel) pageLabel.textContent = renderedPage.label;
+            return;
+        }
 
-            const policyName = row.cells[0].textContent.toLowerCase();
-            const sectorBadge = row.cells[1].querySelector('.badge');
-            const sector = sectorBadge ? sectorBadge.textContent.trim() : '';
+        const pager = document.getElementById('policiesPager');
+        const params = new URLSearchParams({
+            q: currentSearch,
+            scope: 'policies',
+            page: page,
+            per_page: pager ? pager.dataset.perPage : 50
+        });
+        if (currentSector) params.set('sector', currentSector);
+
+        fetch(`/api/search?${params.toString()}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`Search failed: ${response.status}`);
+                return response.json();
+            })
+            .then(data => {
+                // Ignore responses to searches the user has already typed past
+                if (requestId !== searchRequestId) return;
+                tbody.innerHTML = data.results.map(renderPolicyRow).join('');
+                updateNoResultsMessage(table, data.results.length);
+                renderSearchPager(data, currentSearch, currentSector);
+            })
+            .catch(error => {
+                console.error('Error searching policies:', error);
+                if (requestId === searchRequestId) {
+                    showNotification('Search failed, please try again', 'danger');
+                }
+            });
+    }
 
-            const matchesSearch = !currentSearch || policyName.includes(currentSearch);
-            const matchesSector = !currentSector || sector === currentSector;
+    /**
+     * Previous/next buttons for a page of search results
+     */
+    function renderSearchPager(data, searchTerm, sector) {
+        const pageLinks = document.getElementById('policiesPageLinks');
+        const pageLabel = document.getElementById('policiesPageLabel');
+        if (pageLabel) pageLabel.textContent = `Search results, page ${data.page}`;
+        if (!pageLinks) return;
+
+        pageLinks.innerHTML = '';
+        const addButton = (label, page) => {
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'btn btn-sm btn-outline-secondary';
+            button.textContent = label;
+            button.addEventListener('click', () => filterTable(searchTerm, sector, page));
+            pageLinks.appendChild(button);
+        };
+        if (data.page > 1) addButton('Previous', data.page - 1);
+        if (data.has_next) addButton('Next', data.page + 1);
+    }
 
-            if (matchesSearch && matchesSector) {
-                row.style.display = '';
-                visibleCount++;
-            } else {
-                row.style.display = 'none';
-            }
-        });
+    /**
+     * One table row for a policy search result (same markup as the server-rendered rows)
+     */
+    function renderPolicyRow(policy) {
+        const prediction = policy.predictions && policy.predictions.length ? policy.predictions[0] : null;
+        const badge = (value, positiveClass, negativeClass, suffix) => prediction && value != null ?
+            `<span class="badge ${value > 0 ? positiveClass : negativeClass}">${value.toFixed(2)}${suffix}</span>` :
+            '<span class="text-muted">N/A</span>';
+        // created_at is an ISO timestamp in UTC; show its date as the server does (MM/DD/YYYY)
+        const created = policy.created_at ? policy.created_at.slice(0, 10).split('-') : null;
+        const description = policy.description ?
+            `<small class="text-muted">${escapeHtml(policy.description.slice(0, 50))}...</small>` : '';
+        const pdfLink = prediction ? `
+                <a href="/export_pdf/${policy.id}" class="btn btn-sm btn-outline-danger" title="Export PDF">
+                    <i class="fas fa-file-pdf"></i>
+                </a>` : '';
+
+        return `
+            <tr class="policy-row" data-policy-id="${policy.id}">
+                <td>
+                    <div class="fw-bold">${escapeHtml(policy.name)}</div>
+                    ${description}
+                </td>
+                <td><span class="badge bg-primary">${escapeHtml(policy.sector)}</span></td>
+                <td>${escapeHtml(policy.region)}</td>
+                <td>
+                    <span class="badge ${policy.numeric_change > 0 ? 'bg-success' : 'bg-danger'}">
+                        ${policy.numeric_change.toFixed(1)}%
+                    </span>
+                </td>
+                <td>${badge(prediction && prediction.gdp_impact, 'bg-success', 'bg-danger', '%')}</td>
+                <td>${badge(prediction && prediction.inflation_impact, 'bg-warning', 'bg-info', 'pp')}</td>
+                <td>${badge(prediction && prediction.unemployment_impact, 'bg-danger', 'bg-success', 'pp')}</td>
+                <td>
+                    <small class="text-muted">
+                        ${created ? `${created[1]}/${created[2]}/${created[0]}` : 'N/A'}
+                    </small>
+                </td>
+                <td>
+                    <div class="btn-group" role="group">
+                        <a href="/results/${policy.id}" class="btn btn-sm btn-outline-primary" title="View Results">
+                            <i class="fas fa-eye"></i>
+                        </a>${pdfLink}
+                    </div>
+                </td>
+            </tr>`;
+    }
 
-        // Show/hide no results message
-        updateNoResultsMessage(table, visibleCount);
+    /**
+     * Escape text for insertion into HTML
+     */
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value === null || value === undefined ? '' : String(value);
+        return div.innerHTML;
     }
 
     /**
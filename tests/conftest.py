@@ -0,0 +1,88 @@
+"""
+Shared fixtures. The app reads its configuration from the environment at
+import time, so a scratch directory is set up before anything imports it.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+_scratch = tempfile.mkdtemp(prefix='policy-simulator-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_scratch, 'test.db')}",
+    'MODEL_ARTIFACT_PATH': os.path.join(_scratch, 'model.joblib'),
+    'REPORT_CACHE_DIR': os.path.join(_scratch, 'report_cache'),
+    'JOB_RESULTS_DIR': os.path.join(_scratch, 'job_results'),
+    'BACKTEST_DIR': os.path.join(_scratch, 'backtests'),
+    'RESPONSE_CACHE_GENERATION_FILE': os.path.join(_scratch, 'cache_generation'),
+    'RESPONSE_CACHE': 'off',
+    'JOB_WORKERS': '0',
+    'ML_WARMUP': 'off',
+    'LOG_LEVEL': 'error',
+})
+os.environ.pop('METRICS_DIR', None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    import simulation
+    from ml_models import PolicyImpactPredictor
+
+    app = create_app()
+    # A small seeded model keeps the suite fast and its predictions stable
+    simulation._predictor = PolicyImpactPredictor(n_estimators=10, training_samples=200, training_seed=0)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_statements(app):
+    """``with count_statements() as statements:`` collects the SQL run inside the block"""
+    from sqlalchemy import event
+    from app import db
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return counting
+
+
+def simulation_input(i=0, **overrides):
+    record = {'name': f'Policy {i}', 'sector': 'Energy', 'region': 'Western India',
+              'numeric_change': 5 + i % 10, 'time_period': 12}
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture
+def create_policies(client):
+    """Simulate ``count`` policies through the JSON API and return their result dicts"""
+    def create(count):
+        response = client.post('/api/simulate', json=[simulation_input(i) for i in range(count)])
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['results']
+
+    return create
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from attribution import (FEATURES, attribution_dicts, contribution_table, forest_attributions,
+                         linear_attributions)
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(-50, 50, 300), rng.integers(1, 60, 300),
+                         rng.integers(0, 8, 300), rng.integers(0, 6, 300)]).astype(float)
+    y = 0.1 * X[:, 0] + 0.02 * X[:, 1] * (X[:, 2] > 3) - 0.3 * X[:, 3] + rng.normal(0, 0.2, 300)
+    return X, y
+
+
+def test_forest_attributions_sum_to_prediction(data):
+    X, y = data
+    forest = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+
+    base, contributions = forest_attributions(forest, X[:50])
+
+    assert contributions.shape == (50, len(FEATURES))
+    np.testing.assert_allclose(base + contributions.sum(axis=1), forest.predict(X[:50]), rtol=0, atol=1e-10)
+
+
+def test_contribution_table_is_cached_per_forest(data):
+    X, y = data
+    forest = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y)
+    assert contribution_table(forest) is contribution_table(forest)
+
+
+def test_linear_attributions_sum_to_prediction(data):
+    X, y = data
+    model = LinearRegression().fit(X, y)
+
+    base, contributions = linear_attributions(model, X[:50], X.mean(axis=0))
+
+    np.testing.assert_allclose(base + contributions.sum(axis=1), model.predict(X[:50]), rtol=0, atol=1e-10)
+    # At the mean every feature contributes nothing
+    np.testing.assert_allclose(linear_attributions(model, X.mean(axis=0)[None, :], X.mean(axis=0))[1], 0,
+                               atol=1e-12)
+
+
+def test_attribution_dicts():
+    contributions = np.arange(2 * 2 * len(FEATURES), dtype=float).reshape(2, 2, len(FEATURES)) / 3
+    dicts = attribution_dicts(('gdp_impact', 'inflation_impact'), np.array([0.123456, -1.0]), contributions)
+
+    assert len(dicts) == 2
+    assert dicts[1]['inflation_impact']['base_value'] == -1.0
+    assert dicts[0]['gdp_impact'] == {'base_value': 0.1235,
+                                      'contributions': dict(zip(FEATURES, [0.0, 0.3333, 0.6667, 1.0]))}
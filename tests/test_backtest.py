@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from backtest import METRICS, _group_metrics
+
+
+def test_group_metrics():
+    predicted = np.array([[1.0, 2.0], [3.0, -1.0], [-2.0, 0.5], [4.0, 1.0]])
+    actual = np.array([[2.0, 1.0], [1.0, np.nan], [-1.0, -0.5], [4.0, 3.0]])
+    groups = np.array([0, 0, 1, 1])
+
+    result = _group_metrics(predicted, actual, groups, 3)
+
+    assert set(result) == set(METRICS)
+    for values in result.values():
+        assert values.shape == (3, 2)
+
+    # Rows without an actual value are left out
+    np.testing.assert_array_equal(result['n'], [[2, 1], [2, 2], [0, 0]])
+
+    # Group 0, first indicator: errors -1 and 2
+    assert result['mae'][0, 0] == pytest.approx(1.5)
+    assert result['rmse'][0, 0] == pytest.approx(np.sqrt(2.5))
+    assert result['bias'][0, 0] == pytest.approx(0.5)
+    assert result['direction_accuracy'][0, 0] == pytest.approx(1.0)
+    # Actuals 2 and 1 (mean 1.5): SST 0.5, SSE 5
+    assert result['r2'][0, 0] == pytest.approx(1 - 5 / 0.5)
+
+    # Group 1, second indicator: errors 1 and -2, one direction wrong
+    assert result['bias'][1, 1] == pytest.approx(-0.5)
+    assert result['direction_accuracy'][1, 1] == pytest.approx(0.5)
+
+    # A single observation has no R²; an empty group has a count of 0 and no metrics
+    assert np.isnan(result['r2'][0, 1])
+    for name in METRICS[1:]:
+        assert np.isnan(result[name][2]).all()
+
+
+def test_group_metrics_match_overall_when_one_group():
+    rng = np.random.default_rng(1)
+    predicted, actual = rng.normal(size=(40, 3)), rng.normal(size=(40, 3))
+
+    result = _group_metrics(predicted, actual, np.zeros(40, dtype=int), 1)
+
+    np.testing.assert_allclose(result['mae'][0], np.abs(predicted - actual).mean(axis=0))
+    np.testing.assert_allclose(result['rmse'][0], np.sqrt(((predicted - actual) ** 2).mean(axis=0)))
+    sst = ((actual - actual.mean(axis=0)) ** 2).sum(axis=0)
+    np.testing.assert_allclose(result['r2'][0], 1 - ((predicted - actual) ** 2).sum(axis=0) / sst)
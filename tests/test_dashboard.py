@@ -0,0 +1,47 @@
+import re
+
+from routes import DASHBOARD_PER_PAGE
+
+
+def rendered_ids(html):
+    return [int(policy_id) for policy_id in re.findall(r'class="policy-row" data-policy-id="(\d+)"', html)]
+
+
+def test_dashboard_renders_one_page(client, create_policies, count_statements):
+    created = create_policies(DASHBOARD_PER_PAGE + 5)
+    newest_first = [result['policy']['id'] for result in reversed(created)]
+
+    with count_statements() as statements:
+        first = client.get('/dashboard').get_data(as_text=True)
+    first_ids = rendered_ids(first)
+    assert len(first_ids) == DASHBOARD_PER_PAGE
+    assert first_ids == sorted(first_ids, reverse=True)
+    assert first_ids == newest_first[:DASHBOARD_PER_PAGE]
+    assert '?page=2' in first
+    # Page ids, their summaries, the count and the chart and header aggregates
+    assert len(statements) <= 6, statements
+
+    second = client.get('/dashboard?page=2').get_data(as_text=True)
+    second_ids = rendered_ids(second)
+    assert second_ids and not set(second_ids) & set(first_ids)
+    assert max(second_ids) < min(first_ids)
+
+
+def test_dashboard_sector_filter(client, create_policies):
+    create_policies(3)
+    html = client.get('/dashboard?sector=Finance').get_data(as_text=True)
+    assert 'No policy simulations found' in html
+    assert '<option value="Finance" selected>' in html
+
+
+def test_search_pages_include_predictions(client, create_policies):
+    create_policies(30)
+
+    first = client.get('/api/search?q=policy&per_page=20').get_json()
+    second = client.get('/api/search?q=policy&per_page=20&page=2').get_json()
+
+    assert first['has_next'] and len(first['results']) == 20
+    assert second['results']
+    assert not {r['id'] for r in first['results']} & {r['id'] for r in second['results']}
+    for result in first['results'] + second['results']:
+        assert result['predictions'][0]['gdp_impact'] is not None
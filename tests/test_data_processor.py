@@ -0,0 +1,43 @@
+import pytest
+
+
+def historical_record(i):
+    return {'name': f'Historical policy {i}', 'country': 'India', 'sector': 'Energy', 'year_implemented': 2000 + i,
+            'region': None, 'numeric_change': None, 'time_period': None, 'actual_gdp_impact': 0.5,
+            'actual_inflation_impact': None, 'actual_unemployment_impact': None,
+            'actual_environmental_impact': None, 'description': None, 'source': 'test'}
+
+
+def test_failed_load_keeps_committed_batches_and_invalidates_caches(app, monkeypatch):
+    import data_processor
+    from models import HistoricalPolicy
+
+    invalidated = []
+    monkeypatch.setattr(data_processor.similar_policy_index, 'invalidate', lambda: invalidated.append('similarity'))
+    monkeypatch.setattr(data_processor.response_cache, 'bump', lambda: invalidated.append('response_cache'))
+
+    def records():
+        for i in range(5):
+            yield historical_record(i)
+        raise ValueError("Missing required field 'name' at dataset.csv:7")
+
+    with app.app_context():
+        with pytest.raises(ValueError):
+            data_processor.upsert_historical_policies(records(), batch_size=2)
+
+        # The first two batches were committed before the failure; the partial third was not
+        names = {name for (name,) in HistoricalPolicy.query.with_entities(HistoricalPolicy.name)}
+        assert {f'Historical policy {i}' for i in range(4)} <= names
+        assert 'Historical policy 4' not in names
+    assert invalidated == ['similarity', 'response_cache']
+
+
+def test_load_that_writes_nothing_keeps_caches(app, monkeypatch):
+    import data_processor
+
+    invalidated = []
+    monkeypatch.setattr(data_processor.response_cache, 'bump', lambda: invalidated.append('response_cache'))
+
+    with app.app_context():
+        assert data_processor.upsert_historical_policies([]) == 0
+    assert invalidated == []
@@ -0,0 +1,34 @@
+import numpy as np
+
+from data.reference import REGION_IDS, REGION_STATES, SECTOR_IDS, STATES
+from drilldown import INDICATORS, drilldown_arrays
+
+
+def test_shares_sum_to_one():
+    sector_ids = [SECTOR_IDS['Energy'], SECTOR_IDS['Technology'], -1, SECTOR_IDS['Agriculture']]
+    region_ids = [REGION_IDS['Western India'], -1, REGION_IDS['Eastern India'], -1]
+    impacts = np.array([[1.5, 0.2, -0.3, 2.0], [0.0] * 4, [-2.0, 1.0, 0.5, np.nan], [0.1, 0.1, 0.1, 0.1]])
+
+    in_region, shares, state_impacts = drilldown_arrays(sector_ids, region_ids, impacts)
+
+    assert shares.shape == in_region.shape == (4, len(STATES))
+    assert state_impacts.shape == (4, len(STATES), len(INDICATORS))
+    np.testing.assert_allclose(shares.sum(axis=1), 1.0, rtol=0, atol=1e-12)
+    assert (shares > 0).all()
+    assert np.isfinite(state_impacts).all()
+
+
+def test_region_membership():
+    in_region, shares, _ = drilldown_arrays([SECTOR_IDS['Finance']] * 2, [REGION_IDS['Southern India'], -1],
+                                            np.ones((2, len(INDICATORS))))
+
+    np.testing.assert_array_equal(in_region[0], REGION_STATES[REGION_IDS['Southern India']])
+    assert not in_region[1].any()
+    # States inside the policy's region weigh more than they would for a policy with no region
+    assert (shares[0][in_region[0]] > shares[1][in_region[0]]).all()
+
+
+def test_no_predictions():
+    in_region, shares, state_impacts = drilldown_arrays([], [], np.empty((0, len(INDICATORS))))
+    assert shares.shape == (0, len(STATES))
+    assert state_impacts.shape == (0, len(STATES), len(INDICATORS))
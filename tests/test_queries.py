@@ -0,0 +1,27 @@
+"""Statement counts of the pages and APIs that serialize many policies at once"""
+
+
+def test_compare_loads_predictions_in_constant_queries(client, create_policies, count_statements):
+    ids = [result['policy']['id'] for result in create_policies(10)]
+    query = '&'.join(f'policies={policy_id}' for policy_id in ids)
+
+    with count_statements() as statements:
+        response = client.get(f'/api/compare?{query}')
+    assert response.status_code == 200
+    assert len(response.get_json()['policies']) == 10
+    # Policies with predictions, then sector impacts and attributions in one IN query each
+    assert len(statements) <= 3, statements
+
+    with count_statements() as statements:
+        assert client.get(f'/compare?{query}').status_code == 200
+    assert len(statements) <= 3, statements
+
+
+def test_search_checks_backend_once(client, create_policies, count_statements):
+    create_policies(3)
+    client.get('/api/search?q=policy')
+
+    with count_statements() as statements:
+        response = client.get('/api/search?q=policy')
+    assert response.status_code == 200
+    assert not any('sqlite_compileoption_used' in statement for statement in statements), statements
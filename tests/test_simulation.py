@@ -0,0 +1,23 @@
+def test_batch_response_needs_no_queries_per_item(create_policies, count_statements):
+    with count_statements() as statements:
+        results = create_policies(50)
+
+    assert len(results) == 50
+    for result in results:
+        assert result['policy']['id'] == result['prediction']['policy_id']
+        assert result['prediction']['sector_breakdown']
+        assert set(result['prediction']['attributions']) == {'gdp_impact', 'inflation_impact',
+                                                             'unemployment_impact', 'environmental_impact'}
+    # The inserts, then one reload of the whole batch: policies with predictions, sector impacts, attributions
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith('SELECT')]
+    assert len(selects) <= 3, selects
+
+
+def test_single_simulation(client):
+    response = client.post('/api/simulate', json={'name': 'Solar rebate', 'sector': 'energy', 'region': 'southern',
+                                                  'numeric_change': 12, 'time_period': 24})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['policy']['sector'] == 'Energy'
+    assert body['policy']['region'] == 'Southern India'
+    assert body['results_url'] == f"/results/{body['policy']['id']}"
@@ -0,0 +1,128 @@
+import math
+
+import pytest
+
+from validation import NAME_MAX_LENGTH, canonical_region, canonical_sector, normalize_simulation, normalize_simulations
+
+
+def simulation(**overrides):
+    record = {'name': 'Fuel subsidy', 'sector': 'Energy', 'region': 'Western India',
+              'numeric_change': 10, 'time_period': 24}
+    record.update(overrides)
+    return record
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Energy', 'Energy'),
+    ('  energy ', 'Energy'),
+    ('IT', 'Technology'),
+    ('health-care', 'Healthcare'),
+    ('Financial_Services', 'Finance'),
+    ('Mining', None),
+    (None, None),
+    (3, None),
+])
+def test_canonical_sector(value, expected):
+    assert canonical_sector(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Northern India', 'Northern India'),
+    ('northern', 'Northern India'),
+    ('NE India', 'North-Eastern India'),
+    ('north eastern', 'North-Eastern India'),
+    ('central_india', 'Central India'),
+    ('Atlantis', None),
+])
+def test_canonical_region(value, expected):
+    assert canonical_region(value) == expected
+
+
+def test_normalizes_valid_input():
+    assert normalize_simulation(simulation(sector='tech', region='southern', numeric_change='-2.5',
+                                           time_period='6', description=None)) == {
+        'name': 'Fuel subsidy', 'sector': 'Technology', 'region': 'Southern India',
+        'numeric_change': -2.5, 'time_period': 6, 'description': '',
+    }
+
+
+def test_time_period_defaults():
+    record = simulation()
+    del record['time_period']
+    assert normalize_simulation(record)['time_period'] == 12
+
+
+@pytest.mark.parametrize('field', ['name', 'sector', 'region', 'numeric_change', 'time_period'])
+@pytest.mark.parametrize('blank', [None, '', '   '])
+def test_blank_fields_are_missing(field, blank):
+    with pytest.raises(ValueError, match=f"Missing required field: {field}"):
+        normalize_simulation(simulation(**{field: blank}))
+
+
+@pytest.mark.parametrize('value', [math.nan, math.inf, -math.inf, 'nan', 'inf', True, False, 'ten', [5]])
+def test_non_numeric_change_rejected(value):
+    with pytest.raises(ValueError, match="numeric_change must be a number"):
+        normalize_simulation(simulation(numeric_change=value))
+
+
+@pytest.mark.parametrize('value', [math.nan, math.inf, True, 12.5, '6.5'])
+def test_non_integer_time_period_rejected(value):
+    with pytest.raises(ValueError, match="time_period must be an integer"):
+        normalize_simulation(simulation(time_period=value))
+
+
+@pytest.mark.parametrize('numeric_change, valid', [
+    (-100, True), (100, True), (100.0, True), (-100.01, False), (100.01, False),
+])
+def test_numeric_change_range(numeric_change, valid):
+    inputs, errors = normalize_simulations([simulation(numeric_change=numeric_change)])
+    assert bool(inputs) is valid
+    if not valid:
+        assert errors[0]['fields'] == {'numeric_change': "Numeric change must be between -100% and 100%"}
+
+
+@pytest.mark.parametrize('time_period, valid', [
+    (1, True), (120, True), ('120', True), (12.0, True), (0, False), (121, False), (-1, False),
+])
+def test_time_period_range(time_period, valid):
+    inputs, errors = normalize_simulations([simulation(time_period=time_period)])
+    assert bool(inputs) is valid
+    if not valid:
+        assert errors[0]['fields'] == {'time_period': "Time period must be between 1 and 120 months"}
+
+
+@pytest.mark.parametrize('name, valid', [
+    ('x' * NAME_MAX_LENGTH, True), (' x' * (NAME_MAX_LENGTH // 2) + '   ', True),
+    ('x' * (NAME_MAX_LENGTH + 1), False), ('x' * 5000, False),
+])
+def test_name_length(name, valid):
+    inputs, errors = normalize_simulations([simulation(name=name)])
+    assert bool(inputs) is valid
+    if not valid:
+        assert errors[0]['fields'] == {'name': f"Name must be at most {NAME_MAX_LENGTH} characters"}
+
+
+def test_collects_every_error_of_every_row():
+    inputs, errors = normalize_simulations([
+        simulation(name='first'),
+        'not an object',
+        simulation(name='', sector='Mining', numeric_change=150),
+        simulation(name='fourth', region='nowhere', time_period=0),
+        simulation(name='fifth', sector='agri'),
+    ])
+
+    assert [record['name'] for record in inputs] == ['first', 'fifth']
+    assert [error['index'] for error in errors] == [1, 2, 3]
+    assert errors[0]['fields'] == {'input': "Each simulation must be an object"}
+    assert set(errors[1]['fields']) == {'name', 'sector', 'numeric_change'}
+    assert errors[1]['error'] == '; '.join(errors[1]['fields'].values())
+    assert set(errors[2]['fields']) == {'region', 'time_period'}
+
+
+def test_blank_field_reports_missing_not_invalid():
+    _, errors = normalize_simulations([simulation(sector='')])
+    assert errors[0]['fields'] == {'sector': "Missing required field: sector"}
+
+
+def test_empty_batch():
+    assert normalize_simulations([]) == ([], [])
@@ -0,0 +1,195 @@
+"""
+Validation and normalization of simulation inputs, a whole batch at a time.
+
+Each field is pulled out as a column, parsed and range-checked with array
+operations, and sector and region names are canonicalized against the shared
+reference data (case, spacing and common short forms are accepted). Every
+problem in every row is collected rather than stopping at the first one. A
+single form or API request runs as a batch of one, so all entry points
+accept and reject exactly the same inputs.
+"""
+import math
+
+import numpy as np
+
+from data.reference import REGIONS, SECTORS
+
+# Input limits
+NUMERIC_CHANGE_RANGE = (-100.0, 100.0)
+TIME_PERIOD_RANGE = (1, 120)
+DEFAULT_TIME_PERIOD = 12
+NAME_MAX_LENGTH = 200  # Policy.name is String(200)
+
+# Accepted spellings (after lowercasing and collapsing spaces, hyphens and underscores) beyond the names themselves
+SECTOR_ALIASES = {
+    'it': 'Technology',
+    'tech': 'Technology',
+    'health': 'Healthcare',
+    'health care': 'Healthcare',
+    'transport': 'Transportation',
+    'agri': 'Agriculture',
+    'farming': 'Agriculture',
+    'financial services': 'Finance',
+}
+REGION_ALIASES = {
+    'north eastern india': 'North-Eastern India',
+    'northeast india': 'North-Eastern India',
+    'north east india': 'North-Eastern India',
+    'ne india': 'North-Eastern India',
+}
+
+
+def _normalize_name(value):
+    return ' '.join(value.replace('-', ' ').replace('_', ' ').lower().split())
+
+
+def _lookup(names, aliases, suffix=None):
+    lookup = {_normalize_name(name): name for name in names}
+    lookup.update({_normalize_name(alias): name for alias, name in aliases.items()})
+    if suffix:
+        # "Northern" for "Northern India"
+        lookup.update({key[:-len(suffix)]: name for key, name in list(lookup.items()) if key.endswith(suffix)})
+    return lookup
+
+
+_SECTOR_LOOKUP = _lookup(SECTORS, SECTOR_ALIASES)
+_REGION_LOOKUP = _lookup(REGIONS, REGION_ALIASES, suffix=' india')
+
+
+def canonical_sector(value):
+    """The reference sector name for ``value``, or None"""
+    return _SECTOR_LOOKUP.get(_normalize_name(value)) if isinstance(value, str) else None
+
+
+def canonical_region(value):
+    """The reference region name for ``value``, or None"""
+    return _REGION_LOOKUP.get(_normalize_name(value)) if isinstance(value, str) else None
+
+
+def _to_float(value):
+    """Float value of a number or numeric string; NaN for anything else (booleans included)"""
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _floats(values):
+    return np.fromiter((_to_float(value) for value in values), dtype=float, count=len(values))
+
+
+def _flags(values, predicate):
+    return np.fromiter((predicate(value) for value in values), dtype=bool, count=len(values))
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+class _Errors:
+    """
+    Per-row error messages; the first failed check of a field is kept. Once
+    ``scope`` is set, only rows inside it are checked.
+    """
+
+    def __init__(self, count):
+        self.failed = np.zeros(count, dtype=bool)
+        self.scope = np.ones(count, dtype=bool)
+        self.messages = {}
+
+    def check(self, field, invalid, message):
+        rows = np.flatnonzero(invalid & self.scope)
+        for row in rows.tolist():
+            self.messages.setdefault(row, {}).setdefault(field, message)
+        self.failed[rows] = True
+
+    def as_list(self):
+        return [
+            {'index': row, 'error': '; '.join(fields.values()), 'fields': fields}
+            for row, fields in sorted(self.messages.items())
+        ]
+
+
+def normalize_simulations(records):
+    """
+    Validate and normalize simulation inputs: dicts with name, sector, region,
+    numeric_change, time_period (default 12) and optional description.
+
+    Returns (inputs, errors). ``inputs`` holds a normalized dict (canonical
+    sector and region, float numeric_change, int time_period) for every valid
+    record, in order; ``errors`` has one entry per invalid record with its
+    ``index``, an ``error`` message and the message for each failed field.
+    """
+    count = len(records)
+    errors = _Errors(count)
+
+    is_object = _flags(records, lambda record: isinstance(record, dict))
+    errors.check('input', ~is_object, "Each simulation must be an object")
+    errors.scope = is_object
+    rows = [record if isinstance(record, dict) else {} for record in records]
+
+    def column(field, default=None):
+        return [row.get(field, default) for row in rows]
+
+    raw_names = column('name')
+    names = [str(value).strip() for value in raw_names]
+    errors.check('name', _flags(raw_names, _is_blank), "Missing required field: name")
+    errors.check('name', _flags(names, lambda value: len(value) > NAME_MAX_LENGTH),
+                 f"Name must be at most {NAME_MAX_LENGTH} characters")
+
+    raw_sectors = column('sector')
+    sectors = [canonical_sector(value) for value in raw_sectors]
+    errors.check('sector', _flags(raw_sectors, _is_blank), "Missing required field: sector")
+    errors.check('sector', _flags(sectors, lambda value: value is None),
+                 f"Invalid sector. Must be one of: {', '.join(SECTORS)}")
+
+    raw_regions = column('region')
+    regions = [canonical_region(value) for value in raw_regions]
+    errors.check('region', _flags(raw_regions, _is_blank), "Missing required field: region")
+    errors.check('region', _flags(regions, lambda value: value is None),
+                 f"Invalid region. Must be one of: {', '.join(REGIONS)}")
+
+    raw_change = column('numeric_change')
+    numeric_change = _floats(raw_change)
+    low, high = NUMERIC_CHANGE_RANGE
+    errors.check('numeric_change', _flags(raw_change, _is_blank), "Missing required field: numeric_change")
+    errors.check('numeric_change', ~np.isfinite(numeric_change), "numeric_change must be a number")
+    errors.check('numeric_change', (numeric_change < low) | (numeric_change > high),
+                 f"Numeric change must be between {low:g}% and {high:g}%")
+
+    raw_period = column('time_period', DEFAULT_TIME_PERIOD)
+    time_period = _floats(raw_period)
+    low, high = TIME_PERIOD_RANGE
+    errors.check('time_period', _flags(raw_period, _is_blank), "Missing required field: time_period")
+    errors.check('time_period', ~np.isfinite(time_period) | (time_period != np.floor(time_period)),
+                 "time_period must be an integer")
+    errors.check('time_period', (time_period < low) | (time_period > high),
+                 f"Time period must be between {low} and {high} months")
+
+    descriptions = column('description')
+    inputs = [
+        {
+            'name': names[i],
+            'sector': sectors[i],
+            'region': regions[i],
+            'numeric_change': numeric_change[i].item(),
+            'time_period': int(time_period[i]),
+            'description': str(descriptions[i]) if descriptions[i] else '',
+        }
+        for i in np.flatnonzero(~errors.failed).tolist()
+    ]
+    return inputs, errors.as_list()
+
+
+def normalize_simulation(record):
+    """A batch of one: the normalized input, or ValueError with the record's error message"""
+    inputs, errors = normalize_simulations([record])
+    if errors:
+        raise ValueError(errors[0]['error'])
+    return inputs[0]